@@ -13,6 +13,14 @@ class Settings(BaseSettings):
     # -------------------------------------------------
     DATABASE_URL: str = ""
 
+    # Applied to both the sync and the async engine (so up to
+    # 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections per worker)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30      # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800    # seconds; below typical proxy idle timeouts
+    DB_POOL_PRE_PING: bool = True
+
     # -------------------------------------------------
     # LLM CONFIG (OpenAI / OpenRouter)
     # -------------------------------------------------
@@ -43,17 +51,119 @@ class Settings(BaseSettings):
     # -------------------------------------------------
     REDIS_URL: str = ""
 
+    # -------------------------------------------------
+    # INGESTION JOBS
+    # -------------------------------------------------
+    INGEST_MODE: str = "inline"           # "inline" (in the request) or "queue" (background job)
+    INGEST_QUEUE_BACKEND: str = "local"   # "local" (in-process) or "redis" (worker processes)
+    INGEST_WORKERS: int = 2               # concurrent jobs per process
+    INGEST_JOB_TTL: int = 86400           # seconds job status is kept
+
     # -------------------------------------------------
     # EMBEDDINGS (MiniLM)
     # -------------------------------------------------
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
     EMBEDDING_DIMENSION: int = 384
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_CACHE_SIZE: int = 50000                     # in-process LRU entries
+    EMBEDDING_CACHE_PATH: str = "embedding_cache.sqlite3"  # "" disables the persistent tier
+    QUERY_CACHE_SIZE: int = 2048
+    QUERY_CACHE_TTL: int = 900  # seconds
+
+    # -------------------------------------------------
+    # EXECUTORS (blocking work off the event loop)
+    # -------------------------------------------------
+    IO_POOL_SIZE: int = 16       # threads for DB / HTTP / Gemini calls
+    IO_CONCURRENCY: int = 64     # max in-flight run_io() calls
+    CPU_POOL_SIZE: int = 2       # processes for embedding / PDF parsing, 0 = use threads
+    CPU_CONCURRENCY: int = 4     # max in-flight run_cpu() calls
+
+    # -------------------------------------------------
+    # VECTOR SEARCH BACKEND
+    # -------------------------------------------------
+    VECTOR_BACKEND: str = "faiss"        # "faiss" (in-process), "faiss_tenant" (per-owner shards)
+                                         # or "pgvector" (server-side)
+    PGVECTOR_INDEX_TYPE: str = "hnsw"    # "hnsw" or "ivfflat" — must match the migration
+    PGVECTOR_EF_SEARCH: int = 40         # hnsw.ef_search: higher = better recall, slower
+    PGVECTOR_PROBES: int = 10            # ivfflat.probes: higher = better recall, slower
+    PGVECTOR_ITERATIVE_SCAN: str = ""    # pgvector >= 0.8: "relaxed_order" keeps scanning until
+                                         # filtered queries fill LIMIT; "" leaves it off
+
+    # -------------------------------------------------
+    # HYBRID RETRIEVAL (lexical + vector, fused with RRF)
+    # -------------------------------------------------
+    HYBRID_RRF_K: int = 60                # RRF constant: score = w / (k + rank)
+    HYBRID_CANDIDATES: int = 20           # results fetched per leg before fusion
+    HYBRID_LEXICAL_TIMEOUT_MS: int = 300  # per-leg latency budgets; a late leg
+    HYBRID_VECTOR_TIMEOUT_MS: int = 800   # is dropped and the other one is used
+
+    # -------------------------------------------------
+    # RAG CONTEXT (merge adjacent chunks → MMR → token budget)
+    # -------------------------------------------------
+    RAG_MERGE_ADJACENT: bool = True
+    RAG_MMR_LAMBDA: float = 0.7           # 1 = relevance only, 0 = diversity only
+    RAG_CONTEXT_TOKENS: int = 3000        # retrieved context budget (≈4 chars per token)
+
+    # -------------------------------------------------
+    # RERANKING (local cross-encoder, optional)
+    # -------------------------------------------------
+    RERANK_ENABLED: bool = False          # per-request `rerank` overrides this
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20           # fused hits rescored
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_TIMEOUT_MS: int = 400          # past this budget the fused order is kept
+    RERANK_PRELOAD: bool = True           # load the cross-encoder at startup (per-request rerank works even when disabled)
+
+    # -------------------------------------------------
+    # RAG ANSWER CACHE (semantic, per process)
+    # -------------------------------------------------
+    ANSWER_CACHE_SIZE: int = 1000         # cached answers; 0 disables the cache
+    ANSWER_CACHE_SIMILARITY: float = 0.95 # min cosine between query embeddings
+    ANSWER_CACHE_TTL: int = 3600          # seconds; 0 = until invalidated
+
+    # -------------------------------------------------
+    # FAISS INDEX
+    # -------------------------------------------------
+    FAISS_INDEX_TYPE: str = "flat"       # "flat", "hnsw", "ivf_flat" or "ivf_pq"
+    FAISS_INDEX_FACTORY: str = ""        # raw faiss.index_factory string, overrides FAISS_INDEX_TYPE
+    FAISS_HNSW_M: int = 32
+    FAISS_HNSW_EF_CONSTRUCTION: int = 40
+    FAISS_HNSW_EF_SEARCH: int = 64       # higher = better recall, slower
+    FAISS_IVF_NLIST: int = 0             # 0 = 4 * sqrt(N)
+    FAISS_IVF_NPROBE: int = 16           # higher = better recall, slower
+    FAISS_PQ_M: int = 48                 # sub-quantizers; must divide 384
+    FAISS_PQ_NBITS: int = 8
+    FAISS_MIN_TRAIN_SIZE: int = 20000    # IVF types stay flat below this
+    FAISS_TRAIN_SAMPLE: int = 100000
+    FAISS_RETRAIN_GROWTH: float = 4.0    # retrain once N > growth * trained size
+    FAISS_MAX_TOMBSTONE_RATIO: float = 0.2
+    FAISS_FILTER_EXACT_THRESHOLD: int = 2000  # filters matching <= this many chunks are brute-forced
+    FAISS_SNAPSHOT_DIR: str = "faiss_snapshots"
+    FAISS_SNAPSHOT_INTERVAL: int = 300  # seconds, 0 disables periodic snapshots
+    FAISS_SHARD_MEMORY_MB: int = 1024    # faiss_tenant: LRU-evict shards above this total
+    CONTENT_CACHE_SIZE: int = 20000      # chunk texts cached for hydrating FAISS hits
 
     # -------------------------------------------------
     # CHUNKING
     # -------------------------------------------------
-    CHUNK_SIZE: int = 1000
+    CHUNK_STRATEGY: str = "sentence"    # fixed | sentence | tokens | markdown
+    CHUNK_SIZE: int = 1000              # characters (fixed / sentence / markdown)
     CHUNK_OVERLAP: int = 200
+    CHUNK_TOKENS: int = 256             # tokens strategy: MiniLM's max sequence length
+    CHUNK_TOKEN_OVERLAP: int = 32
+    CHUNK_MIN_CHARS: int = 10           # drop chunks shorter than this
+
+    # -------------------------------------------------
+    # DEDUPLICATION
+    # -------------------------------------------------
+    DEDUP_ENABLED: bool = True
+    DEDUP_SIMHASH_DISTANCE: int = 3     # max differing SimHash bits (of 64); 0 = exact only
+
+    # -------------------------------------------------
+    # CHUNK PERSISTENCE
+    # -------------------------------------------------
+    CHUNK_WRITE_METHOD: str = "copy"    # copy | executemany | orm
+    CHUNK_WRITE_BATCH: int = 5000       # rows per COPY / INSERT batch
 
     # -------------------------------------------------
     # FILE UPLOADS
@@ -61,6 +171,12 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
     UPLOAD_DIR: str = "uploads"
 
+    # -------------------------------------------------
+    # PDF EXTRACTION (page ranges across the CPU pool)
+    # -------------------------------------------------
+    PDF_PAGES_PER_TASK: int = 16   # pages per process-pool task
+    PDF_PAGE_TIMEOUT: float = 10.0 # seconds per page; a slower page is skipped, 0 = no limit
+
     # -------------------------------------------------
     # TIMEZONE
     # -------------------------------------------------
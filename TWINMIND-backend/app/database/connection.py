@@ -1,12 +1,139 @@
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from pgvector.asyncpg import register_vector
 from app.config import get_settings
 from app.models.base import Base   # ONLY IMPORT BASE HERE
 
 settings = get_settings()
 
-engine = create_engine(settings.DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _pool_kwargs():
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _async_url(url: str):
+    """
+    postgres:// / postgresql(+psycopg2):// -> postgresql+asyncpg://
+    asyncpg takes `ssl` instead of libpq's `sslmode` query parameter.
+    """
+    u = make_url(url.replace("postgres://", "postgresql://", 1))
+    connect_args = {}
+    query = dict(u.query)
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    return u.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+
+class PoolMetrics:
+    """
+    Connection pool counters fed by pool events, for tuning pool sizes.
+    """
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.pool = engine.pool
+        self._lock = threading.Lock()
+
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self._checkout_started = {}
+        self.total_hold_seconds = 0.0
+
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_conn, record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_conn, record, proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self._checkout_started[id(record)] = time.monotonic()
+
+    def _on_checkin(self, dbapi_conn, record):
+        with self._lock:
+            started = self._checkout_started.pop(id(record), None)
+            if started is not None:
+                self.in_use -= 1
+                self.total_hold_seconds += time.monotonic() - started
+
+    def _on_invalidate(self, dbapi_conn, record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pool_size": self.pool.size(),
+                "checked_out": self.pool.checkedout(),
+                "checked_in": self.pool.checkedin(),
+                "overflow": self.pool.overflow(),
+                "peak_in_use": self.peak_in_use,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "invalidations": self.invalidations,
+                "avg_hold_ms": (
+                    self.total_hold_seconds / self.checkouts * 1000 if self.checkouts else 0.0
+                ),
+            }
+
+
+# -------------------------------------------------
+# Sync engine (ingestion processors, startup, migrations)
+# -------------------------------------------------
+engine = create_engine(settings.DATABASE_URL, echo=False, **_pool_kwargs())
+
+# expire_on_commit=False: handlers read committed objects back on the event
+# loop after the commit ran in a worker thread; expiring them would turn
+# every attribute access into a blocking refresh query
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+# -------------------------------------------------
+# Async engine (asyncpg) for request handlers
+# -------------------------------------------------
+_async_db_url, _async_connect_args = _async_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    _async_db_url, echo=False, connect_args=_async_connect_args, **_pool_kwargs()
+)
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _register_vector_codec(dbapi_conn, record):
+    # asyncpg needs the pgvector codec to read/write `vector` columns
+    dbapi_conn.run_async(register_vector)
+
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+pool_metrics = [
+    PoolMetrics("sync", engine),
+    PoolMetrics("async", async_engine.sync_engine),
+]
+
 
 def get_db():
     db = SessionLocal()
@@ -15,6 +142,16 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_pool_stats() -> dict:
+    return {m.name: m.snapshot() for m in pool_metrics}
+
+
 def init_db():
     # import models INSIDE function to avoid circular imports
     from app.models import document, chunk, user
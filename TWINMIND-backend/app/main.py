@@ -1,13 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from app.config import get_settings
-from app.database.connection import init_db, engine
+from app.database.connection import init_db, engine, async_engine, SessionLocal
 from app.models.base import Base
 
 # IMPORTANT — import ALL models BEFORE create_all() to avoid missing-table issues
@@ -20,6 +21,11 @@ from app.routes.ingest import router as ingest_router
 from app.routes.query import router as query_router
 from app.routes.websocket import router as ws_router
 from app.routes.auth import router as auth_router
+from app.routes.metrics import router as metrics_router
+
+from app.services.faiss_service import faiss_service, start_index_sync
+from app.services.ingestion import jobs
+from app.utils import executors
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -27,6 +33,16 @@ logger.setLevel(logging.INFO)
 settings = get_settings()
 
 
+async def _snapshot_loop(interval: int):
+    """Periodically persist the FAISS index if it changed."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await executors.run_io(faiss_service.save_snapshot, settings.FAISS_SNAPSHOT_DIR)
+        except Exception as e:
+            logger.error(f"❌ FAISS snapshot failed: {e}")
+
+
 # -------------------------------------------------------------------
 # 👇 Lifespan — initializes DB cleanly (no circular imports)
 # -------------------------------------------------------------------
@@ -48,8 +64,55 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Database initialization failed: {e}")
 
+    executors.start()
+
+    # Keep this process's indexes in sync with committed chunk writes
+    # (ingestion worker processes never do this)
+    start_index_sync()
+
+    # Load the long-lived FAISS index (snapshot first, DB as fallback)
+    snapshot_task = None
+    if settings.VECTOR_BACKEND == "faiss":
+        try:
+            db = SessionLocal()
+            try:
+                faiss_service.warm_start(db, settings.FAISS_SNAPSHOT_DIR)
+            finally:
+                db.close()
+            logger.info(f"✅ FAISS index ready ({len(faiss_service)} vectors)")
+        except Exception as e:
+            logger.error(f"❌ FAISS index load failed: {e}")
+
+        if settings.FAISS_SNAPSHOT_INTERVAL > 0:
+            snapshot_task = asyncio.create_task(_snapshot_loop(settings.FAISS_SNAPSHOT_INTERVAL))
+    elif settings.VECTOR_BACKEND == "faiss_tenant":
+        logger.info("✅ Using per-tenant FAISS shards (loaded on first query per user)")
+    else:
+        logger.info(f"✅ Using {settings.VECTOR_BACKEND} vector backend (FAISS index not loaded)")
+
+    # Background ingestion (INGEST_MODE=queue)
+    job_tasks = []
+    if settings.INGEST_MODE == "queue":
+        job_tasks = jobs.start_workers()
+        logger.info(f"✅ Ingestion queue ready ({settings.INGEST_QUEUE_BACKEND} backend)")
+
     yield
 
+    for task in job_tasks:
+        task.cancel()
+
+    if snapshot_task:
+        snapshot_task.cancel()
+
+    if settings.VECTOR_BACKEND == "faiss":
+        try:
+            faiss_service.save_snapshot(settings.FAISS_SNAPSHOT_DIR)
+        except Exception as e:
+            logger.error(f"❌ FAISS snapshot on shutdown failed: {e}")
+
+    executors.shutdown()
+    await async_engine.dispose()
+
     logger.info("🛑 TwinMind Backend Shutdown")
 
 
@@ -81,6 +144,7 @@ app.include_router(auth_router, prefix="/api", tags=["Auth"])
 app.include_router(ingest_router, prefix="/api", tags=["Ingestion"])
 app.include_router(query_router, prefix="/api", tags=["Query"])
 app.include_router(ws_router, tags=["WebSocket"])
+app.include_router(metrics_router, prefix="/api", tags=["Metrics"])
 
 
 # -------------------------------------------------------------------
@@ -102,10 +166,18 @@ async def root():
         "endpoints": {
             "auth": "/api/auth",
             "ingest": "/api/ingest/upload",
+            "ingest_jobs": "/api/ingest/jobs/{job_id}",
             "rag": "/api/rag",
+            "rag_stream": "/api/rag/stream",
             "semantic_search": "/api/semantic-search",
             "query": "/api/query",
             "websocket": "/ws/query",
+            "metrics": [
+                "/api/metrics/embeddings",
+                "/api/metrics/db",
+                "/api/metrics/index",
+                "/api/metrics/index/shards",
+            ],
         }
     }
 
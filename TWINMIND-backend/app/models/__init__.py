@@ -1,6 +1,6 @@
 from app.models.base import Base
 from app.models.document import Document, ModalityType
-from app.models.chunk import Chunk
+from app.models.chunk import Chunk, ChunkBand
 from app.models.user import User
 
-__all__ = ["Base", "Document", "Chunk", "ModalityType", "User"]
+__all__ = ["Base", "Document", "Chunk", "ChunkBand", "ModalityType", "User"]
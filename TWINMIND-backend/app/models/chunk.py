@@ -1,7 +1,7 @@
 # app/models/chunk.py
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, SmallInteger, BigInteger, DateTime, ForeignKey, Computed, Index
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from pgvector.sqlalchemy import Vector
 from datetime import datetime
 import uuid
@@ -11,6 +11,10 @@ from app.config import get_settings
 
 settings = get_settings()
 
+# Text search configuration baked into the generated tsvector column;
+# queries must use the same one for the GIN index to apply
+TS_CONFIG = "english"
+
 class Chunk(Base):
     __tablename__ = "chunks"
 
@@ -25,5 +29,55 @@ class Chunk(Base):
     embedding = Column(Vector(settings.EMBEDDING_DIMENSION))
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Denormalized from the document (Document.chunk_attributes) for
+    # filtered search; modality holds the ModalityType value, e.g. "pdf"
+    owner_id = Column(String, nullable=True)
+    modality = Column(String(16), nullable=True)
+    source = Column(String, nullable=True)
+
+    # Ingest-time dedup (app/services/ingestion/dedup.py). A duplicate
+    # has no embedding and points at the chunk it repeats
+    content_hash = Column(String(64), nullable=True)
+    simhash = Column(BigInteger, nullable=True)
+    canonical_chunk_id = Column(
+        UUID(as_uuid=True), ForeignKey("chunks.id", ondelete="SET NULL"), nullable=True
+    )
+
+    # Full-text search vector, maintained by Postgres; deferred so normal
+    # chunk loads don't fetch it
+    content_tsv = deferred(Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{TS_CONFIG}', coalesce(content, ''))", persisted=True),
+    ))
+
     document = relationship("Document", back_populates="chunks")
 
+    __table_args__ = (
+        Index("ix_chunks_content_tsv", "content_tsv", postgresql_using="gin"),
+        Index("ix_chunks_owner_created", "owner_id", "created_at"),
+        Index("ix_chunks_modality", "modality"),
+        Index("ix_chunks_owner_hash", "owner_id", "content_hash"),
+        Index("ix_chunks_canonical", "canonical_chunk_id"),
+    )
+
+
+class ChunkBand(Base):
+    """
+    One SimHash band of a canonical chunk (dedup.simhash_bands), so
+    near-duplicate lookup only reads chunks sharing a band with the new
+    ones. Rows are per band width: changing DEDUP_SIMHASH_DISTANCE
+    needs them rebuilt (see the a6c3d8e21f57 migration).
+    """
+    __tablename__ = "chunk_simhash_bands"
+
+    chunk_id = Column(
+        UUID(as_uuid=True), ForeignKey("chunks.id", ondelete="CASCADE"), primary_key=True
+    )
+    width = Column(SmallInteger, primary_key=True)
+    band = Column(SmallInteger, primary_key=True)
+    key = Column(BigInteger, nullable=False)
+    owner_id = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_chunk_bands_lookup", "owner_id", "width", "band", "key"),
+    )
@@ -40,6 +40,10 @@ class Document(Base):
     # uploader metadata, source URL, tags, etc.
     doc_metadata = Column(String, nullable=True)
 
+    # Structured filter fields (doc_metadata is free-form)
+    owner_id = Column(String, nullable=True, index=True)
+    source = Column(String, nullable=True)   # filename or URL
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
     chunks = relationship(
@@ -47,3 +51,14 @@ class Document(Base):
         back_populates="document",
         cascade="all, delete-orphan"
     )
+
+    def chunk_attributes(self) -> dict:
+        """
+        Filter fields copied onto each chunk so searches can filter
+        without joining documents.
+        """
+        return {
+            "owner_id": self.owner_id,
+            "modality": self.modality.value if self.modality else None,
+            "source": self.source,
+        }
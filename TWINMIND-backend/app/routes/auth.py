@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 import logging
 
-from app.database.connection import get_db
+from app.database.connection import get_async_db
 from app.models.user import User
 from app.auth.security import hash_password, verify_password, create_access_token
+from app.utils.executors import run_io
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -20,7 +22,7 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/auth/register")
-async def register(request: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
     try:
         # Validate inputs
         if len(request.password) > 72:
@@ -31,7 +33,8 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Invalid email")
         
         # Check if user exists
-        existing = db.query(User).filter(User.username == request.username).first()
+        result = await db.execute(select(User).where(User.username == request.username))
+        existing = result.scalars().first()
         if existing:
             raise HTTPException(status_code=400, detail="Username already exists")
         
@@ -39,11 +42,11 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
         user = User(
             username=request.username,
             email=request.email,
-            hashed_password=hash_password(request.password[:72])  # Limit to 72 chars
+            hashed_password=await run_io(hash_password, request.password[:72])  # Limit to 72 chars
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         
         return {
             "status": "success",
@@ -54,16 +57,17 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Registration failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/auth/login")
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     try:
         # Find user
-        user = db.query(User).filter(User.username == request.username).first()
-        if not user or not verify_password(request.password[:72], user.hashed_password):
+        result = await db.execute(select(User).where(User.username == request.username))
+        user = result.scalars().first()
+        if not user or not await run_io(verify_password, request.password[:72], user.hashed_password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         # Create token
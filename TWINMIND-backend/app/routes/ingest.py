@@ -1,7 +1,11 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 import logging
+import uuid
+
+from app.config import get_settings
 
 from app.database.connection import get_db
 from app.services.ingestion.document_processor import DocumentProcessor
@@ -9,9 +13,33 @@ from app.services.ingestion.audio_processor import AudioProcessor
 from app.services.ingestion.web_processor import WebProcessor
 from app.services.ingestion.image_processor import ImageProcessor
 from app.services.ingestion.text_processor import TextProcessor
+from app.services.ingestion import jobs
+from app.utils.uploads import UploadTooLarge, spool_upload
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
+settings = get_settings()
+
+
+def _queue_mode() -> bool:
+    return settings.INGEST_MODE == "queue"
+
+
+def _queued(job: dict) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": "queued",
+            "job_id": job["id"],
+            "status_url": f"/api/ingest/jobs/{job['id']}",
+        },
+    )
+
+
+async def _enqueue_upload(kind: str, file: UploadFile, user_id: str, path: str = None):
+    path, _ = await spool_upload(file, path)
+    job = await jobs.enqueue(kind, {"path": path, "filename": file.filename, "user_id": user_id})
+    return _queued(job)
 
 # -------------------------------------------------------
 # 📄 DOCUMENT INGESTION
@@ -23,6 +51,9 @@ async def upload_document(
     db: Session = Depends(get_db),
 ):
     try:
+        if _queue_mode():
+            return await _enqueue_upload("document", file, user_id)
+
         doc, chunks = await DocumentProcessor().process(file, user_id, db)
         return {
             "status": "success",
@@ -30,6 +61,8 @@ async def upload_document(
             "filename": file.filename,
             "chunks_created": len(chunks),
         }
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error("Document upload failed", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -45,6 +78,9 @@ async def upload_audio(
     db: Session = Depends(get_db)
 ):
     try:
+        if _queue_mode():
+            return await _enqueue_upload("audio", file, user_id, f"uploads/{uuid.uuid4()}_{file.filename}")
+
         doc, chunks = await AudioProcessor().process(file, user_id, db)
 
         return {
@@ -54,6 +90,8 @@ async def upload_audio(
             "transcript_sample": chunks[0].content[:200] if chunks else ""
         }
 
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error("Audio upload failed", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -71,6 +109,9 @@ class WebIngestRequest(BaseModel):
 @router.post("/ingest/web")
 async def upload_web(req: WebIngestRequest, db: Session = Depends(get_db)):
     try:
+        if _queue_mode():
+            return _queued(await jobs.enqueue("web", {"url": req.url, "user_id": req.user_id}))
+
         doc, chunks = await WebProcessor().process(req.url, req.user_id, db)
         return {
             "status": "success",
@@ -94,6 +135,9 @@ async def upload_image(
     db: Session = Depends(get_db),
 ):
     try:
+        if _queue_mode():
+            return await _enqueue_upload("image", file, user_id, f"uploads/{uuid.uuid4()}_{file.filename}")
+
         doc, chunks = await ImageProcessor().process(file, user_id, db)
         preview = chunks[0].content[:200] if chunks else ""
         return {
@@ -102,6 +146,8 @@ async def upload_image(
             "filename": file.filename,
             "ocr_preview": preview,
         }
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error("Image upload failed", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -119,6 +165,11 @@ class TextUpload(BaseModel):
 @router.post("/ingest/text")
 async def upload_text(upload: TextUpload, db: Session = Depends(get_db)):
     try:
+        if _queue_mode():
+            return _queued(await jobs.enqueue(
+                "text", {"text": upload.text, "title": upload.title, "user_id": upload.user_id}
+            ))
+
         document, chunks = await TextProcessor().process(
             upload.text, upload.title, upload.user_id, db
         )
@@ -132,3 +183,14 @@ async def upload_text(upload: TextUpload, db: Session = Depends(get_db)):
     except Exception as e:
         logger.error("Text ingestion failed", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# -------------------------------------------------------
+# ⏳ INGESTION JOB STATUS (INGEST_MODE=queue)
+# -------------------------------------------------------
+@router.get("/ingest/jobs/{job_id}")
+async def ingest_job_status(job_id: str):
+    job = await jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Query
+
+from app.config import get_settings
+from app.database.connection import SessionLocal, get_pool_stats
+from app.services.answer_cache import answer_cache
+from app.services.chunk_content import content_cache
+from app.services.embedding_service import EmbeddingService
+from app.services.faiss_service import faiss_service
+from app.services.faiss_shards import tenant_indexes
+from app.utils.executors import run_io
+
+settings = get_settings()
+
+router = APIRouter()
+
+
+@router.get("/metrics/embeddings")
+async def embedding_metrics():
+    return {
+        "status": "success",
+        "chunk_cache": EmbeddingService.cache.stats(),
+        "query_cache": EmbeddingService.query_cache.stats(),
+    }
+
+
+@router.get("/metrics/rag")
+async def rag_metrics():
+    return {
+        "status": "success",
+        "answer_cache": answer_cache.stats(),
+    }
+
+
+@router.get("/metrics/db")
+async def db_pool_metrics():
+    return {
+        "status": "success",
+        "pools": get_pool_stats(),
+    }
+
+
+@router.get("/metrics/index")
+async def index_metrics():
+    return {
+        "status": "success",
+        "backend": settings.VECTOR_BACKEND,
+        # stats() takes the index lock; keep any wait off the event loop
+        "faiss": await run_io(faiss_service.stats),
+        "content_cache": content_cache.stats(),
+    }
+
+
+@router.get("/metrics/index/shards")
+async def shard_metrics():
+    """
+    Per-tenant shards (VECTOR_BACKEND=faiss_tenant): size, load time,
+    idle time and hits, most recently used first.
+    """
+    return {
+        "status": "success",
+        **(await run_io(tenant_indexes.stats)),
+    }
+
+
+def _measure_recall(k: int, sample_size: int):
+    db = SessionLocal()
+    try:
+        return faiss_service.measure_recall(db, k=k, sample_size=sample_size)
+    finally:
+        db.close()
+
+
+@router.get("/metrics/index/recall")
+async def index_recall(k: int = Query(10, ge=1, le=100), sample: int = Query(200, ge=1, le=5000)):
+    """
+    recall@k of the FAISS index vs exact flat search. Loads all vectors;
+    meant for occasional checks after changing index settings.
+    """
+    return {
+        "status": "success",
+        **(await run_io(_measure_recall, k, sample)),
+    }
@@ -1,26 +1,25 @@
 # app/routes/query.py
 
+import json
 import logging
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 
-from app.database.connection import get_db
-from app.models.chunk import Chunk
-from app.models.document import Document
+from app.database.connection import get_async_db
 
 from app.services.embedding_service import EmbeddingService
-from app.services.faiss_service import FaissService
-from app.services.llm.query_service import GeminiService
+from app.services.lexical_search import LexicalSearchService
+from app.services.llm.query_service import generate_rag_answer, serialize_source, stream_rag_answer
+from app.services.vector_store import SearchFilters, get_vector_backend
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Query"])
 
-faiss_service = FaissService()
-
 
 class QueryRequest(BaseModel):
     query: str
@@ -28,31 +27,38 @@ class QueryRequest(BaseModel):
     top_k: int = 5
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
+    # Structured filters; owner_only restricts results to user_id's documents
+    # (always on with the per-tenant faiss_tenant backend)
+    owner_only: bool = False
+    modality: Optional[str] = None
+    source: Optional[str] = None
+    # Reciprocal rank fusion weights for RAG retrieval; 0 disables a leg
+    lexical_weight: float = 1.0
+    vector_weight: float = 1.0
+    # Cross-encoder reranking of RAG candidates; None = RERANK_ENABLED
+    rerank: Optional[bool] = None
+
+    def filters(self) -> SearchFilters:
+        return SearchFilters(
+            start_date=self.start_date,
+            end_date=self.end_date,
+            owner_id=self.user_id if self.owner_only or get_vector_backend().requires_owner else None,
+            modality=self.modality,
+            source=self.source,
+        )
 
 
 # -----------------------------------------------------
 # 🔍 SIMPLE KEYWORD SEARCH
 # -----------------------------------------------------
 @router.post("/query")
-async def keyword_query(request: QueryRequest, db: Session = Depends(get_db)):
+async def keyword_query(request: QueryRequest, db: AsyncSession = Depends(get_async_db)):
     try:
-        q = db.query(Chunk)
-
-        # ❌ USER FILTER REMOVED (this was blocking all results)
-        # If you need user filtering later, we will add a robust version
+        matched = await LexicalSearchService.search(db, request.query, request.top_k, request.filters())
 
-        chunks = q.all()
-
-        if not chunks:
+        if not matched:
             return {"status": "success", "results": [], "message": "No documents found"}
 
-        query_lower = request.query.lower()
-
-        matched = [
-            c for c in chunks
-            if query_lower in (c.content or "").lower()
-        ][:request.top_k]
-
         return {
             "status": "success",
             "query": request.query,
@@ -62,9 +68,9 @@ async def keyword_query(request: QueryRequest, db: Session = Depends(get_db)):
                     "document_id": str(c.document_id),
                     "chunk_id": str(c.id),
                     "content": c.content[:300] + ("..." if len(c.content) > 300 else ""),
-                    "relevance_score": 1.0,
+                    "relevance_score": score,
                 }
-                for c in matched
+                for c, score in matched
             ],
         }
 
@@ -77,55 +83,24 @@ async def keyword_query(request: QueryRequest, db: Session = Depends(get_db)):
 # 🤖 FULL RAG PIPELINE
 # -----------------------------------------------------
 @router.post("/rag")
-async def rag(req: QueryRequest, db: Session = Depends(get_db)):
+async def rag(req: QueryRequest):
     logger.info(f"[RAG] Query received: {req.query}")
 
     try:
-        chunks_q = db.query(Chunk)
-
-        chunks = chunks_q.all()
-        logger.info(f"[RAG] Loaded chunks from DB: {len(chunks)}")
-
-        if not chunks:
-            logger.error("[RAG] No chunks found in DB")
-            return {"answer": "No relevant data found.", "sources": []}
-
-        # Build index
-        faiss_service.build_index(chunks)
-
-        # Generate embedding
-        query_emb = EmbeddingService.get_embedding(req.query)
-        logger.info(f"[RAG] Query embedding length: {len(query_emb) if query_emb else 'None'}")
-
-        if not query_emb:
-            logger.error("[RAG] Embedding generation failed")
-            return {"answer": "LLM error: could not embed query", "sources": []}
-
-        # FAISS search
-        results = faiss_service.search(query_emb, req.top_k)
-        logger.info(f"[RAG] FAISS returned {len(results)} results")
-
-        if not results:
-            logger.warning("[RAG] No semantic matches found")
-            return {"answer": "No relevant information found.", "sources": []}
-
-        # Build context for the LLM
-        context = "\n\n".join([c.content for c, _ in results])
-        logger.info(f"[RAG] Context length: {len(context)} characters")
-
-        answer = GeminiService.answer(req.query, context)
+        # Hybrid retrieval (full-text + vector, RRF) → Gemini
+        answer, results = await generate_rag_answer(
+            req.query,
+            req.top_k,
+            req.filters(),
+            lexical_weight=req.lexical_weight,
+            vector_weight=req.vector_weight,
+            rerank=req.rerank,
+        )
+        logger.info(f"[RAG] Hybrid retrieval returned {len(results)} results")
 
         return {
             "answer": answer,
-            "sources": [
-                {
-                    "content": c.content[:500],
-                    "distance": float(d),
-                    "chunk_id": str(c.id),
-                    "document_id": str(c.document_id)
-                }
-                for c, d in results
-            ]
+            "sources": [serialize_source(c, s) for c, s in results]
         }
 
     except Exception as e:
@@ -133,34 +108,63 @@ async def rag(req: QueryRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# -----------------------------------------------------
+# 📡 STREAMING RAG (Server-Sent Events)
+# -----------------------------------------------------
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/rag/stream")
+async def rag_stream(req: QueryRequest):
+    """
+    Sends `sources` first, then `token` events as Gemini streams the
+    answer, then `done` with timing (ttft_ms, total_ms) and `cached`
+    (true when the answer came from the semantic answer cache).
+    """
+    logger.info(f"[RAG-STREAM] Query received: {req.query}")
+
+    async def events():
+        try:
+            stream = stream_rag_answer(
+                req.query,
+                req.top_k,
+                req.filters(),
+                lexical_weight=req.lexical_weight,
+                vector_weight=req.vector_weight,
+                rerank=req.rerank,
+            )
+            async for kind, payload in stream:
+                if kind == "sources":
+                    yield _sse("sources", [serialize_source(c, s) for c, s in payload])
+                elif kind == "token":
+                    yield _sse("token", {"text": payload})
+                else:
+                    yield _sse("done", payload)
+        except Exception as e:
+            logger.error(f"[RAG-STREAM] ERROR: {str(e)}", exc_info=True)
+            yield _sse("error", {"message": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 
 # -----------------------------------------------------
 # 🧠 SEMANTIC SEARCH
 # -----------------------------------------------------
 @router.post("/semantic-search")
-async def semantic_search_route(request: QueryRequest, db: Session = Depends(get_db)):
+async def semantic_search_route(request: QueryRequest):
     try:
-        q = db.query(Chunk)
-
-        # ❌ FILTER REMOVED (same issue as RAG)
-
-        if request.start_date:
-            q = q.filter(Chunk.created_at >= request.start_date)
-        if request.end_date:
-            q = q.filter(Chunk.created_at <= request.end_date)
-
-        chunks = q.all()
-
-        if not chunks:
-            return {"status": "success", "results": []}
-
-        faiss_service.build_index(chunks)
-        query_emb = EmbeddingService.get_embedding(request.query)
+        query_emb = await EmbeddingService.get_query_embedding_async(request.query)
 
         if not query_emb:
             return {"status": "success", "results": []}
 
-        results = faiss_service.search(query_emb, request.top_k)
+        results = await get_vector_backend().search(query_emb, request.top_k, request.filters())
 
         return {
             "status": "success",
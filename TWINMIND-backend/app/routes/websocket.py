@@ -1,9 +1,12 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 import logging
 import json
 
-from app.database.connection import SessionLocal
-from app.models.chunk import Chunk   # FIXED IMPORT
+from app.database.connection import AsyncSessionLocal
+from app.routes.query import QueryRequest
+from app.services.lexical_search import LexicalSearchService
+from app.services.llm.query_service import serialize_source, stream_rag_answer
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -32,6 +35,30 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 
+async def _stream_rag(websocket: WebSocket, req: QueryRequest):
+    """
+    {"type": "rag"} messages: sources first, then answer tokens.
+    """
+    stream = stream_rag_answer(
+        req.query,
+        req.top_k,
+        req.filters(),
+        lexical_weight=req.lexical_weight,
+        vector_weight=req.vector_weight,
+        rerank=req.rerank,
+    )
+    async for kind, payload in stream:
+        if kind == "sources":
+            await websocket.send_json({
+                "type": "sources",
+                "sources": [serialize_source(c, s) for c, s in payload]
+            })
+        elif kind == "token":
+            await websocket.send_json({"type": "token", "text": payload})
+        else:
+            await websocket.send_json({"type": "complete", **payload})
+
+
 @router.websocket("/ws/query")
 async def websocket_query(websocket: WebSocket):
     await manager.connect(websocket)
@@ -46,34 +73,38 @@ async def websocket_query(websocket: WebSocket):
                 await websocket.send_json({"type": "error", "message": "Invalid JSON"})
                 continue
 
-            query = query_data.get("query", "").strip()
-            logger.info(f"WebSocket query received: '{query}'")
+            # Same fields (and owner / modality / source / date filters)
+            # as the HTTP query endpoints
+            try:
+                req = QueryRequest.model_validate(query_data)
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "message": f"Invalid query: {e}"})
+                continue
+            req.query = req.query.strip()
+
+            logger.info(f"WebSocket query received: '{req.query}'")
 
-            if not query:
+            if not req.query:
                 await websocket.send_json({"type": "error", "message": "Empty query"})
                 continue
 
-            # Query DB
-            db = SessionLocal()
-            try:
-                chunks = db.query(Chunk).limit(200).all()  # safeguard
-            finally:
-                db.close()
+            if query_data.get("type") == "rag":
+                await _stream_rag(websocket, req)
+                continue
 
-            query_lower = query.lower()
-            matched = [
-                c for c in chunks
-                if query_lower in c.content.lower()
-            ][:5]
+            # Ranked full-text search, scoped like the HTTP /query endpoint
+            async with AsyncSessionLocal() as db:
+                matched = await LexicalSearchService.search(db, req.query, req.top_k, req.filters())
 
             # Stream matched chunks
-            for i, chunk in enumerate(matched):
+            for i, (chunk, score) in enumerate(matched):
                 await websocket.send_json({
                     "type": "result",
                     "index": i + 1,
                     "chunk_id": str(chunk.id),
                     "document_id": str(chunk.document_id),
-                    "preview": chunk.content[:200]
+                    "preview": chunk.content[:200],
+                    "relevance_score": score
                 })
 
             # Completion message
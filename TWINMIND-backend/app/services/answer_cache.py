@@ -0,0 +1,160 @@
+# app/services/answer_cache.py
+"""
+Semantic cache of RAG answers.
+
+Each entry is (normalized query embedding, set of chunk ids the answer
+was generated from, answer). A new question is served from the cache
+when its embedding is within ANSWER_CACHE_SIMILARITY (cosine) of a
+cached one AND retrieval returned exactly the same chunk set — so the
+Gemini round trip is only skipped when the answer would be built from
+the same sources.
+
+Invalidation: the cache is a FAISS sync target (registered by
+faiss_service.start_index_sync() in the API process), so it sees every
+committed chunk write:
+- chunks removed (document deleted) -> entries that used them are dropped
+- chunks added for a source (re-ingest) -> entries that used any
+  document with that source are dropped
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class CachedAnswer:
+    __slots__ = ("embedding", "chunk_ids", "document_ids", "sources", "answer", "created_at", "hits")
+
+    def __init__(self, embedding, chunks, answer):
+        self.embedding = embedding
+        self.chunk_ids = frozenset(str(c.id) for c in chunks)
+        self.document_ids = frozenset(str(c.document_id) for c in chunks)
+        self.sources = frozenset(c.source for c in chunks if getattr(c, "source", None))
+        self.answer = answer
+        self.created_at = time.monotonic()
+        self.hits = 0
+
+
+def _unit(embedding):
+    v = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else None
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int, similarity: float, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> CachedAnswer, LRU first
+        self._next_key = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _expired(self, entry):
+        return self.ttl_seconds > 0 and time.monotonic() - entry.created_at > self.ttl_seconds
+
+    def get(self, query_embedding, chunks):
+        """
+        Cached answer for a query whose retrieval returned `chunks`
+        (anything with .id), or None.
+        """
+        if not self.enabled or query_embedding is None:
+            return None
+        unit = _unit(query_embedding)
+        if unit is None:
+            return None
+        chunk_ids = frozenset(str(c.id) for c in chunks)
+
+        with self._lock:
+            best_key, best_sim = None, self.similarity
+            for key, entry in list(self._entries.items()):
+                if self._expired(entry):
+                    del self._entries[key]
+                    continue
+                if entry.chunk_ids != chunk_ids:
+                    continue
+                sim = float(entry.embedding @ unit)
+                if sim >= best_sim:
+                    best_key, best_sim = key, sim
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            entry = self._entries[best_key]
+            self._entries.move_to_end(best_key)
+            entry.hits += 1
+            self.hits += 1
+            return entry.answer
+
+    def put(self, query_embedding, chunks, answer):
+        if not self.enabled or query_embedding is None or not chunks:
+            return
+        unit = _unit(query_embedding)
+        if unit is None:
+            return
+
+        with self._lock:
+            self._entries[self._next_key] = CachedAnswer(unit, chunks, answer)
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _drop(self, predicate):
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if predicate(entry)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        return self._drop(lambda entry: True)
+
+    # -------------------------------------------------
+    # Sync target interface (see faiss_service)
+    # -------------------------------------------------
+    def add_entries(self, items):
+        sources = {entry.source for entry, _ in items if entry.source}
+        documents = {str(entry.document_id) for entry, _ in items}
+        if not sources and not documents:
+            return 0
+        return self._drop(
+            lambda cached: bool(cached.sources & sources or cached.document_ids & documents)
+        )
+
+    def remove_chunks(self, chunk_ids):
+        removed = {str(cid) for cid in chunk_ids}
+        if not removed:
+            return 0
+        return self._drop(lambda cached: bool(cached.chunk_ids & removed))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "similarity": self.similarity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+answer_cache = AnswerCache(
+    settings.ANSWER_CACHE_SIZE,
+    settings.ANSWER_CACHE_SIMILARITY,
+    settings.ANSWER_CACHE_TTL,
+)
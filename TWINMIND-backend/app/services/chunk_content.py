@@ -0,0 +1,82 @@
+# app/services/chunk_content.py
+"""
+Content hydration for FAISS search hits.
+
+The FAISS index keeps no chunk text. After a search, the content of
+the returned top-k is filled in from an LRU cache, with one batched
+`SELECT id, content FROM chunks WHERE id IN (...)` for the misses.
+Chunk content never changes under a given id (re-ingesting creates new
+chunks), so cached entries never go stale; a deleted chunk is simply
+no longer returned by the index.
+"""
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database.connection import AsyncSessionLocal
+from app.models.chunk import Chunk
+
+settings = get_settings()
+
+
+class ContentCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chunk_id):
+        content = self._items.get(chunk_id)
+        if content is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(chunk_id)
+        self.hits += 1
+        return content
+
+    def put(self, chunk_id, content):
+        if self.max_entries <= 0:
+            return
+        self._items[chunk_id] = content
+        self._items.move_to_end(chunk_id)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def stats(self):
+        return {
+            "entries": len(self._items),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+content_cache = ContentCache(settings.CONTENT_CACHE_SIZE)
+
+
+async def hydrate(results):
+    """
+    Fill in `content` of [(IndexedChunk, score)] hits. Hits whose chunk
+    no longer exists in the DB are dropped.
+    """
+    missing = []
+    for chunk, _ in results:
+        if chunk.content is None:
+            chunk.content = content_cache.get(chunk.id)
+            if chunk.content is None:
+                missing.append(chunk.id)
+
+    if missing:
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(select(Chunk.id, Chunk.content).where(Chunk.id.in_(missing)))
+            ).all()
+        found = {r.id: r.content for r in rows}
+        for chunk, _ in results:
+            if chunk.content is None and chunk.id in found:
+                chunk.content = found[chunk.id]
+                content_cache.put(chunk.id, chunk.content)
+
+    return [(chunk, score) for chunk, score in results if chunk.content is not None]
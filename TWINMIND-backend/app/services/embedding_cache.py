@@ -0,0 +1,231 @@
+# app/services/embedding_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache keys: NFC unicode, collapsed whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+
+    Keys are sha256(model name + normalized text). Lookups go through an
+    in-process LRU first, then a SQLite file shared by all workers on the
+    host. Vectors are stored as raw float32 bytes.
+    """
+
+    def __init__(self, model_name: str, dim: int, max_items: int, db_path: str = ""):
+        self.model_name = model_name
+        self.dim = dim
+        self.max_items = max_items
+        self.db_path = db_path
+
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._conn = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, path: str):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key BLOB PRIMARY KEY,"
+                " vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"[EmbeddingCache] Persistent tier disabled: {e}")
+            self._conn = None
+
+    def key(self, text: str) -> bytes:
+        payload = f"{self.model_name}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).digest()
+
+    # -------------------------------------------------
+    # LRU tier
+    # -------------------------------------------------
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+    def get_many(self, keys):
+        """
+        Returns {key: vector} for every cached key.
+        """
+        found = {}
+        missing = []
+
+        with self._lock:
+            for k in keys:
+                vector = self._lru.get(k)
+                if vector is None:
+                    missing.append(k)
+                else:
+                    self._lru.move_to_end(k)
+                    found[k] = vector
+            self.memory_hits += len(found)
+
+            if missing and self._conn is not None:
+                disk = self._read_disk(missing)
+                for k, vector in disk.items():
+                    self._remember(k, vector)
+                found.update(disk)
+                self.disk_hits += len(disk)
+                missing = [k for k in missing if k not in disk]
+
+            self.misses += len(missing)
+
+        return found
+
+    def put_many(self, keys, vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        with self._lock:
+            rows = []
+            for k, vector in zip(keys, vectors):
+                vector = vector.copy()
+                vector.setflags(write=False)
+                self._remember(k, vector)
+                rows.append((k, vector.tobytes()))
+
+            if rows and self._conn is not None:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)", rows
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"[EmbeddingCache] Write failed: {e}")
+
+    def _read_disk(self, keys):
+        found = {}
+        try:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for k, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    if vector.shape[0] == self.dim:
+                        found[bytes(k)] = vector
+        except sqlite3.Error as e:
+            logger.error(f"[EmbeddingCache] Read failed: {e}")
+        return found
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_items": len(self._lru),
+            "persistent": self._conn is not None,
+        }
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded, thread-safe cache of query embeddings with TTL expiry.
+
+    Keys are lower-cased normalized queries (MiniLM is uncased, so this
+    does not change the vector). Tracks how much encode time hits saved.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: float):
+        self.max_items = max_items
+        self.ttl = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._items = OrderedDict()   # key -> (expires_at, vector)
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self._encode_seconds = 0.0
+        self._encodes = 0
+
+    @staticmethod
+    def key(query: str) -> str:
+        return normalize_text(query).lower()
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                expires_at, vector = item
+                if expires_at > now:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._items[key]
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector, encode_seconds: float = None):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, vector)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.evicted += 1
+
+            if encode_seconds is not None:
+                self._encode_seconds += encode_seconds
+                self._encodes += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_encode = self._encode_seconds / self._encodes if self._encodes else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "items": len(self._items),
+                "avg_encode_ms": avg_encode * 1000,
+                "saved_encode_seconds": self.hits * avg_encode,
+            }
@@ -1,17 +1,62 @@
 # app/services/embedding_service.py
 import logging
-from sentence_transformers import SentenceTransformer
+import threading
+import time
 import numpy as np
 from app.config import get_settings
+from app.services.embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from app.utils.executors import run_cpu, run_io
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def encode_texts(texts, batch_size: int = None) -> np.ndarray:
+    """
+    Raw model call. Module-level so it can run in the CPU process pool.
+    """
+    emb = EmbeddingService.get_model().encode(
+        list(texts),
+        batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return np.ascontiguousarray(emb, dtype=np.float32)
+
+
 class EmbeddingService:
-    # Force MiniLM L6-v2 (384 dims)
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    # Force MiniLM L6-v2 (384 dims); loaded lazily so processes that only
+    # delegate to the CPU pool never pay for it
+    _model = None
+    _model_lock = threading.Lock()
     dim = 384
 
+    # Shared by all ingestion paths; skips re-encoding identical chunks
+    cache = EmbeddingCache(
+        model_name=MODEL_NAME,
+        dim=dim,
+        max_items=settings.EMBEDDING_CACHE_SIZE,
+        db_path=settings.EMBEDDING_CACHE_PATH,
+    )
+
+    # Repeated questions from the query endpoints
+    query_cache = QueryEmbeddingCache(
+        max_items=settings.QUERY_CACHE_SIZE,
+        ttl_seconds=settings.QUERY_CACHE_TTL,
+    )
+
+    @staticmethod
+    def get_model():
+        if EmbeddingService._model is None:
+            with EmbeddingService._model_lock:
+                if EmbeddingService._model is None:
+                    # Imported here: torch is only needed once a model is used
+                    from sentence_transformers import SentenceTransformer
+                    EmbeddingService._model = SentenceTransformer(MODEL_NAME)
+        return EmbeddingService._model
+
     @staticmethod
     def get_dim():
         return EmbeddingService.dim
@@ -20,5 +65,102 @@ class EmbeddingService:
     def get_embedding(text: str):
         if not text:
             return None
-        emb = EmbeddingService.model.encode(text)
+        emb = EmbeddingService.get_model().encode(text)
         return np.array(emb, dtype="float32").tolist()
+
+    # -------------------------------------------------
+    # Query embeddings (cached)
+    # -------------------------------------------------
+    @staticmethod
+    def get_query_embedding(query: str):
+        """
+        Same as get_embedding(), but served from the query cache when a
+        normalized-equal query was embedded recently.
+        """
+        if not query or not query.strip():
+            return None
+
+        cache = EmbeddingService.query_cache
+        key = cache.key(query)
+
+        cached = cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        start = time.perf_counter()
+        emb = EmbeddingService.get_embedding(query)
+        cache.put(key, tuple(emb), encode_seconds=time.perf_counter() - start)
+        return emb
+
+    @staticmethod
+    async def get_query_embedding_async(query: str):
+        """
+        get_query_embedding() with the encode running in the CPU pool.
+        """
+        if not query or not query.strip():
+            return None
+
+        cache = EmbeddingService.query_cache
+        key = cache.key(query)
+
+        cached = cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        start = time.perf_counter()
+        emb = (await run_cpu(encode_texts, [query], 1))[0].tolist()
+        cache.put(key, tuple(emb), encode_seconds=time.perf_counter() - start)
+        return emb
+
+    # -------------------------------------------------
+    # Batched chunk embeddings (content-addressed cache)
+    # -------------------------------------------------
+    @staticmethod
+    def _lookup(texts):
+        """
+        Returns (keys, cached vectors, {key: text} still to encode).
+        """
+        cache = EmbeddingService.cache
+        keys = [cache.key(t) for t in texts]
+        cached = cache.get_many(list(dict.fromkeys(keys)))
+
+        # Encode each distinct uncached text once
+        todo = {}
+        for i, k in enumerate(keys):
+            if k not in cached and k not in todo:
+                todo[k] = texts[i]
+
+        return keys, cached, todo
+
+    @staticmethod
+    def _assemble(keys, cached, todo, emb):
+        if todo:
+            EmbeddingService.cache.put_many(list(todo.keys()), emb)
+            cached.update(zip(todo.keys(), emb))
+
+        out = np.empty((len(keys), EmbeddingService.dim), dtype=np.float32)
+        for i, k in enumerate(keys):
+            out[i] = cached[k]
+        return out
+
+    @staticmethod
+    def embed_batch(texts, batch_size: int = None) -> np.ndarray:
+        """
+        Embed many texts in one call, reusing cached vectors.
+        Returns a C-contiguous float32 matrix of shape (len(texts), dim).
+        """
+        texts = list(texts)
+        keys, cached, todo = EmbeddingService._lookup(texts)
+        emb = encode_texts(list(todo.values()), batch_size) if todo else None
+        return EmbeddingService._assemble(keys, cached, todo, emb)
+
+    @staticmethod
+    async def embed_batch_async(texts, batch_size: int = None) -> np.ndarray:
+        """
+        embed_batch() with cache misses encoded in the CPU pool and the
+        persistent cache tier accessed from the I/O pool.
+        """
+        texts = list(texts)
+        keys, cached, todo = await run_io(EmbeddingService._lookup, texts)
+        emb = await run_cpu(encode_texts, list(todo.values()), batch_size) if todo else None
+        return await run_io(EmbeddingService._assemble, keys, cached, todo, emb)
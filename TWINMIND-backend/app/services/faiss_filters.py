@@ -0,0 +1,449 @@
+# app/services/faiss_filters.py
+"""
+Columnar per-label metadata for the FAISS index.
+
+Labels are dense int64s handed out in order, so each column is a numpy
+array indexed by label: chunk / document UUID bytes, chunk_index,
+created_at and the filter attributes. That is all the index keeps per
+row — content is fetched for the top-k hits only (chunk_content).
+Chunk UUID -> label lookups go through a sorted copy of the live chunk
+ids (np.searchsorted), so there is no per-chunk Python object anywhere.
+After a snapshot load the columns are the snapshot's memory maps, with
+rows written since in an in-memory overlay (see LabelAttributes).
+
+A filter turns into a vectorized mask over those arrays and then into a
+bitmap for faiss.IDSelectorBitmap, which the index checks while it
+searches — no over-fetching and post-filtering, so a filtered query
+costs about as much as an unfiltered one.
+
+String attributes (owner, modality, source) are stored as int32 codes
+into a per-attribute vocabulary; -1 means unset.
+"""
+import numpy as np
+
+from app.services.faiss_snapshot import COLUMNS, bytes_uuid, from_micros, to_micros, uuid_bytes
+
+STRING_ATTRIBUTES = ("owner_id", "modality", "source")
+
+
+class Vocabulary:
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.codes = {v: i for i, v in enumerate(self.values)}
+
+    def encode(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def lookup(self, value):
+        """Code of a known value, or None (filtering on it matches nothing)."""
+        return self.codes.get(value)
+
+
+def _local_codes(values):
+    """(distinct values, int32 codes into them; -1 for None)."""
+    vocab = {}
+    codes = np.fromiter(
+        (-1 if v is None else vocab.setdefault(v, len(vocab)) for v in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return list(vocab), codes
+
+
+class ChunkRows:
+    """
+    A batch of index rows in columnar form: what the DB loader decodes
+    (faiss_loader) and what IndexedChunk handles are turned into before
+    they are indexed. String attributes carry batch-local codes that
+    LabelAttributes.set() maps onto its vocabularies.
+    """
+
+    __slots__ = ("chunk_ids", "document_ids", "chunk_index", "created_at", "attributes")
+
+    def __init__(self, chunk_ids, document_ids, chunk_index, created_at, attributes):
+        self.chunk_ids = np.asarray(chunk_ids, dtype="S16")
+        self.document_ids = np.asarray(document_ids, dtype="S16")
+        self.chunk_index = np.asarray(chunk_index, dtype=np.int32)
+        self.created_at = np.asarray(created_at, dtype=np.int64)
+        self.attributes = attributes   # name -> (values, int32 codes)
+
+    def __len__(self):
+        return len(self.chunk_ids)
+
+    @classmethod
+    def from_columns(cls, chunk_ids, document_ids, chunk_index, created_at, attribute_values):
+        """`attribute_values`: name -> sequence of str / None per row."""
+        return cls(
+            chunk_ids, document_ids, chunk_index, created_at,
+            {name: _local_codes(attribute_values[name]) for name in STRING_ATTRIBUTES},
+        )
+
+    @classmethod
+    def from_entries(cls, entries):
+        return cls.from_columns(
+            [uuid_bytes(e.id) for e in entries],
+            [uuid_bytes(e.document_id) for e in entries],
+            [e.chunk_index or 0 for e in entries],
+            [to_micros(e.created_at) for e in entries],
+            {name: [getattr(e, name, None) for e in entries] for name in STRING_ATTRIBUTES},
+        )
+
+    @classmethod
+    def concat(cls, parts):
+        parts = [p for p in parts if len(p)]
+        if len(parts) == 1:
+            return parts[0]
+
+        attributes = {}
+        for name in STRING_ATTRIBUTES:
+            vocab = Vocabulary()
+            codes = []
+            for part in parts:
+                values, local = part.attributes[name]
+                remap = np.array([vocab.encode(v) for v in values] + [-1], dtype=np.int32)
+                codes.append(remap[local])
+            attributes[name] = (vocab.values, np.concatenate(codes) if codes else np.zeros(0, np.int32))
+
+        def column(name, dtype):
+            if not parts:
+                return np.zeros(0, dtype=dtype)
+            return np.concatenate([getattr(p, name) for p in parts])
+
+        return cls(
+            column("chunk_ids", "S16"),
+            column("document_ids", "S16"),
+            column("chunk_index", np.int32),
+            column("created_at", np.int64),
+            attributes,
+        )
+
+    def chunk_id(self, i):
+        return bytes_uuid(self.chunk_ids[i])
+
+
+def _columns(capacity):
+    return {
+        name: np.full(capacity, fill, dtype=dtype) for name, (dtype, fill) in COLUMNS.items()
+    }
+
+
+class LabelAttributes:
+    """
+    Per-label columns (faiss_snapshot.COLUMNS) plus a live flag, in two
+    parts:
+
+    - base: labels [0, base_size) of a loaded snapshot, as the
+      snapshot's read-only memory-mapped column files. They are never
+      copied or written; removals go to the small `_base_cleared` set.
+    - tail: labels from base_size on (rows added since the load, or the
+      whole index after a DB build), in growable in-memory arrays.
+
+    Removed and tombstoned labels are not live, so the bitmap also
+    keeps them out of filtered results.
+
+    Lookup by chunk id goes through sorted (id, label) arrays: the
+    snapshot's sorted_ids / id_labels for the base, and `_sorted_ids` /
+    `_sorted_labels` for the tail — built lazily after a bulk load, then
+    kept up to date by set() and clear().
+    """
+
+    def __init__(self, capacity=0):
+        self.vocab = {name: Vocabulary() for name in STRING_ATTRIBUTES}
+        self.base_size = 0
+        self._base = _columns(0)
+        self._base_ids = np.zeros(0, dtype="S16")
+        self._base_id_labels = np.zeros(0, dtype=np.int64)
+        self._base_cleared = set()
+        self._tail = _columns(capacity)
+        self._tail_size = 0
+        self._sorted_ids = None
+        self._sorted_labels = None
+
+    @classmethod
+    def from_segment(cls, segment):
+        """
+        Attributes over a snapshot segment; its mapped columns become
+        the base as they are.
+        """
+        attrs = cls()
+        for name in STRING_ATTRIBUTES:
+            attrs.vocab[name] = Vocabulary(segment.vocab.get(name, ()))
+        attrs.base_size = len(segment)
+        attrs._base = segment.columns
+        attrs._base_ids = segment.sorted_ids
+        attrs._base_id_labels = segment.id_labels
+        return attrs
+
+    @property
+    def size(self):
+        return self.base_size + self._tail_size
+
+    def _reserve(self, size):
+        capacity = len(self._tail["live"])
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 1024)
+
+        grown = _columns(capacity)
+        for name, arr in self._tail.items():
+            grown[name][:len(arr)] = arr
+        self._tail = grown
+
+    def _tail_view(self):
+        return {name: arr[:self._tail_size] for name, arr in self._tail.items()}
+
+    def set(self, labels, rows):
+        """
+        Store a ChunkRows batch under `labels` (new labels, past the
+        base). The chunks must not be live under other labels (callers
+        remove them first).
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        if not len(labels):
+            return
+        offsets = labels - self.base_size
+        if offsets.min() < 0:
+            raise ValueError("Snapshot labels are read-only")
+        top = int(offsets.max()) + 1
+        self._reserve(top)
+        self._tail_size = max(self._tail_size, top)
+
+        tail = self._tail
+        tail["chunk_ids"][offsets] = rows.chunk_ids
+        tail["document_ids"][offsets] = rows.document_ids
+        tail["chunk_index"][offsets] = rows.chunk_index
+        tail["created_at"][offsets] = rows.created_at
+        for name in STRING_ATTRIBUTES:
+            values, local = rows.attributes[name]
+            # Batch-local code -> vocabulary code; local -1 picks the trailing -1
+            remap = np.array([self.vocab[name].encode(v) for v in values] + [-1], dtype=np.int32)
+            tail[name][offsets] = remap[local]
+        tail["live"][offsets] = True
+        self._index_ids(labels, rows.chunk_ids)
+
+    def clear(self, labels):
+        labels = np.asarray(labels, dtype=np.int64)
+        self._base_cleared.update(labels[(labels >= 0) & (labels < self.base_size)].tolist())
+
+        offsets = labels[labels >= self.base_size] - self.base_size
+        offsets = offsets[offsets < self._tail_size]
+        offsets = offsets[self._tail["live"][offsets]]
+        self._unindex_ids(offsets + self.base_size, self._tail["chunk_ids"][offsets])
+        self._tail["live"][offsets] = False
+
+    # -------------------------------------------------
+    # Lookup by chunk id
+    # -------------------------------------------------
+    def _sorted(self):
+        if self._sorted_ids is None:
+            offsets = np.flatnonzero(self._tail["live"][:self._tail_size])
+            ids = self._tail["chunk_ids"][offsets]
+            order = np.argsort(ids, kind="stable")
+            self._sorted_ids = ids[order]
+            self._sorted_labels = (offsets + self.base_size).astype(np.int64)[order]
+        return self._sorted_ids, self._sorted_labels
+
+    def _index_ids(self, labels, ids):
+        if self._sorted_ids is None:
+            return
+        order = np.argsort(ids, kind="stable")
+        ids, labels = ids[order], labels[order]
+        pos = np.searchsorted(self._sorted_ids, ids)
+        self._sorted_ids = np.insert(self._sorted_ids, pos, ids)
+        self._sorted_labels = np.insert(self._sorted_labels, pos, labels)
+
+    def _unindex_ids(self, labels, ids):
+        if self._sorted_ids is None or not len(labels):
+            return
+        pos = np.searchsorted(self._sorted_ids, ids)
+        pos = pos[pos < len(self._sorted_ids)]
+        pos = pos[np.isin(self._sorted_labels[pos], labels)]
+        self._sorted_ids = np.delete(self._sorted_ids, pos)
+        self._sorted_labels = np.delete(self._sorted_labels, pos)
+
+    @staticmethod
+    def _search(ids, id_labels, keys, out):
+        if not len(ids):
+            return
+        pos = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+        hit = ids[pos] == keys
+        out[hit] = id_labels[pos[hit]]
+
+    def lookup(self, keys):
+        """
+        Labels of live chunks by UUID bytes (uuid_keys()), -1 where the
+        chunk isn't indexed.
+        """
+        keys = np.asarray(keys, dtype="S16")
+        labels = np.full(len(keys), -1, dtype=np.int64)
+        if not len(keys):
+            return labels
+
+        self._search(self._base_ids, self._base_id_labels, keys, labels)
+        if self._base_cleared:
+            cleared = np.fromiter(self._base_cleared, dtype=np.int64, count=len(self._base_cleared))
+            labels[np.isin(labels, cleared)] = -1
+
+        # A chunk re-added after the load lives in the tail
+        self._search(*self._sorted(), keys, labels)
+        return labels
+
+    # -------------------------------------------------
+    # Column access
+    # -------------------------------------------------
+    def column(self, name, labels):
+        """Values of column `name` for an array of labels."""
+        labels = np.asarray(labels, dtype=np.int64)
+        dtype, fill = COLUMNS[name]
+        out = np.full(len(labels), fill, dtype=dtype)
+        base = labels < self.base_size
+        out[base] = self._base[name][labels[base]]
+        out[~base] = self._tail[name][labels[~base] - self.base_size]
+        return out
+
+    def _get(self, name, label):
+        if label < self.base_size:
+            return self._base[name][label]
+        return self._tail[name][label - self.base_size]
+
+    @staticmethod
+    def _bytes(arrays, mapped):
+        return sum(a.nbytes for a in arrays if isinstance(a, np.memmap) == mapped)
+
+    def _arrays(self):
+        arrays = list(self._base.values()) + list(self._tail.values())
+        arrays += [self._base_ids, self._base_id_labels]
+        if self._sorted_ids is not None:
+            arrays += [self._sorted_ids, self._sorted_labels]
+        return arrays
+
+    @property
+    def nbytes(self):
+        """Bytes held in process memory (mapped snapshot columns excluded)."""
+        return self._bytes(self._arrays(), mapped=False) + 8 * len(self._base_cleared)
+
+    @property
+    def mapped_bytes(self):
+        """Snapshot columns mapped from disk, shared between workers."""
+        return self._bytes(self._arrays(), mapped=True)
+
+    def is_live(self, label):
+        if label < 0 or label >= self.size:
+            return False
+        if label < self.base_size:
+            return bool(self._base["live"][label]) and label not in self._base_cleared
+        return bool(self._tail["live"][label - self.base_size])
+
+    def chunk_id(self, label):
+        return bytes_uuid(self._get("chunk_ids", label))
+
+    def _value(self, name, label):
+        code = int(self._get(name, label))
+        return self.vocab[name].values[code] if code >= 0 else None
+
+    def entry(self, label, factory):
+        """
+        Content-less handle (IndexedChunk) for a live label, or None.
+        """
+        if not self.is_live(label):
+            return None
+        return factory(
+            id=bytes_uuid(self._get("chunk_ids", label)),
+            document_id=bytes_uuid(self._get("document_ids", label)),
+            chunk_index=int(self._get("chunk_index", label)),
+            content=None,
+            created_at=from_micros(self._get("created_at", label)),
+            **{name: self._value(name, label) for name in STRING_ATTRIBUTES},
+        )
+
+    # -------------------------------------------------
+    # Vectorized scans
+    # -------------------------------------------------
+    def _select(self, predicate=None):
+        """
+        Boolean mask over all labels: live, and `predicate(columns)`
+        (a bool array over a column dict, or None for no condition),
+        evaluated on base and tail separately.
+        """
+        parts = []
+        for columns in (self._base, self._tail_view()):
+            part = columns["live"]
+            if predicate is not None:
+                condition = predicate(columns)
+                if condition is not None:
+                    part = part & condition
+            parts.append(part)
+
+        mask = np.concatenate(parts)
+        if self._base_cleared:
+            mask[np.fromiter(self._base_cleared, dtype=np.int64, count=len(self._base_cleared))] = False
+        return mask
+
+    def live_labels(self):
+        return np.flatnonzero(self._select()).astype(np.int64)
+
+    def labels_of_document(self, document_id):
+        key = uuid_bytes(document_id)
+        return np.flatnonzero(
+            self._select(lambda columns: columns["document_ids"] == key)
+        ).astype(np.int64)
+
+    def mask(self, filters):
+        """
+        Boolean mask over labels matching `filters` (anything with
+        owner_id / modality / source / start_date / end_date attributes).
+        """
+        codes = []
+        for name in STRING_ATTRIBUTES:
+            value = getattr(filters, name, None)
+            if value is None:
+                continue
+            code = self.vocab[name].lookup(value)
+            if code is None:
+                return np.zeros(self.size, dtype=bool)
+            codes.append((name, code))
+
+        start = getattr(filters, "start_date", None)
+        end = getattr(filters, "end_date", None)
+
+        def predicate(columns):
+            condition = None
+
+            def both(extra):
+                return extra if condition is None else condition & extra
+
+            for name, code in codes:
+                condition = both(columns[name] == code)
+
+            if start is not None or end is not None:
+                created = columns["created_at"]
+                condition = both(created >= 0)
+                if start is not None:
+                    condition &= created >= to_micros(start)
+                if end is not None:
+                    condition &= created <= to_micros(end)
+            return condition
+
+        return self._select(predicate)
+
+    def export(self):
+        """
+        Copies of the full label-indexed columns (removals folded into
+        `live`), for a snapshot.
+        """
+        tail = self._tail_view()
+        columns = {name: np.concatenate([self._base[name], tail[name]]) for name in COLUMNS}
+        columns["live"] = self._select()
+        return columns
+
+    @staticmethod
+    def bitmap(mask):
+        """Little-endian bit order, as IDSelectorBitmap expects."""
+        return np.packbits(mask, bitorder="little")
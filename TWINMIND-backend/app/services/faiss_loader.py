@@ -0,0 +1,130 @@
+# app/services/faiss_loader.py
+"""
+Bulk vector loading from Postgres for the FAISS index.
+
+Rows are streamed through a server-side cursor, and embeddings are read
+as vector_send(embedding): pgvector's binary format (int16 dim, int16
+unused, dim x big-endian float4). A whole batch of them is decoded with
+one np.frombuffer, with no pgvector objects, Python lists or per-row
+arrays, and no content (the index hydrates it for search hits only).
+Callers copy each batch straight into a preallocated matrix or into the
+index.
+
+Metadata is decoded the same way, into ChunkRows columns: ids as
+uuid_send() bytes, created_at as epoch microseconds — no per-row
+handles are built.
+"""
+import numpy as np
+from sqlalchemy import text
+
+from app.services.faiss_filters import STRING_ATTRIBUTES, ChunkRows
+
+_COLUMNS = (
+    "uuid_send(id) AS id, uuid_send(document_id) AS document_id, chunk_index, "
+    "coalesce((extract(epoch FROM created_at) * 1000000)::bigint, -1) AS created_at, "
+    "owner_id, modality, source, vector_send(embedding) AS embedding"
+)
+
+
+class VectorStream:
+    """
+    Embedded chunks of the chunks table (optionally one owner's, or
+    only the given chunk ids), in batches of `batch_size`, as ChunkRows.
+    """
+
+    def __init__(self, db, dimension, owner_id=None, chunk_ids=None, batch_size=10000):
+        self.db = db
+        self.dimension = dimension
+        self.batch_size = batch_size
+        self.skipped = 0
+
+        conditions = ["embedding IS NOT NULL"]
+        self.params = {}
+        if owner_id is not None:
+            conditions.append("owner_id = :owner_id")
+            self.params["owner_id"] = owner_id
+        if chunk_ids is not None:
+            conditions.append("id = ANY(CAST(:chunk_ids AS uuid[]))")
+            self.params["chunk_ids"] = [str(c) for c in chunk_ids]
+        self.where = " AND ".join(conditions)
+
+    def count(self) -> int:
+        """Row count, for preallocating (rows may still arrive after)."""
+        return self.db.execute(
+            text(f"SELECT count(*) FROM chunks WHERE {self.where}"), self.params
+        ).scalar_one()
+
+    def _decode(self, rows):
+        """
+        (ChunkRows, (n, dim) big-endian float32 view) for rows whose
+        vector has the expected dimension.
+        """
+        row_bytes = 4 + 4 * self.dimension
+        good = [r for r in rows if len(r.embedding) == row_bytes]
+        if len(good) < len(rows):
+            self.skipped += len(rows) - len(good)
+            print(f"[FAISS] Skipped {len(rows) - len(good)} chunks with dim != {self.dimension}")
+
+        n = len(good)
+        chunk_rows = ChunkRows.from_columns(
+            np.frombuffer(b"".join(r.id for r in good), dtype="S16"),
+            np.frombuffer(b"".join(r.document_id for r in good), dtype="S16"),
+            np.fromiter((r.chunk_index for r in good), dtype=np.int32, count=n),
+            np.fromiter((r.created_at for r in good), dtype=np.int64, count=n),
+            {name: [getattr(r, name) for r in good] for name in STRING_ATTRIBUTES},
+        )
+        raw = np.frombuffer(b"".join(r.embedding for r in good), dtype=">f4")
+        # Drop the 4-byte header (one float4 slot) of every row
+        vectors = raw.reshape(n, self.dimension + 1)[:, 1:]
+        return chunk_rows, vectors
+
+    def ids(self):
+        """
+        Chunk ids only, as uuid_send() bytes: one S16 array per batch.
+        """
+        result = self.db.execute(
+            text(f"SELECT uuid_send(id) AS id FROM chunks WHERE {self.where}"),
+            self.params,
+            execution_options={"stream_results": True, "yield_per": self.batch_size},
+        )
+        for rows in result.partitions():
+            yield np.frombuffer(b"".join(r.id for r in rows), dtype="S16")
+
+    def batches(self):
+        """
+        Yields (ChunkRows, vectors); vectors is a big-endian view into
+        the fetched batch — copy it into native float32 storage.
+        """
+        result = self.db.execute(
+            text(f"SELECT {_COLUMNS} FROM chunks WHERE {self.where}"),
+            self.params,
+            execution_options={"stream_results": True, "yield_per": self.batch_size},
+        )
+        for rows in result.partitions():
+            chunk_rows, vectors = self._decode(rows)
+            if len(chunk_rows):
+                yield chunk_rows, vectors
+
+    def read_all(self, expected=None):
+        """
+        Every row: (ChunkRows, float32 matrix), filled in place into one
+        matrix preallocated from count() (or `expected`, if known).
+        """
+        capacity = max(self.count() if expected is None else expected, 1)
+        matrix = np.empty((capacity, self.dimension), dtype=np.float32)
+        parts = []
+        n = 0
+
+        for chunk_rows, vectors in self.batches():
+            end = n + len(chunk_rows)
+            if end > capacity:
+                # Rows committed after count(); grow once, geometrically
+                capacity = max(end, 2 * capacity)
+                grown = np.empty((capacity, self.dimension), dtype=np.float32)
+                grown[:n] = matrix[:n]
+                matrix = grown
+            matrix[n:end] = vectors
+            parts.append(chunk_rows)
+            n = end
+
+        return ChunkRows.concat(parts), matrix[:n]
@@ -1,13 +1,208 @@
+import threading
+import uuid
+
 import numpy as np
 import faiss
+from sqlalchemy import event
+
+from app.config import get_settings
+from app.database.connection import SessionLocal
+from app.models.chunk import Chunk
+from app.services import faiss_snapshot
+from app.services.faiss_filters import ChunkRows, LabelAttributes
+from app.services.faiss_loader import VectorStream
 from app.services.embedding_service import EmbeddingService
 
+settings = get_settings()
+
+
+class IndexedChunk:
+    """
+    Lightweight, session-free view of an indexed chunk.
+    Exposes the same attributes the routes read from ORM chunks.
+    Handles returned by FaissService.search have content=None until
+    chunk_content.hydrate() fills it in.
+    """
+
+    __slots__ = (
+        "id", "document_id", "chunk_index", "content", "created_at",
+        "owner_id", "modality", "source",
+    )
+
+    def __init__(
+        self, id, document_id, chunk_index, content, created_at=None,
+        owner_id=None, modality=None, source=None,
+    ):
+        self.id = id
+        self.document_id = document_id
+        self.chunk_index = chunk_index
+        self.content = content
+        self.created_at = created_at
+        self.owner_id = owner_id
+        self.modality = modality
+        self.source = source
+
+    @classmethod
+    def from_chunk(cls, chunk):
+        return cls(
+            id=chunk.id,
+            document_id=chunk.document_id,
+            chunk_index=chunk.chunk_index,
+            content=chunk.content,
+            created_at=chunk.created_at,
+            owner_id=chunk.owner_id,
+            modality=chunk.modality,
+            source=chunk.source,
+        )
+
+
 class FaissService:
+    """
+    Long-lived FAISS index.
+
+    Built once at startup, then kept in sync incrementally: vectors are
+    stored under int64 labels, and chunks are added and removed by UUID
+    through LabelAttributes' sorted id column.
+
+    The index type comes from FAISS_INDEX_TYPE (flat / hnsw / ivf_flat /
+    ivf_pq) or a raw FAISS_INDEX_FACTORY string. IVF types start as flat
+    until the corpus is big enough to train on, and are retrained in the
+    background when the corpus outgrows the trained size. Types that
+    cannot remove vectors (HNSW) tombstone them until the next rebuild.
+
+    Per label the index keeps only compact numpy columns
+    (LabelAttributes: UUIDs, chunk_index, created_at, filter
+    attributes), never chunk content, ORM objects or per-chunk Python
+    objects. Search returns content-less handles; callers hydrate the
+    top-k (chunk_content).
+
+    With `owner_id` set the index only covers that owner's chunks (a
+    tenant shard, see faiss_shards).
 
-    def __init__(self):
+    Filter attributes (owner, modality, source, created_at) are kept
+    per label in LabelAttributes; filtered searches pass an
+    IDSelectorBitmap to FAISS instead of post-filtering hits.
+    """
+
+    LOAD_BATCH_SIZE = 10000
+    ADD_BATCH_SIZE = 50000
+
+    def __init__(self, owner_id=None):
+        self.owner_id = owner_id
         self.dimension = EmbeddingService.get_dim()
-        self.index = None
-        self.chunks = []
+        self._lock = threading.RLock()
+        self._index_readonly = False
+        self._next_label = 0
+        self._tombstones = set()    # labels still in an index that can't remove
+        self._attrs = LabelAttributes()
+        self._trained_size = 0
+        self._rebuild_log = None    # writes made while a rebuild runs
+        self._rebuilding = False
+        self._dirty = False
+        self.last_recall = None
+        self._wants_training = self._requires_training()
+        self._install_index(self._create_index(0), trained_size=0)
+
+    # -------------------------------------------------
+    # Index construction
+    # -------------------------------------------------
+    def _factory_string(self, n_vectors, bootstrap=True):
+        """
+        FAISS index_factory description for a corpus of n_vectors.
+        Types that need training use "Flat" until the corpus is big
+        enough to train on (exact search is cheap at that size anyway).
+        """
+        if bootstrap and self._wants_training and n_vectors < settings.FAISS_MIN_TRAIN_SIZE:
+            return "Flat"
+
+        if settings.FAISS_INDEX_FACTORY:
+            return settings.FAISS_INDEX_FACTORY
+
+        kind = settings.FAISS_INDEX_TYPE
+
+        if kind == "hnsw":
+            return f"HNSW{settings.FAISS_HNSW_M}"
+
+        if kind in ("ivf_flat", "ivf_pq"):
+            nlist = settings.FAISS_IVF_NLIST or int(4 * np.sqrt(n_vectors))
+            # FAISS wants ~39 training points per centroid
+            nlist = max(1, min(nlist, n_vectors // 39, 65536))
+
+            if kind == "ivf_pq":
+                return f"IVF{nlist},PQ{settings.FAISS_PQ_M}x{settings.FAISS_PQ_NBITS}"
+            return f"IVF{nlist},Flat"
+
+        return "Flat"
+
+    def _requires_training(self):
+        n = max(settings.FAISS_MIN_TRAIN_SIZE, 1)
+        desc = self._factory_string(n, bootstrap=False)
+        return not faiss.index_factory(self.dimension, desc).is_trained
+
+    def _create_index(self, n_vectors):
+        description = self._factory_string(n_vectors)
+        index = faiss.index_factory(self.dimension, description, faiss.METRIC_L2)
+
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            # IVF takes ids natively; a hashtable direct map allows
+            # remove_ids() and reconstruct() by label
+            ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return index
+
+        inner = faiss.downcast_index(index)
+        if hasattr(inner, "hnsw"):
+            inner.hnsw.efConstruction = settings.FAISS_HNSW_EF_CONSTRUCTION
+
+        return faiss.IndexIDMap2(index)
+
+    def _configure(self, index):
+        """
+        Apply search-time parameters and record index capabilities.
+        """
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = settings.FAISS_IVF_NPROBE
+            self._removable = True
+            return
+
+        inner = index
+        if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            inner = faiss.downcast_index(index.index)
+
+        if hasattr(inner, "hnsw"):
+            inner.hnsw.efSearch = settings.FAISS_HNSW_EF_SEARCH
+
+        self._removable = isinstance(inner, faiss.IndexFlat)
+
+    def _install_index(self, index, trained_size):
+        self.index = index
+        self._configure(index)
+        self._trained_size = trained_size
+        self._tombstones = set()
+
+    def _train(self, index, vectors):
+        if index.is_trained:
+            return 0
+
+        n = len(vectors)
+        sample = vectors
+        if n > settings.FAISS_TRAIN_SAMPLE:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(n, settings.FAISS_TRAIN_SAMPLE, replace=False)]
+
+        print(f"[FAISS] Training {self.describe(index)} on {len(sample)} vectors")
+        index.train(np.ascontiguousarray(sample))
+        return n
+
+    def describe(self, index=None):
+        index = index if index is not None else self.index
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            return f"{type(faiss.downcast_index(ivf)).__name__}(nlist={ivf.nlist}, nprobe={ivf.nprobe})"
+        if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            return type(faiss.downcast_index(index.index)).__name__
+        return type(index).__name__
 
     def _to_list(self, emb):
         """
@@ -23,59 +218,736 @@ class FaissService:
         except Exception:
             return None
 
-    def build_index(self, all_chunks):
-        valid_chunks = []
-        valid_vectors = []
+    def _prepare(self, items):
+        """
+        Validate (IndexedChunk, embedding) pairs.
+        Returns (ChunkRows, float32 matrix) for the valid ones.
+        """
+        entries = []
+        vectors = []
 
-        for c in all_chunks:
-            raw_emb = c.embedding
+        for entry, raw_emb in items:
             emb = self._to_list(raw_emb)
 
             if emb is None:
-                print(f"[FAISS] Chunk {c.id} embedding invalid")
+                print(f"[FAISS] Chunk {entry.id} embedding invalid")
                 continue
 
             if len(emb) != self.dimension:
-                print(f"[FAISS] Chunk {c.id} dim mismatch {len(emb)} != {self.dimension}")
+                print(f"[FAISS] Chunk {entry.id} dim mismatch {len(emb)} != {self.dimension}")
                 continue
 
-            vector = np.array(emb, dtype=np.float32)
-            valid_chunks.append(c)
-            valid_vectors.append(vector)
+            entries.append(entry)
+            vectors.append(np.asarray(emb, dtype=np.float32))
+
+        if not vectors:
+            return ChunkRows.from_entries([]), None
+
+        return ChunkRows.from_entries(entries), np.vstack(vectors)
+
+    # -------------------------------------------------
+    # Index maintenance
+    # -------------------------------------------------
+    def __len__(self):
+        return self.index.ntotal - len(self._tombstones)
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def reset(self):
+        with self._lock:
+            self._install_index(self._create_index(0), trained_size=0)
+            self._index_readonly = False
+            self._next_label = 0
+            self._attrs = LabelAttributes()
+            self._dirty = True
+
+    def _writable_index(self):
+        # A memory-mapped index is read-only; copy it on first write
+        if self._index_readonly:
+            self.index = faiss_snapshot.to_memory(self.index)
+            self._configure(self.index)
+            self._index_readonly = False
+        return self.index
+
+    def _entry(self, label):
+        # Content-less handle; search callers hydrate the hits they return
+        return self._attrs.entry(label, IndexedChunk)
+
+    def build_index(self, all_chunks):
+        """
+        Replace the whole index with the given ORM chunks.
+        """
+        rows, vectors = self._prepare(
+            [(IndexedChunk.from_chunk(c), c.embedding) for c in all_chunks]
+        )
+        self._replace_all(rows, vectors)
+        print(f"[FAISS] Index built ({len(self)} vectors)")
+
+    def add_chunks(self, chunks):
+        """
+        Add (or replace) ORM chunks in the index.
+        """
+        self.add_entries([(IndexedChunk.from_chunk(c), c.embedding) for c in chunks])
+
+    def add_entries(self, items):
+        """
+        Add (or replace) (IndexedChunk, embedding) pairs in the index.
+        """
+        rows, vectors = self._prepare(items)
+        return self._add_prepared(rows, vectors)
+
+    def _add_prepared(self, rows, vectors):
+        """
+        Add a validated ChunkRows batch with its float32 matrix.
+        """
+        n = len(rows)
+        if not n:
+            return 0
+
+        with self._lock:
+            self._remove_keys(rows.chunk_ids)
+
+            labels = np.arange(self._next_label, self._next_label + n, dtype=np.int64)
+            self._next_label += n
+
+            self._writable_index().add_with_ids(vectors, labels)
+            self._attrs.set(labels, rows)
+
+            if self._rebuild_log is not None:
+                self._rebuild_log.append(("add", (rows, vectors)))
+
+            self._dirty = True
+
+        self._maybe_rebuild()
+        return n
+
+    def remove_chunks(self, chunk_ids):
+        """
+        Remove chunks from the index by UUID. Unknown ids are ignored.
+        """
+        return self._remove_keys(faiss_snapshot.uuid_keys(chunk_ids))
+
+    def _remove_keys(self, keys):
+        """remove_chunks() for chunk ids as UUID bytes."""
+        with self._lock:
+            if self._rebuild_log is not None:
+                self._rebuild_log.append(("remove", keys))
+
+            labels = self._attrs.lookup(keys)
+            labels = labels[labels >= 0]
+            if not len(labels):
+                return 0
+
+            self._attrs.clear(labels)
+            if self._removable:
+                self._writable_index().remove_ids(labels)
+            else:
+                self._tombstones.update(labels.tolist())
+
+            self._dirty = True
+
+        self._maybe_rebuild()
+        return len(labels)
+
+    def remove_document(self, document_id):
+        with self._lock:
+            labels = self._attrs.labels_of_document(document_id)
+            return self._remove_keys(self._attrs.column("chunk_ids", labels))
+
+    # -------------------------------------------------
+    # Full (re)builds and retraining
+    # -------------------------------------------------
+    def _vector_stream(self, db, chunk_ids=None):
+        """Embedded chunks (this shard's owner only), decoded in bulk."""
+        return VectorStream(
+            db, self.dimension,
+            owner_id=self.owner_id, chunk_ids=chunk_ids, batch_size=self.LOAD_BATCH_SIZE,
+        )
+
+    def _read_db(self, db):
+        """
+        Load every embedded chunk: (ChunkRows, float32 matrix).
+        """
+        return self._vector_stream(db).read_all()
+
+    def _replace_all(self, rows, vectors):
+        """
+        Build (and train, if needed) a new index over `rows`, then swap
+        it in and replay any writes that happened meanwhile.
+        """
+        n = len(rows)
+        index = self._create_index(n)
+        trained_size = self._train(index, vectors) if n else 0
+
+        labels = np.arange(n, dtype=np.int64)
+        for i in range(0, n, self.ADD_BATCH_SIZE):
+            index.add_with_ids(vectors[i:i + self.ADD_BATCH_SIZE], labels[i:i + self.ADD_BATCH_SIZE])
+
+        attrs = LabelAttributes(n)
+        attrs.set(labels, rows)
+        self._install_built(index, attrs, n, trained_size)
+
+    def _stream_build(self, stream, index):
+        """
+        Fill an untrained-type index batch by batch as rows stream in;
+        only one batch of vectors is held outside the index.
+        """
+        n = 0
+        attrs = LabelAttributes()
+        buffer = np.empty((self.LOAD_BATCH_SIZE, self.dimension), dtype=np.float32)
+
+        for rows, vectors in stream.batches():
+            k = len(rows)
+            labels = np.arange(n, n + k, dtype=np.int64)
+            buffer[:k] = vectors
+            index.add_with_ids(buffer[:k], labels)
+            attrs.set(labels, rows)
+            n += k
+
+        self._install_built(index, attrs, n, trained_size=0)
+
+    def _install_built(self, index, attrs, n, trained_size):
+        """
+        Swap in a freshly built index (labels 0..n-1, described by
+        `attrs`) and replay the writes logged while it was built.
+        """
+        with self._lock:
+            self._install_index(index, trained_size)
+            self._index_readonly = False
+            self._next_label = n
+            self._attrs = attrs
+            self._dirty = True
+
+            log, self._rebuild_log = self._rebuild_log, None
+            for op, payload in log or []:
+                if op == "add":
+                    self._add_prepared(*payload)
+                else:
+                    self._remove_keys(payload)
+
+        print(f"[FAISS] Installed {self.describe()} with {len(self)} vectors")
+
+    def start_write_log(self):
+        """
+        Record writes from now on; the next full load replays them, so
+        nothing committed while it reads the DB is lost.
+        """
+        with self._lock:
+            self._rebuild_log = []
+
+    def index_bytes(self):
+        """
+        Estimated size of the FAISS index, without serializing it:
+        ntotal x (code size + 8-byte id), plus level-0 graph links for
+        HNSW.
+        """
+        with self._lock:
+            index = self.index
+            inner = faiss.try_extract_index_ivf(index)
+            if inner is None:
+                inner = index
+                if isinstance(inner, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+                    inner = faiss.downcast_index(inner.index)
+
+            per_vector = (getattr(inner, "code_size", 0) or 4 * self.dimension) + 8
+            if hasattr(inner, "hnsw"):
+                per_vector += 2 * settings.FAISS_HNSW_M * 4
+            return index.ntotal * per_vector
+
+    def metadata_bytes(self):
+        """
+        Per-label columns held in memory (content isn't; mapped
+        snapshot columns are left out).
+        """
+        with self._lock:
+            return self._attrs.nbytes
+
+    def load_from_db(self, db):
+        """
+        Rebuild the index from the chunks table. Types that need no
+        training are filled as rows stream in; trained types read into
+        one preallocated matrix first, to train on.
+        """
+        stream = self._vector_stream(db)
+        n = stream.count()
+        index = self._create_index(n)
+        if index.is_trained:
+            self._stream_build(stream, index)
+        else:
+            rows, vectors = stream.read_all(n)
+            self._replace_all(rows, vectors)
+        print(f"[FAISS] Index loaded from DB ({len(self)} vectors)")
+
+    def _needs_rebuild(self):
+        total = self.index.ntotal
+        if total == 0:
+            return False
+
+        # Tombstones waste search time and memory
+        if len(self._tombstones) > settings.FAISS_MAX_TOMBSTONE_RATIO * total:
+            return True
+
+        # Flat bootstrap for a trained type: train once big enough
+        if self._wants_training and self._trained_size == 0:
+            return total >= settings.FAISS_MIN_TRAIN_SIZE
+
+        # Corpus outgrew the codebooks / centroids it was trained on
+        return (
+            self._trained_size > 0
+            and total > settings.FAISS_RETRAIN_GROWTH * self._trained_size
+        )
+
+    def _maybe_rebuild(self):
+        with self._lock:
+            if self._rebuilding or not self._needs_rebuild():
+                return
+            self._rebuilding = True
+            self._rebuild_log = []
+
+        threading.Thread(target=self._rebuild, name="faiss-rebuild", daemon=True).start()
+
+    def _rebuild(self):
+        print(f"[FAISS] Background rebuild started ({len(self)} vectors)")
+        try:
+            db = SessionLocal()
+            try:
+                self.load_from_db(db)
+            finally:
+                db.close()
+        except Exception as e:
+            print(f"[FAISS] Background rebuild failed: {e}")
+            with self._lock:
+                self._rebuild_log = None
+        finally:
+            self._rebuilding = False
+
+    def reconcile_in_background(self):
+        """
+        reconcile_with_db() on the background rebuild thread. Holds the
+        rebuild slot, so no full rebuild relabels the index mid-scan;
+        one that became due meanwhile starts afterwards.
+        """
+        with self._lock:
+            if self._rebuilding:
+                return False
+            self._rebuilding = True
+
+        threading.Thread(target=self._reconcile, name="faiss-rebuild", daemon=True).start()
+        return True
+
+    def _reconcile(self):
+        try:
+            db = SessionLocal()
+            try:
+                added, removed = self.reconcile_with_db(db)
+            finally:
+                db.close()
+            print(f"[FAISS] Reconciled snapshot with DB: +{added} / -{removed} chunks")
+        except Exception as e:
+            print(f"[FAISS] Background reconcile failed: {e}")
+        finally:
+            self._rebuilding = False
+        self._maybe_rebuild()
+
+    def reconcile_with_db(self, db):
+        """
+        Make the index match the chunks table by id: add embedded chunks
+        it lacks and remove ones that are gone. Reads ids only, plus the
+        vectors of the missing chunks. Returns (added, removed).
+        """
+        with self._lock:
+            seen = np.zeros(self._next_label, dtype=bool)
+
+        missing = []
+        for keys in self._vector_stream(db).ids():
+            with self._lock:
+                labels = self._attrs.lookup(keys)
+            found = labels[labels >= 0]
+            seen[found[found < len(seen)]] = True
+            missing.append(keys[labels < 0])
+
+        # Labels handed out during the scan came from commits seen live
+        with self._lock:
+            live = self._attrs.live_labels()
+            live = live[live < len(seen)]
+            stale = self._attrs.column("chunk_ids", live[~seen[live]])
+        removed = self._remove_keys(stale)
+
+        missing = np.concatenate(missing) if missing else np.zeros(0, dtype="S16")
+        added = 0
+        for i in range(0, len(missing), self.LOAD_BATCH_SIZE):
+            chunk_ids = [faiss_snapshot.bytes_uuid(k) for k in missing[i:i + self.LOAD_BATCH_SIZE]]
+            for rows, vectors in self._vector_stream(db, chunk_ids).batches():
+                added += self._add_prepared(rows, np.ascontiguousarray(vectors, dtype=np.float32))
+        return added, removed
+
+    def measure_recall(self, db, k=10, sample_size=200):
+        """
+        recall@k of the live index against exact (flat) search over the
+        same vectors, using a random sample of corpus vectors as queries.
+        """
+        rows, vectors = self._read_db(db)
+        n = len(rows)
+        if n == 0:
+            return {"k": k, "sample_size": 0, "recall": None, "index": self.describe()}
+
+        k = min(k, n)
+        rng = np.random.default_rng()
+        queries = vectors[rng.choice(n, min(sample_size, n), replace=False)]
+
+        exact = faiss.IndexFlatL2(self.dimension)
+        exact.add(vectors)
+        _, truth = exact.search(queries, k)
+
+        hits = 0
+        for q, row in zip(queries, truth):
+            expected = {rows.chunk_id(i) for i in row if i >= 0}
+            found = {c.id for c, _ in self.search(q, top_k=k)}
+            hits += len(expected & found)
+
+        recall = hits / (len(queries) * k)
+        self.last_recall = {
+            "k": k,
+            "sample_size": len(queries),
+            "recall": recall,
+            "index": self.describe(),
+        }
+        return self.last_recall
+
+    def stats(self):
+        with self._lock:
+            return {
+                "index": self.describe(),
+                "vectors": len(self),
+                "tombstones": len(self._tombstones),
+                "trained_size": self._trained_size,
+                "rebuilding": self._rebuilding,
+                "snapshot_rows": self._attrs.base_size,
+                "snapshot_mapped_bytes": self._attrs.mapped_bytes,
+                "last_recall": self.last_recall,
+            }
+
+    # -------------------------------------------------
+    # Snapshots
+    # -------------------------------------------------
+    def save_snapshot(self, root, force=False):
+        """
+        Write the index to `root` if it changed since the last snapshot.
+        Returns the snapshot path, or None if nothing was written.
+
+        Only the in-memory copy (serialized index, column copies) is
+        taken under the index lock; searches and sync writes continue
+        while it is written to disk.
+        """
+        with faiss_snapshot.writer_lock(root) as acquired:
+            if not acquired:
+                print("[FAISS] Snapshot skipped — another worker is writing")
+                return None
+
+            with self._lock:
+                if not (self._dirty or force):
+                    return None
+
+                # Tombstoned rows are written as not live, so they
+                # resolve to nothing after a reload. A mapped IVF index
+                # would serialize as a reference to its (possibly
+                # pruned) file, so it is copied into memory first
+                index = self._writable_index() if self._index_readonly else self.index
+                capture = faiss_snapshot.Capture(index, self._attrs)
+                next_label = self._next_label
+                extra = {"trained_size": self._trained_size}
+                self._dirty = False
+                count = len(self)
+
+            try:
+                path = faiss_snapshot.write_snapshot(root, capture, next_label, extra=extra)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+        print(f"[FAISS] Snapshot written to {path} ({count} vectors)")
+        return path
+
+    def load_snapshot(self, root):
+        """
+        Memory-map the current snapshot under `root`; its column files
+        are used in place (see LabelAttributes).
+        Returns its manifest, or None if no usable snapshot exists.
+        """
+        loaded = faiss_snapshot.read_snapshot(root, self.dimension)
+        if loaded is None:
+            return None
+
+        index, segment, manifest = loaded
+
+        with self._lock:
+            self._install_index(index, manifest.get("trained_size", 0))
+            self._index_readonly = True
+            self._next_label = manifest["next_label"]
+            self._attrs = LabelAttributes.from_segment(segment)
+            self._dirty = False
+
+        print(f"[FAISS] Snapshot loaded from {segment.path} ({len(self)} vectors)")
+        return manifest
+
+    def warm_start(self, db, root):
+        """
+        Load the snapshot and serve from it right away, reconciling it
+        with the DB by id in the background; fall back to a full DB load
+        (and write a fresh snapshot) if there is none. Until the
+        reconcile finishes, search may miss chunks committed after the
+        snapshot or return ones deleted since (hydration drops those).
+
+        No timestamp watermark is trusted: the snapshot comes from
+        whichever worker held the lock, and that worker may not have
+        seen every commit (INGEST_QUEUE_BACKEND=local has no
+        cross-process sync), so its newest row says nothing about what
+        it is missing.
+        """
+        manifest = self.load_snapshot(root)
 
-        if not valid_vectors:
-            print("[FAISS] No valid embeddings — FAISS index cleared")
-            self.index = None
-            self.chunks = []
+        if manifest is None:
+            self.load_from_db(db)
+            self.save_snapshot(root, force=True)
             return
 
-        vectors_np = np.vstack(valid_vectors)
+        self.reconcile_in_background()
 
-        print("[FAISS] Building index with shape:", vectors_np.shape)
+    # -------------------------------------------------
+    # Search
+    # -------------------------------------------------
+    def _search_params(self, selector):
+        """
+        SearchParameters of the right subclass for the index, carrying
+        `selector` and the configured nprobe / efSearch.
+        """
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
 
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.index.add(vectors_np)
+        inner = self.index
+        if isinstance(inner, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            inner = faiss.downcast_index(inner.index)
+        if hasattr(inner, "hnsw"):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
 
-        self.chunks = valid_chunks
-        print(f"[FAISS] Index built ({len(valid_chunks)} vectors)")
+        return faiss.SearchParameters(sel=selector)
 
-    def search(self, query_embedding, top_k=5):
+    def _exact_search(self, query_np, labels, top_k):
+        """
+        Brute force over a small candidate set. Graph / IVF search with
+        a very selective filter misses matches; scanning a few thousand
+        reconstructed vectors is exact and just as fast.
+        """
+        try:
+            vectors = self.index.reconstruct_batch(labels)
+        except RuntimeError:
+            # e.g. a factory string whose transform can't be inverted
+            return None
+
+        distances = ((vectors - query_np) ** 2).sum(axis=1)
+        order = np.argsort(distances, kind="stable")[:top_k]
+        return labels[order], distances[order]
 
-        if self.index is None:
-            print("[FAISS] Search failed — index is None")
+    def _filtered_search(self, query_np, top_k, filters):
+        mask = self._attrs.mask(filters)
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
             return []
 
-        query_np = np.array(query_embedding, dtype=np.float32).reshape(1, -1)
+        hits = None
+        if len(candidates) <= settings.FAISS_FILTER_EXACT_THRESHOLD:
+            hits = self._exact_search(query_np, candidates.astype(np.int64), top_k)
 
-        distances, indices = self.index.search(query_np, top_k)
+        if hits is None:
+            bitmap = LabelAttributes.bitmap(mask)
+            selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+            k = min(top_k, len(candidates))
+            distances, labels = self.index.search(
+                query_np, k, params=self._search_params(selector)
+            )
+            hits = (labels[0], distances[0])
 
         results = []
-        for idx, dist in zip(indices[0], distances[0]):
-            if idx == -1:
-                continue
-            if idx >= len(self.chunks):
+        for label, dist in zip(*hits):
+            if label == -1:
                 continue
+            entry = self._entry(int(label))
+            if entry is not None:
+                results.append((entry, float(dist)))
+        return results
 
-            results.append((self.chunks[idx], float(dist)))
+    def search(self, query_embedding, top_k=5, filters=None):
+        """
+        Returns [(IndexedChunk, distance), ...].
 
-        return results
+        `filters` (owner_id / modality / source / start_date / end_date,
+        e.g. a SearchFilters) is applied inside the FAISS search.
+        """
+        query_np = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+
+        with self._lock:
+            total = self.index.ntotal
+            if total == 0:
+                print("[FAISS] Search skipped — index is empty")
+                return []
+
+            if filters:
+                return self._filtered_search(query_np, top_k, filters)
+
+            # Unfiltered: over-fetch by the tombstone count so dropped
+            # rows don't leave the result short
+            k = min(top_k + len(self._tombstones), total)
+            distances, labels = self.index.search(query_np, k)
+
+            results = []
+            for label, dist in zip(labels[0], distances[0]):
+                if label == -1:
+                    continue
+                entry = self._entry(int(label))
+                if entry is None:
+                    continue
+                results.append((entry, float(dist)))
+
+            return results[:top_k]
+
+    def vectors(self, chunk_ids):
+        """
+        Stored vectors of the given chunks, {chunk_id: float32 array}.
+        Chunks that aren't indexed are left out.
+        """
+        chunk_ids = list(chunk_ids)
+        with self._lock:
+            labels = self._attrs.lookup(faiss_snapshot.uuid_keys(chunk_ids))
+            found = [
+                (chunk_id, label) for chunk_id, label in zip(chunk_ids, labels.tolist())
+                if label >= 0 and label not in self._tombstones
+            ]
+            if not found:
+                return {}
+
+            labels = np.asarray([label for _, label in found], dtype=np.int64)
+            try:
+                matrix = self.index.reconstruct_batch(labels)
+            except RuntimeError:
+                # e.g. a factory string whose transform can't be inverted
+                return {}
+
+        return {chunk_id: matrix[i] for i, (chunk_id, _) in enumerate(found)}
+
+
+# Shared process-wide index used by the routes and query service. It
+# stays empty unless the API loads it (main.lifespan)
+faiss_service = FaissService()
+
+
+# -----------------------------------------------------
+# Keep the index in sync with committed chunk writes
+# -----------------------------------------------------
+_PENDING_ADD = "faiss_pending_add"
+_PENDING_REMOVE = "faiss_pending_remove"
+
+# Anything with add_entries(items) / remove_chunks(ids)
+_sync_targets = []
+
+
+def register_sync_target(target):
+    if target not in _sync_targets:
+        _sync_targets.append(target)
+
+
+def start_index_sync():
+    """
+    Register this process's in-memory indexes and caches as sync
+    targets. Only the API process calls this (main.lifespan): ingestion
+    workers commit chunks but never search, so they keep no index and
+    the session hooks below stay no-ops there.
+    """
+    from app.services.answer_cache import answer_cache
+    from app.services.faiss_shards import tenant_indexes
+
+    if settings.VECTOR_BACKEND == "faiss":
+        register_sync_target(faiss_service)
+    elif settings.VECTOR_BACKEND == "faiss_tenant":
+        register_sync_target(tenant_indexes)
+
+    if answer_cache.enabled:
+        register_sync_target(answer_cache)
+
+
+def sync_document(document_id):
+    """
+    Feed a document's chunks to the sync targets. For chunks committed
+    by another process (ingestion workers), which the session hooks
+    here never see.
+    """
+    if not _sync_targets:
+        return 0
+
+    if not isinstance(document_id, uuid.UUID):
+        document_id = uuid.UUID(str(document_id))
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Chunk)
+            .filter(Chunk.document_id == document_id, Chunk.embedding.isnot(None))
+            .all()
+        )
+        items = [(IndexedChunk.from_chunk(c), c.embedding) for c in rows]
+    finally:
+        db.close()
+
+    for target in _sync_targets:
+        target.add_entries(items)
+    return len(items)
+
+
+def track_bulk_insert(session, chunks):
+    """
+    Queue chunks written outside the unit of work (bulk COPY / Core
+    INSERT) for the sync targets, as the after_flush hook does for ORM
+    inserts. Applied on commit, dropped on rollback.
+    """
+    if not _sync_targets:
+        return
+
+    for obj in chunks:
+        # Duplicates (no embedding) stay out of the index
+        if obj.embedding is not None:
+            session.info.setdefault(_PENDING_ADD, []).append(
+                (IndexedChunk.from_chunk(obj), obj.embedding)
+            )
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_chunk_changes(session, flush_context):
+    if not _sync_targets:
+        return
+
+    track_bulk_insert(session, [obj for obj in session.new if isinstance(obj, Chunk)])
+
+    for obj in session.deleted:
+        if isinstance(obj, Chunk):
+            session.info.setdefault(_PENDING_REMOVE, []).append(obj.id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_chunk_changes(session):
+    removed = session.info.pop(_PENDING_REMOVE, None)
+    added = session.info.pop(_PENDING_ADD, None)
+
+    for target in _sync_targets:
+        if removed:
+            target.remove_chunks(removed)
+        if added:
+            target.add_entries(added)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_chunk_changes(session):
+    session.info.pop(_PENDING_ADD, None)
+    session.info.pop(_PENDING_REMOVE, None)
@@ -0,0 +1,205 @@
+# app/services/faiss_shards.py
+"""
+Per-tenant FAISS shards (VECTOR_BACKEND=faiss_tenant).
+
+Each owner gets their own FaissService covering only their chunks.
+Shards are built from the DB on the owner's first query and kept in
+LRU order; when the shards' total size goes over
+FAISS_SHARD_MEMORY_MB, the least recently used ones are dropped. Memory
+therefore follows the set of active users rather than the whole corpus.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import get_settings
+from app.database.connection import SessionLocal
+from app.services.faiss_service import FaissService
+
+settings = get_settings()
+
+
+class TenantShard:
+    __slots__ = ("owner_id", "index", "nbytes", "load_ms", "last_used", "hits")
+
+    def __init__(self, owner_id, index, load_ms):
+        self.owner_id = owner_id
+        self.index = index
+        self.load_ms = load_ms
+        self.last_used = time.monotonic()
+        self.hits = 0
+        self.resize()
+
+    def resize(self):
+        # Estimated from code size and column arrays; cheap enough to
+        # run under the manager lock on every write
+        self.nbytes = int(self.index.index_bytes() + self.index.metadata_bytes())
+
+    def stats(self):
+        return {
+            "owner_id": self.owner_id,
+            "vectors": len(self.index),
+            "bytes": self.nbytes,
+            "load_ms": round(self.load_ms, 1),
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            "hits": self.hits,
+            "index": self.index.describe(),
+        }
+
+
+class TenantIndexManager:
+    def __init__(self, memory_budget_bytes):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._lock = threading.Lock()
+        self._shards = OrderedDict()   # owner_id -> TenantShard, LRU first
+        self._loading = {}             # owner_id -> FaissService being built
+        self._load_locks = {}
+        self.loads = 0
+        self.evictions = 0
+
+    # -------------------------------------------------
+    # Loading / eviction
+    # -------------------------------------------------
+    def _touch(self, owner_id):
+        shard = self._shards.get(owner_id)
+        if shard is not None:
+            self._shards.move_to_end(owner_id)
+            shard.last_used = time.monotonic()
+            shard.hits += 1
+        return shard
+
+    def get(self, owner_id) -> FaissService:
+        """
+        The owner's shard, built from the DB on first use. Blocking —
+        call through run_io().
+        """
+        with self._lock:
+            shard = self._touch(owner_id)
+            if shard is not None:
+                return shard.index
+            load_lock = self._load_locks.setdefault(owner_id, threading.Lock())
+
+        # One load per owner; concurrent first queries wait for it
+        with load_lock:
+            with self._lock:
+                shard = self._touch(owner_id)
+                if shard is not None:
+                    return shard.index
+
+            try:
+                shard = self._load(owner_id)
+            except Exception:
+                with self._lock:
+                    self._loading.pop(owner_id, None)
+                    self._load_locks.pop(owner_id, None)
+                raise
+
+            # Swap from "loading" to "loaded" atomically so no write
+            # falls between the two
+            with self._lock:
+                self._loading.pop(owner_id, None)
+                self._shards[owner_id] = shard
+                self._load_locks.pop(owner_id, None)
+                self._evict(keep=owner_id)
+
+        return shard.index
+
+    def _load(self, owner_id):
+        start = time.perf_counter()
+        index = FaissService(owner_id=owner_id)
+
+        # Route writes committed during the load into its replay log
+        index.start_write_log()
+        with self._lock:
+            self._loading[owner_id] = index
+
+        db = SessionLocal()
+        try:
+            index.load_from_db(db)
+        finally:
+            db.close()
+
+        load_ms = (time.perf_counter() - start) * 1000
+        self.loads += 1
+        print(f"[FAISS] Shard {owner_id} loaded ({len(index)} vectors, {load_ms:.0f} ms)")
+        return TenantShard(owner_id, index, load_ms)
+
+    def _evict(self, keep=None):
+        used = sum(s.nbytes for s in self._shards.values())
+        for owner_id in list(self._shards):
+            if used <= self.memory_budget_bytes:
+                break
+            if owner_id == keep:
+                continue
+            shard = self._shards.pop(owner_id)
+            used -= shard.nbytes
+            self.evictions += 1
+            print(f"[FAISS] Shard {owner_id} evicted ({shard.nbytes} bytes)")
+
+    def evict(self, owner_id):
+        with self._lock:
+            return self._shards.pop(owner_id, None) is not None
+
+    # -------------------------------------------------
+    # Search / sync (same interface as FaissService)
+    # -------------------------------------------------
+    def search(self, owner_id, query_embedding, top_k=5, filters=None):
+        return self.get(owner_id).search(query_embedding, top_k, filters)
+
+    def vectors(self, owner_id, chunk_ids):
+        return self.get(owner_id).vectors(chunk_ids)
+
+    def _live(self, owner_id):
+        with self._lock:
+            shard = self._shards.get(owner_id)
+            if shard is not None:
+                return shard.index, shard
+            return self._loading.get(owner_id), None
+
+    def add_entries(self, items):
+        """
+        Apply committed chunks to the owners' shards, if loaded.
+        Unloaded owners pick them up from the DB on their next load.
+        """
+        by_owner = {}
+        for entry, embedding in items:
+            by_owner.setdefault(entry.owner_id, []).append((entry, embedding))
+
+        for owner_id, owner_items in by_owner.items():
+            index, shard = self._live(owner_id)
+            if index is None:
+                continue
+            index.add_entries(owner_items)
+            if shard is not None:
+                with self._lock:
+                    shard.resize()
+                    self._evict(keep=owner_id)
+
+    def remove_chunks(self, chunk_ids):
+        chunk_ids = list(chunk_ids)
+        with self._lock:
+            shards = list(self._shards.values())
+            loading = list(self._loading.values())
+
+        for index in loading:
+            index.remove_chunks(chunk_ids)
+        for shard in shards:
+            if shard.index.remove_chunks(chunk_ids):
+                shard.resize()
+
+    def stats(self):
+        with self._lock:
+            shards = [s.stats() for s in reversed(self._shards.values())]
+            return {
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "memory_used_bytes": sum(s["bytes"] for s in shards),
+                "loaded_shards": len(shards),
+                "loading": list(self._loading),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "shards": shards,
+            }
+
+
+# Registered as a sync target by faiss_service.start_index_sync()
+tenant_indexes = TenantIndexManager(settings.FAISS_SHARD_MEMORY_MB * 1024 * 1024)
@@ -0,0 +1,281 @@
+# app/services/faiss_snapshot.py
+"""
+On-disk FAISS snapshots.
+
+Each snapshot is a directory; the `CURRENT` file in the snapshot root
+names the live one so a new snapshot can be swapped in atomically.
+
+    index.faiss          FAISS index (int64 labels)
+    live.npy             bool[L]   label is a live chunk (L = next label)
+    chunk_ids.npy        S16[L]    chunk UUID bytes, indexed by label
+    document_ids.npy     S16[L]
+    chunk_index.npy      int32[L]
+    created_at.npy       int64[L]  epoch microseconds, -1 if unknown
+    owner_id.npy         int32[L]  codes into manifest["vocab"], -1 if unset
+    modality.npy         int32[L]
+    source.npy           int32[L]
+    sorted_ids.npy       S16[N]    live chunk ids sorted, for UUID lookup
+    id_labels.npy        int64[N]  label of each sorted_ids entry
+    manifest.json
+
+The column files are indexed by label, so LabelAttributes uses the
+read-only memory maps directly as its base columns: nothing is copied
+on load, and the page cache is shared by every worker on the host.
+Rows written after the load go to an in-memory overlay.
+
+The index itself is mapped only where FAISS supports it: IVF inverted
+lists (IO_FLAG_MMAP), and flat codes on builds that have
+IO_FLAG_MMAP_IFC. Other types (HNSW, and flat indexes on older
+faiss-cpu such as 1.8) are read into memory. A mapped index is copied
+into memory on its first write (to_memory), from the live mapping: the
+snapshot directory may be pruned by then, and unlinked files stay
+readable through an existing map.
+
+Chunk content is not stored; search hydrates it for the hits it returns.
+"""
+import fcntl
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import faiss
+import numpy as np
+
+SNAPSHOT_VERSION = 4
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+KEEP_SNAPSHOTS = 2
+ATTRIBUTES = ("owner_id", "modality", "source")
+
+# Per-label column files: name -> (dtype, value for labels with no row)
+COLUMNS = {
+    "live": (bool, False),
+    "chunk_ids": ("S16", b""),
+    "document_ids": ("S16", b""),
+    "chunk_index": (np.int32, 0),
+    "created_at": (np.int64, -1),
+    "owner_id": (np.int32, -1),
+    "modality": (np.int32, -1),
+    "source": (np.int32, -1),
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_micros(dt):
+    if dt is None:
+        return -1
+    if dt.tzinfo is not None:
+        dt = dt.replace(tzinfo=None) - dt.utcoffset()
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(value):
+    if value < 0:
+        return None
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+def uuid_bytes(value):
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    return uuid.UUID(str(value)).bytes
+
+
+def uuid_keys(values):
+    """UUIDs as an S16 array, for vectorized lookups."""
+    return np.array([uuid_bytes(v) for v in values], dtype="S16")
+
+
+def bytes_uuid(raw):
+    # numpy strips trailing NULs from S16 values
+    return uuid.UUID(bytes=bytes(raw).ljust(16, b"\0"))
+
+
+def to_memory(index):
+    """
+    Writable in-memory copy of an index read by read_snapshot().
+    clone_index() can't copy memory-mapped IVF lists; for those the
+    lists are copied out of the mapping into ArrayInvertedLists and
+    swapped in place, which also makes `index` itself writable.
+    """
+    try:
+        return faiss.clone_index(index)
+    except RuntimeError:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is None:
+            raise
+
+    mapped = ivf.invlists
+    lists = faiss.ArrayInvertedLists(ivf.nlist, ivf.code_size)
+    for list_no in range(ivf.nlist):
+        size = mapped.list_size(list_no)
+        if size:
+            lists.add_entries(list_no, size, mapped.get_ids(list_no), mapped.get_codes(list_no))
+    ivf.replace_invlists(lists, True)
+    lists.this.disown()
+    return index
+
+
+class SnapshotSegment:
+    """
+    Read-only, memory-mapped view of the chunk metadata in a snapshot:
+    label-indexed columns plus the sorted id lookup.
+    """
+
+    def __init__(self, path, vocab=None):
+        self.path = path
+        self.vocab = vocab or {}
+
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        self.columns = {name: load(f"{name}.npy") for name in COLUMNS}
+        self.sorted_ids = load("sorted_ids.npy")
+        self.id_labels = load("id_labels.npy")
+
+    def __len__(self):
+        return len(self.columns["live"])
+
+
+# -----------------------------------------------------
+# Locking / layout helpers
+# -----------------------------------------------------
+@contextmanager
+def writer_lock(root):
+    """
+    Non-blocking exclusive lock so only one worker per host writes.
+    Yields False if another process holds it.
+    """
+    os.makedirs(root, exist_ok=True)
+    fd = os.open(os.path.join(root, LOCK_FILE), os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def current_path(root):
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+
+    path = os.path.join(root, name)
+    return path if name and os.path.isdir(path) else None
+
+
+def _prune(root, keep):
+    snapshots = sorted(
+        d for d in os.listdir(root)
+        if d.startswith("snap-") and os.path.isdir(os.path.join(root, d))
+    )
+    for name in snapshots[:-keep]:
+        # Already-mapped files stay valid for readers after unlink
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+# -----------------------------------------------------
+# Write / read
+# -----------------------------------------------------
+class Capture:
+    """
+    What a snapshot needs, copied out of a live index: the serialized
+    index, the label columns and the vocabularies.
+    """
+
+    def __init__(self, index, attrs):
+        self.dimension = index.d
+        self.index = faiss.serialize_index(index)
+        self.columns = attrs.export()
+        self.vocab = {attr: list(attrs.vocab[attr].values) for attr in ATTRIBUTES}
+
+
+def write_snapshot(root, capture, next_label, extra=None):
+    """
+    Write a Capture as a new snapshot and make it current. Touches
+    nothing live, so callers take the Capture under their index lock and
+    call this outside it. `extra` is merged into the manifest. Returns
+    the snapshot path.
+    """
+    columns = capture.columns
+    id_labels = np.flatnonzero(columns["live"]).astype(np.int64)
+    sorted_ids = columns["chunk_ids"][id_labels]
+    order = np.argsort(sorted_ids, kind="stable")
+    sorted_ids, id_labels = sorted_ids[order], id_labels[order]
+
+    name = f"snap-{time.time_ns()}-{os.getpid()}"
+    tmp = os.path.join(root, f".tmp-{name}")
+    os.makedirs(tmp)
+
+    capture.index.tofile(os.path.join(tmp, "index.faiss"))
+    for column, values in columns.items():
+        np.save(os.path.join(tmp, f"{column}.npy"), values)
+    np.save(os.path.join(tmp, "sorted_ids.npy"), sorted_ids)
+    np.save(os.path.join(tmp, "id_labels.npy"), id_labels)
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "count": len(sorted_ids),
+        "dimension": capture.dimension,
+        "next_label": int(next_label),
+        "written_at": datetime.utcnow().isoformat(),
+        "vocab": capture.vocab,
+        **(extra or {}),
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+    final = os.path.join(root, name)
+    os.rename(tmp, final)
+
+    pointer_tmp = os.path.join(root, f".{CURRENT_FILE}.{os.getpid()}")
+    with open(pointer_tmp, "w") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_tmp, os.path.join(root, CURRENT_FILE))
+
+    _prune(root, KEEP_SNAPSHOTS)
+    return final
+
+
+def read_snapshot(root, dimension):
+    """
+    Load the current snapshot. Returns (index, segment, manifest),
+    or None when there is no usable snapshot.
+    """
+    path = current_path(root)
+    if path is None:
+        return None
+
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    if manifest.get("version") != SNAPSHOT_VERSION or manifest.get("dimension") != dimension:
+        return None
+    if not manifest.get("count"):
+        return None
+
+    index_path = os.path.join(path, "index.faiss")
+    mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    try:
+        index = faiss.read_index(index_path, mmap_flag | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        # Index type without mmap support in this FAISS build
+        index = faiss.read_index(index_path)
+
+    return index, SnapshotSegment(path, manifest.get("vocab")), manifest
@@ -3,9 +3,12 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 
 from app.models.document import Document, ModalityType
-from app.models.chunk import Chunk
-from app.services.embedding_service import EmbeddingService
+from app.services.ingestion.chunk_writer import write_chunks
+from app.services.ingestion.dedup import create_chunks
 from app.services.llm.gemini_audio import GeminiAudioTranscriber
+from app.utils.chunking import chunk_text
+from app.utils.executors import run_cpu, run_io
+from app.utils.uploads import spool_upload
 
 
 class AudioProcessor:
@@ -16,21 +19,26 @@ class AudioProcessor:
         """
 
         # ----------------------
-        # 1️⃣ Read file bytes
+        # 1️⃣ Stream upload to disk
         # ----------------------
-        audio_bytes = await file.read()
         audio_path = f"uploads/{uuid.uuid4()}_{file.filename}"
+        await spool_upload(file, audio_path)
 
-        # Save raw file
-        with open(audio_path, "wb") as f:
-            f.write(audio_bytes)
+        return await self.process_path(audio_path, file.filename, user_id, db)
+
+    async def process_path(self, audio_path: str, filename: str, user_id: str, db: Session, progress=None):
+        """
+        Transcribe + embed audio already saved at `audio_path`.
+        `progress` is an optional async callback for job status.
+        """
 
         # ----------------------
         # 2️⃣ Transcribe audio
         # ----------------------
-        transcript = GeminiAudioTranscriber.transcribe(
-            audio_bytes=audio_bytes, 
-            filename=file.filename
+        transcript = await run_io(
+            GeminiAudioTranscriber.transcribe,
+            audio_path=audio_path,
+            filename=filename
         )
 
         if not transcript.strip():
@@ -40,30 +48,32 @@ class AudioProcessor:
         # 3️⃣ Create Document entry
         # ----------------------
         doc = Document(
-            title=file.filename,
+            title=filename,
             modality=ModalityType.AUDIO,
             file_path=audio_path,
             doc_metadata=f"uploaded_by:{user_id}",
+            owner_id=user_id,
+            source=filename,
             created_at=datetime.utcnow()
         )
-        db.add(doc)
-        db.flush()
+        await run_io(self._flush, db, doc)
 
         # ----------------------
-        # 4️⃣ Create Chunk with embedding
+        # 4️⃣ Create Chunks with embeddings
         # ----------------------
-        embedding = EmbeddingService.get_embedding(transcript)
+        pieces = await run_cpu(chunk_text, transcript)
+        chunks = await create_chunks(db, doc, pieces, progress)
 
-        chunk = Chunk(
-            document_id=doc.id,
-            chunk_index=0,
-            content=transcript,
-            tokens=len(transcript.split()),
-            embedding=embedding,
-            created_at=datetime.utcnow()
-        )
+        await run_io(self._commit, db, chunks)
 
-        db.add(chunk)
-        db.commit()
+        return doc, chunks
 
-        return doc, [chunk]
+    @staticmethod
+    def _flush(db: Session, obj):
+        db.add(obj)
+        db.flush()
+
+    @staticmethod
+    def _commit(db: Session, chunks):
+        write_chunks(db, chunks)
+        db.commit()
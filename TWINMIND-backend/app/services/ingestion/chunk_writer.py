@@ -0,0 +1,173 @@
+# app/services/ingestion/chunk_writer.py
+"""
+Bulk persistence of chunk rows.
+
+Processors build Chunk objects but don't add them to the session; they
+are written here in batches of CHUNK_WRITE_BATCH rows, bypassing the
+ORM unit of work and identity map.
+
+Methods (CHUNK_WRITE_METHOD):
+- copy:        COPY chunks FROM STDIN in binary format; vectors go over
+               the wire as pgvector's binary float4s, not as text
+- executemany: Core insert() with a list of row dicts (multi-row
+               VALUES via insertmanyvalues)
+- orm:         add_all() + flush, the old path (for comparison)
+
+All of them run in the session's transaction; the caller commits. Rows
+written by copy / executemany are handed to the FAISS sync hooks
+through track_bulk_insert(). The SimHash bands of canonical chunks are
+written alongside (dedup.write_bands).
+"""
+import io
+import struct
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.chunk import Chunk
+from app.services.faiss_service import track_bulk_insert
+from app.services.ingestion.dedup import write_bands
+
+settings = get_settings()
+
+COLUMNS = (
+    "id", "document_id", "chunk_index", "content", "tokens", "embedding",
+    "created_at", "owner_id", "modality", "source", "content_hash",
+    "simhash", "canonical_chunk_id",
+)
+
+COPY_SQL = f"COPY chunks ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT binary)"
+
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_COPY_TRAILER = struct.pack(">h", -1)
+_NULL = struct.pack(">i", -1)
+_PG_EPOCH = datetime(2000, 1, 1)
+
+
+# -----------------------------------------------------
+# Binary COPY encoding
+# -----------------------------------------------------
+def _field(data: bytes) -> bytes:
+    return struct.pack(">i", len(data)) + data
+
+
+def _uuid(value):
+    if value is None:
+        return _NULL
+    if not isinstance(value, uuid.UUID):
+        value = uuid.UUID(str(value))
+    return _field(value.bytes)
+
+
+def _int4(value):
+    return _NULL if value is None else _field(struct.pack(">i", value))
+
+
+def _int8(value):
+    return _NULL if value is None else _field(struct.pack(">q", value))
+
+
+def _text(value):
+    return _NULL if value is None else _field(str(value).encode("utf-8"))
+
+
+def _timestamp(value):
+    if value is None:
+        return _NULL
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return _field(struct.pack(">q", (value - _PG_EPOCH) // timedelta(microseconds=1)))
+
+
+def _vector(value):
+    """pgvector binary format: int16 dim, int16 unused, dim x float4."""
+    if value is None:
+        return _NULL
+    v = np.asarray(value, dtype=">f4")
+    return _field(struct.pack(">hh", len(v), 0) + v.tobytes())
+
+
+def encode_copy(chunks) -> bytes:
+    buf = io.BytesIO()
+    buf.write(_COPY_HEADER)
+    field_count = struct.pack(">h", len(COLUMNS))
+    for c in chunks:
+        buf.write(field_count)
+        buf.write(_uuid(c.id))
+        buf.write(_uuid(c.document_id))
+        buf.write(_int4(c.chunk_index))
+        buf.write(_text(c.content))
+        buf.write(_int4(c.tokens))
+        buf.write(_vector(c.embedding))
+        buf.write(_timestamp(c.created_at))
+        buf.write(_text(c.owner_id))
+        buf.write(_text(c.modality))
+        buf.write(_text(c.source))
+        buf.write(_text(c.content_hash))
+        buf.write(_int8(c.simhash))
+        buf.write(_uuid(c.canonical_chunk_id))
+    buf.write(_COPY_TRAILER)
+    return buf.getvalue()
+
+
+# -----------------------------------------------------
+# Writers
+# -----------------------------------------------------
+def _prepare(chunks):
+    # Column defaults only run for ORM / Core inserts
+    now = datetime.utcnow()
+    for c in chunks:
+        if c.id is None:
+            c.id = uuid.uuid4()
+        if c.created_at is None:
+            c.created_at = now
+
+
+def _write_copy(db: Session, batch):
+    raw = db.connection().connection.dbapi_connection
+    with raw.cursor() as cursor:
+        cursor.copy_expert(COPY_SQL, io.BytesIO(encode_copy(batch)))
+
+
+def _write_executemany(db: Session, batch):
+    rows = [{name: getattr(c, name) for name in COLUMNS} for c in batch]
+    db.execute(insert(Chunk.__table__), rows)
+
+
+def write_chunks(db: Session, chunks, method: str = None) -> int:
+    """
+    Insert `chunks` (transient Chunk objects) in bulk. Blocking — call
+    through run_io(). Does not commit.
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return 0
+
+    method = method or settings.CHUNK_WRITE_METHOD
+    if method == "orm":
+        db.add_all(chunks)
+        db.flush()
+        write_bands(db, chunks)
+        return len(chunks)
+
+    if method == "copy":
+        write = _write_copy
+    elif method == "executemany":
+        write = _write_executemany
+    else:
+        raise ValueError(f"Unknown chunk write method: {method}")
+
+    # The document row must exist before the chunks reference it
+    db.flush()
+    _prepare(chunks)
+    batch_size = max(1, settings.CHUNK_WRITE_BATCH)
+    for i in range(0, len(chunks), batch_size):
+        write(db, chunks[i:i + batch_size])
+
+    write_bands(db, chunks)
+    track_bulk_insert(db, chunks)
+    return len(chunks)
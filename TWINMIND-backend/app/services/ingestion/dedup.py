@@ -0,0 +1,369 @@
+# app/services/ingestion/dedup.py
+"""
+Ingest-time deduplication of chunks.
+
+Every new chunk is fingerprinted and checked against the owner's
+existing canonical chunks and the earlier chunks of the same upload:
+- exact: sha256 of the normalized text (lowercased, whitespace collapsed)
+- near:  64-bit SimHash over word shingles, at most
+         DEDUP_SIMHASH_DISTANCE bits apart
+
+A duplicate is still stored, so its document keeps every chunk, but
+without an embedding and with canonical_chunk_id pointing at the chunk
+it repeats. It is never embedded and never enters the vector index.
+Exact duplicates are also left out of full-text results; near duplicates
+stay there, since their text may differ in the very token searched for
+(see lexical_search).
+
+Near matches are looked up through chunk_simhash_bands (ChunkBand): the
+bands of each canonical chunk are stored at write time, and an upload
+only reads the chunks sharing a band with its own.
+
+When a canonical chunk is deleted through the ORM, its oldest surviving
+duplicate takes over (promote_duplicates), so the text stays
+searchable. An identical one reuses the old embedding in the same
+flush; a near one is embedded after the commit on a background thread
+(embed_promoted), as the flush hook must not run the model. Bulk SQL
+deletes bypass this.
+"""
+import hashlib
+import logging
+import re
+import threading
+import uuid
+
+import numpy as np
+from sqlalchemy import event, insert, tuple_
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database.connection import SessionLocal
+from app.models.chunk import Chunk, ChunkBand
+from app.services.embedding_service import EmbeddingService
+from app.services.faiss_service import track_bulk_insert
+from app.utils.executors import run_io
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# session.info key: promoted chunk ids to embed once the flush commits
+_PENDING_EMBED = "dedup_pending_embed"
+
+_WORD = re.compile(r"\w+")
+SHINGLE_WORDS = 3
+# With fewer shingles SimHash is too noisy; such chunks only match exactly
+MIN_SHINGLES = 8
+MASK64 = (1 << 64) - 1
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+
+def simhash(text: str):
+    """
+    64-bit SimHash of the text's word shingles, as a signed int64 (fits
+    a BigInteger column), or None for very short text.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = {
+        " ".join(words[i:i + SHINGLE_WORDS])
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+    if len(shingles) < MIN_SHINGLES:
+        return None
+
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int(np.packbits(majority).view(">i8")[0])
+
+
+def band_width(distance: int) -> int:
+    return 64 // (distance + 1)
+
+
+def simhash_bands(value, distance: int):
+    """
+    [(band, key)] of a SimHash split into distance + 1 bands; two hashes
+    at most `distance` bits apart agree on at least one band. distance
+    must be > 0 (keys then fit in 32 bits).
+    """
+    width = band_width(distance)
+    value &= MASK64
+    band_mask = (1 << width) - 1
+    return [(band, (value >> (band * width)) & band_mask) for band in range(distance + 1)]
+
+
+class SimHashIndex:
+    """
+    Near-duplicate lookup: only hashes sharing a band are compared.
+    """
+
+    def __init__(self, distance: int):
+        self.distance = distance
+        self._buckets = {}
+
+    def _keys(self, value):
+        return simhash_bands(value, self.distance)
+
+    def add(self, value, chunk_id):
+        for key in self._keys(value):
+            self._buckets.setdefault(key, []).append((value, chunk_id))
+
+    def find(self, value):
+        for key in self._keys(value):
+            for other, chunk_id in self._buckets.get(key, ()):
+                if bin((value ^ other) & MASK64).count("1") <= self.distance:
+                    return chunk_id
+        return None
+
+
+class PlannedChunk:
+    __slots__ = ("id", "content", "content_hash", "simhash", "canonical_id")
+
+    def __init__(self, content):
+        self.id = uuid.uuid4()
+        self.content = content
+        self.content_hash = content_hash(content)
+        self.simhash = simhash(content)
+        self.canonical_id = None
+
+
+def plan_chunks(db: Session, owner_id, pieces):
+    """
+    Fingerprint `pieces` and point duplicates at their canonical chunk.
+    Blocking — call through run_io().
+    """
+    planned = [PlannedChunk(piece) for piece in pieces]
+    if not settings.DEDUP_ENABLED or not planned:
+        return planned
+
+    # Canonical chunks of the same owner: not duplicates themselves and
+    # still embedded
+    owner = Chunk.owner_id == owner_id if owner_id is not None else Chunk.owner_id.is_(None)
+    canonical = (owner, Chunk.canonical_chunk_id.is_(None), Chunk.embedding.isnot(None))
+
+    hashes = {p.content_hash for p in planned}
+    exact = dict(
+        db.query(Chunk.content_hash, Chunk.id)
+        .filter(*canonical, Chunk.content_hash.in_(hashes))
+        .all()
+    )
+
+    near = None
+    distance = settings.DEDUP_SIMHASH_DISTANCE
+    if distance > 0:
+        near = SimHashIndex(distance)
+        keys = {
+            key
+            for p in planned if p.simhash is not None
+            for key in simhash_bands(p.simhash, distance)
+        }
+        if keys:
+            band_owner = (
+                ChunkBand.owner_id == owner_id if owner_id is not None else ChunkBand.owner_id.is_(None)
+            )
+            rows = (
+                db.query(Chunk.simhash, Chunk.id)
+                .join(ChunkBand, ChunkBand.chunk_id == Chunk.id)
+                .filter(
+                    band_owner,
+                    ChunkBand.width == band_width(distance),
+                    tuple_(ChunkBand.band, ChunkBand.key).in_(keys),
+                    *canonical,
+                )
+                .distinct()
+            )
+            for value, chunk_id in rows:
+                near.add(value, chunk_id)
+
+    for p in planned:
+        p.canonical_id = exact.get(p.content_hash)
+        if p.canonical_id is None and near is not None and p.simhash is not None:
+            p.canonical_id = near.find(p.simhash)
+        if p.canonical_id is not None:
+            continue
+
+        # Canonical itself: later chunks of this upload may repeat it
+        exact[p.content_hash] = p.id
+        if near is not None and p.simhash is not None:
+            near.add(p.simhash, p.id)
+
+    return planned
+
+
+def write_bands(db: Session, chunks) -> int:
+    """
+    Band rows for the canonical chunks among `chunks` (already written).
+    Blocking; does not commit.
+    """
+    distance = settings.DEDUP_SIMHASH_DISTANCE
+    if distance <= 0:
+        return 0
+
+    width = band_width(distance)
+    rows = [
+        {"chunk_id": c.id, "width": width, "band": band, "key": key, "owner_id": c.owner_id}
+        for c in chunks
+        if c.simhash is not None and c.canonical_chunk_id is None and c.embedding is not None
+        for band, key in simhash_bands(c.simhash, distance)
+    ]
+    if rows:
+        db.execute(insert(ChunkBand.__table__), rows)
+    return len(rows)
+
+
+def promote_duplicates(db: Session, deleted):
+    """
+    For each deleted canonical chunk, make its oldest surviving duplicate
+    canonical and point the other duplicates at it. The promoted chunk
+    reuses the old embedding when its text is identical; otherwise it is
+    left without one and returned in `to_embed`, for embed_promoted()
+    after the commit. Blocking; runs no model; does not flush.
+    Returns (promoted, to_embed).
+    """
+    deleted_ids = [c.id for c in deleted]
+    canonicals = {
+        c.id: c for c in deleted
+        if c.canonical_chunk_id is None and c.embedding is not None
+    }
+    if not canonicals:
+        return [], []
+
+    duplicates = (
+        db.query(Chunk)
+        .filter(Chunk.canonical_chunk_id.in_(list(canonicals)), Chunk.id.notin_(deleted_ids))
+        .order_by(Chunk.created_at, Chunk.chunk_index)
+        .all()
+    )
+
+    promoted = {}   # old canonical id -> new canonical
+    for dup in duplicates:
+        old_id = dup.canonical_chunk_id
+        if old_id in promoted:
+            dup.canonical_chunk_id = promoted[old_id].id
+        else:
+            promoted[old_id] = dup
+            dup.canonical_chunk_id = None
+    if not promoted:
+        return [], []
+
+    embedded, to_embed = [], []
+    for old_id, chunk in promoted.items():
+        source = canonicals[old_id]
+        if chunk.content_hash == source.content_hash:
+            chunk.embedding = source.embedding
+            embedded.append(chunk)
+        else:
+            to_embed.append(chunk)
+
+    write_bands(db, embedded)
+    track_bulk_insert(db, embedded)
+    return list(promoted.values()), to_embed
+
+
+def embed_promoted(chunk_ids):
+    """
+    Embed promoted chunks that are still canonical and unembedded, then
+    write their bands and queue them for the vector index. Blocking;
+    uses its own session.
+    """
+    db = SessionLocal()
+    try:
+        chunks = (
+            db.query(Chunk)
+            .filter(
+                Chunk.id.in_(list(chunk_ids)),
+                Chunk.canonical_chunk_id.is_(None),
+                Chunk.embedding.is_(None),
+            )
+            .all()
+        )
+        if not chunks:
+            return 0
+
+        embeddings = EmbeddingService.embed_batch([c.content for c in chunks])
+        for chunk, embedding in zip(chunks, embeddings):
+            chunk.embedding = embedding
+        db.flush()
+        write_bands(db, chunks)
+        track_bulk_insert(db, chunks)
+        db.commit()
+        return len(chunks)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[DEDUP] Embedding {len(chunk_ids)} promoted chunks failed: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _promote_on_delete(session, flush_context, instances):
+    deleted = [obj for obj in session.deleted if isinstance(obj, Chunk)]
+    if not deleted:
+        return
+    with session.no_autoflush:
+        _, to_embed = promote_duplicates(session, deleted)
+    if to_embed:
+        session.info.setdefault(_PENDING_EMBED, []).extend(c.id for c in to_embed)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _embed_after_commit(session):
+    chunk_ids = session.info.pop(_PENDING_EMBED, None)
+    if chunk_ids:
+        threading.Thread(
+            target=embed_promoted, args=(chunk_ids,), name="dedup-embed", daemon=True
+        ).start()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_pending_embed(session):
+    session.info.pop(_PENDING_EMBED, None)
+
+
+async def create_chunks(db: Session, doc, pieces, progress=None, batch_size=None):
+    """
+    Chunk rows for `pieces`, in order. Only canonical chunks are
+    embedded; with a progress callback, in slices of `batch_size` so
+    job status can move.
+    """
+    planned = await run_io(plan_chunks, db, doc.owner_id, pieces)
+    unique = [p for p in planned if p.canonical_id is None]
+
+    texts = [p.content for p in unique]
+    step = batch_size if progress and batch_size else max(len(texts), 1)
+    embeddings = []
+    for i in range(0, len(texts), step):
+        embeddings.extend(await EmbeddingService.embed_batch_async(texts[i:i + step]))
+        if progress:
+            await progress(chunks_embedded=len(embeddings))
+    if progress and len(unique) < len(planned):
+        await progress(chunks_deduplicated=len(planned) - len(unique))
+
+    vectors = {p.id: embedding for p, embedding in zip(unique, embeddings)}
+    attributes = doc.chunk_attributes()
+
+    # Canonicals precede their in-upload duplicates, so the
+    # self-referencing FK is satisfied in insert order
+    return [
+        Chunk(
+            id=p.id,
+            document_id=doc.id,
+            **attributes,
+            chunk_index=idx,
+            content=p.content,
+            tokens=len(p.content.split()),
+            embedding=vectors.get(p.id),
+            content_hash=p.content_hash,
+            simhash=p.simhash,
+            canonical_chunk_id=p.canonical_id,
+        )
+        for idx, p in enumerate(planned)
+    ]
@@ -2,92 +2,114 @@ from fastapi import UploadFile
 import logging
 import os
 from sqlalchemy.orm import Session
-import uuid
-import pypdf
 from datetime import datetime
 
 from app.models.document import Document, ModalityType
-from app.models.chunk import Chunk
-from app.services.embedding_service import EmbeddingService
+from app.services.ingestion.chunk_writer import write_chunks
+from app.services.ingestion.dedup import create_chunks
+from app.services.ingestion.pdf_extractor import extract_pdf_pages
+from app.utils.chunking import get_chunker, strategy_for
+from app.utils.executors import run_io, stream_io
+from app.utils.uploads import discard, iter_text_blocks, spool_upload
 
 logger = logging.getLogger(__name__)
 
+
 class DocumentProcessor:
-    def __init__(self):
-        self.chunk_size = 1000
-        self.chunk_overlap = 200
-    
+    PROGRESS_BATCH = 256
+
     async def process(self, file: UploadFile, user_id: str, db: Session):
         """
         Process uploaded file and save to database
         """
+        # Spool to disk instead of reading the whole file into memory
+        path, size = await spool_upload(file)
+        logger.info(f"Spooled {file.filename} ({size} bytes)")
+
         try:
-            logger.info(f"Processing file: {file.filename}")
-            
-            # Read file content
-            content = await file.read()
-            
-            # Extract text based on file type
-            text = await self._extract_text(file.filename, content)
+            return await self.process_path(path, file.filename, user_id, db)
+        finally:
+            await discard(path)
+
+    async def process_path(self, path: str, filename: str, user_id: str, db: Session, progress=None):
+        """
+        Process a spooled upload. `progress` is an optional async
+        callback for job status (pages_extracted, chunks_embedded).
+        """
+        try:
+            logger.info(f"Processing file: {filename}")
+
+            # Extract + chunk text based on file type; PDF pages are
+            # parsed in parallel and chunked as they arrive
+            if os.path.splitext(filename)[1].lower() == '.pdf':
+                pieces = await self._pdf_pieces(path, progress)
+            else:
+                pieces = await self._text_pieces(path, strategy_for(filename))
             
-            if not text or len(text.strip()) == 0:
+            if not pieces:
                 raise ValueError("No text extracted from file")
             
             # Create document
             doc = Document(
-                title=file.filename,
-                modality=self._get_modality(file.filename),
+                title=filename,
+                modality=self._get_modality(filename),
                 file_path="path/to/file",
                 doc_metadata=f"uploaded_by:{user_id}",
+                owner_id=user_id,
+                source=filename,
                 created_at=datetime.utcnow()
             )
-            db.add(doc)
-            db.commit()
-            db.refresh(doc)
+            await run_io(self._save_document, db, doc)
 
             # Create chunks
-            chunks = self._create_chunks(text, doc.id, self.chunk_size)
-            db.add_all(chunks)
-            db.commit()
+            chunks = await create_chunks(db, doc, pieces, progress, self.PROGRESS_BATCH)
+            await run_io(self._save_chunks, db, chunks)
             
             logger.info(f"Document processed: {doc.id} with {len(chunks)} chunks")
             
             return doc, chunks
 
         except Exception as e:
-            db.rollback()
+            await run_io(db.rollback)
             logger.error(f"Error processing file: {str(e)}", exc_info=True)
             raise
+
+    def _save_document(self, db: Session, doc: Document):
+        db.add(doc)
+        db.commit()
+        db.refresh(doc)
+
+    def _save_chunks(self, db: Session, chunks: list):
+        write_chunks(db, chunks)
+        db.commit()
     
-    async def _extract_text(self, filename: str, content: bytes) -> str:
-        ext = os.path.splitext(filename)[1].lower()
-        
+    async def _text_pieces(self, path: str, strategy: str = None) -> list:
+        chunker = get_chunker(strategy)
+        pieces = []
         try:
-            if ext == '.pdf':
-                return self._extract_pdf_text(content)
-            elif ext in ['.txt', '.md']:
-                return content.decode('utf-8', errors='ignore')
-            else:
-                return content.decode('utf-8', errors='ignore')
+            async for block in stream_io(iter_text_blocks, path):
+                pieces.extend(await run_io(chunker.feed, block))
         except Exception as e:
             logger.error(f"Error extracting text: {e}")
-            return ""
-    
-    def _extract_pdf_text(self, content: bytes) -> str:
+            return []
+        pieces.extend(await run_io(chunker.finish))
+        return pieces
+
+    async def _pdf_pieces(self, path: str, progress=None) -> list:
+        chunker = get_chunker()
+        pieces = []
+        pages = 0
         try:
-            import io
-            pdf_file = io.BytesIO(content)
-            pdf_reader = pypdf.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text() or ""
-                text += page_text + "\n"
-            
-            return text
+            async for page_text in extract_pdf_pages(path):
+                pieces.extend(await run_io(chunker.feed, page_text + "\n\n"))
+                pages += 1
+                if progress:
+                    await progress(pages_extracted=pages)
         except Exception as e:
             logger.error(f"PDF extraction error: {e}")
-            return ""
+            return []
+        pieces.extend(await run_io(chunker.finish))
+        return pieces
     
     def _get_modality(self, filename: str) -> ModalityType:
         ext = os.path.splitext(filename)[1].lower()
@@ -102,25 +124,3 @@ class DocumentProcessor:
             return ModalityType.VIDEO
         else:
             return ModalityType.TEXT
-    
-    def _create_chunks(self, text: str, document_id: str, chunk_size: int = 1000) -> list:
-        chunks = []
-        overlap = 200
-        text = text.replace('\x00', '').replace('\r', '\n')
-
-        for i in range(0, len(text), chunk_size - overlap):
-            chunk_text = text[i:i + chunk_size].strip()
-            if chunk_text and len(chunk_text) > 10:
-
-                embedding = EmbeddingService.get_embedding(chunk_text)
-
-                chunk = Chunk(
-                    document_id=document_id,
-                    chunk_index=len(chunks),
-                    content=chunk_text,
-                    tokens=len(chunk_text.split()),
-                    embedding=embedding
-                )
-                chunks.append(chunk)
-
-        return chunks
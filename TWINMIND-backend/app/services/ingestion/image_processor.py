@@ -6,9 +6,12 @@ from fastapi import UploadFile
 from sqlalchemy.orm import Session
 
 from app.models.document import Document, ModalityType
-from app.models.chunk import Chunk
-from app.services.embedding_service import EmbeddingService
+from app.services.ingestion.chunk_writer import write_chunks
+from app.services.ingestion.dedup import create_chunks
 from app.services.llm.gemini_vision import GeminiVisionOCR
+from app.utils.chunking import chunk_text
+from app.utils.executors import run_cpu, run_io
+from app.utils.uploads import spool_upload
 
 logger = logging.getLogger(__name__)
 
@@ -18,61 +21,50 @@ os.makedirs("uploads", exist_ok=True)
 
 class ImageProcessor:
     async def process(self, file: UploadFile, user_id: str, db: Session):
-        try:
-            # -------------------
-            # 1️⃣ Save raw image
-            # -------------------
-            image_path = f"uploads/{uuid.uuid4()}_{file.filename}"
-            raw = await file.read()
-            with open(image_path, "wb") as f:
-                f.write(raw)
+        # -------------------
+        # 1️⃣ Save raw image
+        # -------------------
+        image_path = f"uploads/{uuid.uuid4()}_{file.filename}"
+        await spool_upload(file, image_path)
 
+        return await self.process_path(image_path, file.filename, user_id, db)
+
+    async def process_path(self, image_path: str, filename: str, user_id: str, db: Session, progress=None):
+        """
+        OCR + chunk an image already saved at `image_path`.
+        `progress` is an optional async callback for job status.
+        """
+        try:
             # -------------------
             # 2️⃣ Gemini Vision OCR
             # -------------------
-            ocr_text = GeminiVisionOCR.extract_text(image_path)
+            ocr_text = await run_io(GeminiVisionOCR.extract_text, image_path)
             logger.info(f"[IMG] Gemini OCR extracted {len(ocr_text)} chars")
 
             # -------------------
             # 3️⃣ Create Document
             # -------------------
             doc = Document(
-                title=file.filename,
+                title=filename,
                 modality=ModalityType.IMAGE,
                 file_path=image_path,
                 doc_metadata=f"uploaded_by:{user_id}",
+                owner_id=user_id,
+                source=filename,
                 created_at=datetime.utcnow()
             )
-            db.add(doc)
-            db.commit()
-            db.refresh(doc)
+            await run_io(self._save, db, [doc])
 
             # -------------------
             # 4️⃣ Chunk OCR text
             # -------------------
             chunks = []
-            if ocr_text.strip():
-                chunk_size = 1000
-                overlap = 200
-                clean = ocr_text.replace("\x00", "").replace("\r", "\n")
-
-                for i in range(0, len(clean), chunk_size - overlap):
-                    chunk_text = clean[i:i + chunk_size].strip()
-                    if len(chunk_text) > 10:
-                        embedding = EmbeddingService.get_embedding(chunk_text)
-
-                        chunk = Chunk(
-                            document_id=doc.id,
-                            chunk_index=len(chunks),
-                            content=chunk_text,
-                            tokens=len(chunk_text.split()),
-                            embedding=embedding,
-                        )
-                        chunks.append(chunk)
+            pieces = await run_cpu(chunk_text, ocr_text)
+            if pieces:
+                chunks = await create_chunks(db, doc, pieces, progress)
 
             if chunks:
-                db.add_all(chunks)
-                db.commit()
+                await run_io(self._save_chunks, db, chunks)
                 logger.info(f"[IMG] Saved {len(chunks)} OCR chunks")
 
             else:
@@ -81,6 +73,16 @@ class ImageProcessor:
             return doc, chunks
 
         except Exception as e:
-            db.rollback()
+            await run_io(db.rollback)
             logger.error("[IMG] Error during image processing", exc_info=True)
             raise
+
+    @staticmethod
+    def _save(db: Session, objects: list):
+        db.add_all(objects)
+        db.commit()
+
+    @staticmethod
+    def _save_chunks(db: Session, chunks: list):
+        write_chunks(db, chunks)
+        db.commit()
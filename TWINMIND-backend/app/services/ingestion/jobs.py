@@ -0,0 +1,286 @@
+# app/services/ingestion/jobs.py
+"""
+Background ingestion jobs (INGEST_MODE=queue).
+
+Upload endpoints spool the file, enqueue a job and return its id right
+away. The pipeline (extraction, OCR / transcription, chunking,
+embedding, DB writes) then runs in a worker, and
+GET /api/ingest/jobs/{id} reports status and progress counters.
+
+Backends (INGEST_QUEUE_BACKEND):
+- local: in-memory store + asyncio.Queue, consumed by INGEST_WORKERS
+         tasks inside the API process. No Redis needed.
+- redis: job records and the queue live in REDIS_URL, consumed by
+         `python -m app.workers.ingest_worker` processes on the same
+         host (spooled files are passed by path).
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from app.config import get_settings
+from app.database.connection import SessionLocal
+from app.services.ingestion.audio_processor import AudioProcessor
+from app.services.ingestion.document_processor import DocumentProcessor
+from app.services.ingestion.image_processor import ImageProcessor
+from app.services.ingestion.text_processor import TextProcessor
+from app.services.ingestion.web_processor import WebProcessor
+from app.utils.executors import run_io
+from app.utils.uploads import discard
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Published by Redis workers after a commit, so API processes can pull
+# the new chunks into their in-process FAISS index
+DOCUMENT_CHANNEL = "twinmind:ingest:documents"
+
+
+# -----------------------------------------------------
+# Stores
+# -----------------------------------------------------
+class LocalJobStore:
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._queue = None
+
+    @property
+    def queue(self):
+        # Created lazily so it binds to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job["status"] in (SUCCEEDED, FAILED) and job["updated_at"] < cutoff:
+                del self._jobs[job_id]
+
+    async def save(self, job):
+        self._jobs[job["id"]] = job
+
+    async def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def push(self, job_id):
+        self._prune()
+        self.queue.put_nowait(job_id)
+
+    async def pop(self):
+        return await self.queue.get()
+
+    async def publish_document(self, document_id):
+        # Same process: the session hooks already updated the index
+        pass
+
+
+class RedisJobStore:
+    QUEUE_KEY = "twinmind:ingest:queue"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis.asyncio as redis
+
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis.from_url(url, decode_responses=True)
+
+    @staticmethod
+    def _key(job_id):
+        return f"twinmind:ingest:job:{job_id}"
+
+    async def save(self, job):
+        await self.redis.set(self._key(job["id"]), json.dumps(job), ex=self.ttl_seconds)
+
+    async def get(self, job_id):
+        raw = await self.redis.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def push(self, job_id):
+        await self.redis.rpush(self.QUEUE_KEY, job_id)
+
+    async def pop(self):
+        _, job_id = await self.redis.blpop(self.QUEUE_KEY)
+        return job_id
+
+    async def publish_document(self, document_id):
+        await self.redis.publish(DOCUMENT_CHANNEL, document_id)
+
+
+_store = None
+
+
+def get_job_store():
+    global _store
+    if _store is None:
+        if settings.INGEST_QUEUE_BACKEND == "redis":
+            if not settings.REDIS_URL:
+                raise RuntimeError("INGEST_QUEUE_BACKEND=redis requires REDIS_URL")
+            _store = RedisJobStore(settings.REDIS_URL, settings.INGEST_JOB_TTL)
+        else:
+            _store = LocalJobStore(settings.INGEST_JOB_TTL)
+    return _store
+
+
+# -----------------------------------------------------
+# Handlers: kind -> async fn(payload, db, progress) -> (doc, chunks)
+# -----------------------------------------------------
+async def _ingest_document(payload, db, progress):
+    try:
+        return await DocumentProcessor().process_path(
+            payload["path"], payload["filename"], payload["user_id"], db, progress
+        )
+    finally:
+        await discard(payload["path"])
+
+
+async def _ingest_image(payload, db, progress):
+    return await ImageProcessor().process_path(
+        payload["path"], payload["filename"], payload["user_id"], db, progress
+    )
+
+
+async def _ingest_audio(payload, db, progress):
+    return await AudioProcessor().process_path(
+        payload["path"], payload["filename"], payload["user_id"], db, progress
+    )
+
+
+async def _ingest_web(payload, db, progress):
+    return await WebProcessor().process(payload["url"], payload["user_id"], db, progress)
+
+
+async def _ingest_text(payload, db, progress):
+    return await TextProcessor().process(
+        payload["text"], payload["title"], payload["user_id"], db, progress
+    )
+
+
+HANDLERS = {
+    "document": _ingest_document,
+    "image": _ingest_image,
+    "audio": _ingest_audio,
+    "web": _ingest_web,
+    "text": _ingest_text,
+}
+
+
+# -----------------------------------------------------
+# Enqueue / status / run
+# -----------------------------------------------------
+async def enqueue(kind: str, payload: dict) -> dict:
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown ingestion job kind: {kind}")
+
+    now = time.time()
+    job = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": QUEUED,
+        "payload": payload,
+        "progress": {},
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    store = get_job_store()
+    await store.save(job)
+    await store.push(job["id"])
+    return job
+
+
+async def get_job(job_id: str):
+    job = await get_job_store().get(job_id)
+    if job is not None:
+        job.pop("payload", None)
+    return job
+
+
+async def _update(store, job, **fields):
+    job.update(fields, updated_at=time.time())
+    await store.save(job)
+
+
+async def run_job(job_id: str):
+    store = get_job_store()
+    job = await store.get(job_id)
+    if job is None:
+        logger.warning(f"[JOBS] Job {job_id} expired before it ran")
+        return
+
+    await _update(store, job, status=RUNNING, started_at=time.time())
+
+    async def progress(**counters):
+        job["progress"].update(counters)
+        await _update(store, job)
+
+    db = SessionLocal()
+    try:
+        doc, chunks = await HANDLERS[job["kind"]](job["payload"], db, progress)
+        await _update(
+            store, job,
+            status=SUCCEEDED,
+            result={"document_id": str(doc.id), "title": doc.title, "chunks_created": len(chunks)},
+        )
+        await store.publish_document(str(doc.id))
+        logger.info(f"[JOBS] {job['kind']} job {job_id} done ({len(chunks)} chunks)")
+    except Exception as e:
+        logger.error(f"[JOBS] {job['kind']} job {job_id} failed: {e}", exc_info=True)
+        await _update(store, job, status=FAILED, error=str(e))
+    finally:
+        await run_io(db.close)
+
+
+async def worker_loop(name: str = "ingest-worker"):
+    store = get_job_store()
+    logger.info(f"[JOBS] {name} waiting for jobs")
+    while True:
+        job_id = await store.pop()
+        try:
+            await run_job(job_id)
+        except Exception as e:
+            logger.error(f"[JOBS] {name} crashed on job {job_id}: {e}", exc_info=True)
+
+
+def start_workers():
+    """
+    Background tasks for this API process; cancel them on shutdown.
+    local: job consumers. redis: the document follower (consumers run
+    in app.workers.ingest_worker).
+    """
+    if settings.INGEST_QUEUE_BACKEND == "redis":
+        return [asyncio.create_task(follow_documents())]
+    return [
+        asyncio.create_task(worker_loop(f"ingest-worker-{i}"))
+        for i in range(settings.INGEST_WORKERS)
+    ]
+
+
+async def follow_documents():
+    """
+    Redis backend: pull chunks committed by worker processes into this
+    process's FAISS index(es).
+    """
+    from app.services.faiss_service import sync_document
+
+    pubsub = get_job_store().redis.pubsub()
+    await pubsub.subscribe(DOCUMENT_CHANNEL)
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            try:
+                await run_io(sync_document, message["data"])
+            except Exception as e:
+                logger.error(f"[JOBS] Index sync for document {message['data']} failed: {e}")
+    finally:
+        await pubsub.unsubscribe(DOCUMENT_CHANNEL)
@@ -0,0 +1,134 @@
+# app/services/ingestion/pdf_extractor.py
+"""
+Parallel PDF text extraction.
+
+The PDF is split into page ranges (PDF_PAGES_PER_TASK) that run on the
+CPU process pool. Workers read the file from disk, so the bytes are not
+pickled once per task. Results are yielded in page order as soon as
+each range finishes, so the caller can chunk early pages while later
+ones are still being parsed.
+
+Ranges are submitted through a sliding window of one per CPU worker: the
+next range goes out when the oldest one is consumed. A range therefore
+doesn't sit queued behind the rest of its own PDF with its backstop
+timeout running, and a stopped upload leaves at most a window of jobs
+behind (a process-pool job can't be cancelled once it has started).
+
+Each page gets PDF_PAGE_TIMEOUT seconds (SIGALRM in the worker). A page
+that is slower, or that fails to parse, is skipped instead of stalling
+the upload.
+"""
+import asyncio
+import logging
+import signal
+import threading
+from collections import deque
+
+import pypdf
+
+from app.config import get_settings
+from app.utils.executors import run_cpu
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class PageTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise PageTimeout()
+
+
+def count_pdf_pages(path: str) -> int:
+    return len(pypdf.PdfReader(path).pages)
+
+
+def extract_page_range(path: str, start: int, end: int, page_timeout: float):
+    """
+    Text of pages [start, end). Module-level so it can run in the CPU
+    process pool. Returns (texts, skipped_page_numbers).
+    """
+    reader = pypdf.PdfReader(path)
+    end = min(end, len(reader.pages))
+
+    # Signals only work on the main thread: true in pool workers, not
+    # in the CPU_POOL_SIZE=0 thread fallback
+    use_alarm = page_timeout > 0 and threading.current_thread() is threading.main_thread()
+    previous = signal.signal(signal.SIGALRM, _raise_timeout) if use_alarm else None
+
+    texts = []
+    skipped = []
+    try:
+        for page_no in range(start, end):
+            try:
+                try:
+                    if use_alarm:
+                        signal.setitimer(signal.ITIMER_REAL, page_timeout)
+                    texts.append(reader.pages[page_no].extract_text() or "")
+                finally:
+                    if use_alarm:
+                        signal.setitimer(signal.ITIMER_REAL, 0)
+            except PageTimeout:
+                logger.warning(f"PDF page {page_no} exceeded {page_timeout}s, skipped")
+                texts.append("")
+                skipped.append(page_no)
+            except Exception as e:
+                logger.warning(f"PDF page {page_no} extraction error: {e}")
+                texts.append("")
+                skipped.append(page_no)
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous)
+
+    return texts, skipped
+
+
+async def _extract_range(path: str, start: int, end: int):
+    page_timeout = settings.PDF_PAGE_TIMEOUT
+    # Backstop for a worker stuck where the alarm can't interrupt it
+    # (e.g. inside C code); its pages are reported as skipped
+    budget = page_timeout * (end - start) + 30 if page_timeout > 0 else None
+    try:
+        return await asyncio.wait_for(
+            run_cpu(extract_page_range, path, start, end, page_timeout), timeout=budget
+        )
+    except asyncio.TimeoutError:
+        logger.error(f"PDF pages {start}-{end - 1} timed out, skipped")
+        return [""] * (end - start), list(range(start, end))
+
+
+async def extract_pdf_pages(path: str):
+    """
+    Async generator of page texts, in page order, for the PDF at `path`.
+    """
+    total = await run_cpu(count_pdf_pages, path)
+    step = max(1, settings.PDF_PAGES_PER_TASK)
+    window = max(1, settings.CPU_POOL_SIZE)
+
+    starts = iter(range(0, total, step))
+    tasks = deque()
+
+    def submit_next():
+        start = next(starts, None)
+        if start is not None:
+            tasks.append(asyncio.ensure_future(_extract_range(path, start, min(start + step, total))))
+
+    for _ in range(window):
+        submit_next()
+
+    skipped = []
+    try:
+        while tasks:
+            texts, range_skipped = await tasks.popleft()
+            submit_next()
+            skipped.extend(range_skipped)
+            for text in texts:
+                yield text
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if skipped:
+        logger.warning(f"PDF extraction skipped {len(skipped)} of {total} pages: {skipped[:20]}")
@@ -4,16 +4,17 @@ from datetime import datetime
 import uuid
 
 from app.models.document import Document, ModalityType
-from app.models.chunk import Chunk
-from app.services.embedding_service import EmbeddingService
-from app.utils.chunking import chunk_text
+from app.services.ingestion.chunk_writer import write_chunks
+from app.services.ingestion.dedup import create_chunks
+from app.utils.chunking import chunk_text, strategy_for
+from app.utils.executors import run_cpu, run_io
 
 
 class TextProcessor:
     def __init__(self):
         pass
 
-    async def process(self, text: str, title: str, user_id: str, db):
+    async def process(self, text: str, title: str, user_id: str, db, progress=None):
         """
         Process plain text, chunk it, embed it, and store in DB.
         Returns (document, chunks_list)
@@ -26,30 +27,28 @@ class TextProcessor:
             title=title or "Untitled",
             modality=ModalityType.TEXT,
             created_at=datetime.utcnow(),
-            doc_metadata=f"uploaded_by:{user_id}"
+            doc_metadata=f"uploaded_by:{user_id}",
+            owner_id=user_id,
+            source=title or "Untitled"
         )
-        db.add(document)
-        db.flush()  # ensure ID exists
+        await run_io(self._flush, db, document)  # ensure ID exists
 
         # Chunk text
-        chunk_texts = chunk_text(text)
+        chunk_texts = await run_cpu(chunk_text, text, strategy=strategy_for(title))
+
+        chunks = await create_chunks(db, document, chunk_texts, progress)
 
-        chunks = []
-        for idx, chunk_content in enumerate(chunk_texts):
-            embedding = EmbeddingService.get_embedding(chunk_content)
+        await run_io(self._commit, db, document, chunks)
 
-            chunk_obj = Chunk(
-                document_id=document.id,
-                chunk_index=idx,
-                content=chunk_content,
-                tokens=len(chunk_content.split()),
-                embedding=embedding
-            )
+        return document, chunks
 
-            db.add(chunk_obj)
-            chunks.append(chunk_obj)
+    @staticmethod
+    def _flush(db, document):
+        db.add(document)
+        db.flush()
 
+    @staticmethod
+    def _commit(db, document, chunks):
+        write_chunks(db, chunks)
         db.commit()
         db.refresh(document)
-
-        return document, chunks
@@ -6,30 +6,27 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.models.document import Document, ModalityType
-from app.models.chunk import Chunk
-from app.services.embedding_service import EmbeddingService
+from app.services.ingestion.chunk_writer import write_chunks
+from app.services.ingestion.dedup import create_chunks
+from app.utils.chunking import chunk_text
+from app.utils.executors import run_cpu, run_io
 
 
 class WebProcessor:
-    async def process(self, url: str, user_id: str, db: Session):
+    async def process(self, url: str, user_id: str, db: Session, progress=None):
 
         # ---------------------------
         # 1. Fetch HTML
         # ---------------------------
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            html = response.text
+            html = await run_io(self._fetch, url)
         except Exception as e:
             raise Exception(f"Failed to fetch URL: {url}") from e
 
         # ---------------------------
         # 2. Extract title + clean text
         # ---------------------------
-        soup = BeautifulSoup(html, "html.parser")
-        title = soup.title.string.strip() if soup.title else url
-        text = soup.get_text(separator="\n", strip=True)
-        text = text.replace("\x00", "")  # remove null chars
+        title, text = await run_io(self._parse, html, url)
 
         # ---------------------------
         # 3. Create Document
@@ -39,48 +36,44 @@ class WebProcessor:
             modality=ModalityType.WEB,  # 👈 IMPORTANT: Must match enum
             file_path=None,
             doc_metadata=f"uploaded_by:{user_id};source_url:{url}",
+            owner_id=user_id,
+            source=url,
             created_at=datetime.utcnow()
         )
 
-        db.add(doc)
-        db.flush()  # get doc.id
+        await run_io(self._flush, db, doc)  # get doc.id
 
         # ---------------------------
         # 4. Chunk + embed
         # ---------------------------
-        chunks = self._create_chunks(text, doc.id)
+        pieces = await run_cpu(chunk_text, text)
+        chunks = await create_chunks(db, doc, pieces, progress)
 
         if chunks:
-            db.add_all(chunks)
-            db.commit()
+            await run_io(self._commit, db, chunks)
 
         return doc, chunks
 
-    # ---------------------------
-    # Helper: Create chunks
-    # ---------------------------
-    def _create_chunks(self, text: str, document_id: str, chunk_size: int = 900):
-        chunks = []
-        overlap = 150
-
-        for i in range(0, len(text), chunk_size - overlap):
-            piece = text[i:i + chunk_size].strip()
-            if len(piece) < 20:
-                continue
+    @staticmethod
+    def _fetch(url: str) -> str:
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        return response.text
 
-            emb = EmbeddingService.get_embedding(piece)
-            if emb is None:
-                continue
-
-            chunk = Chunk(
-                document_id=document_id,
-                chunk_index=len(chunks),
-                content=piece,
-                tokens=len(piece.split()),
-                embedding=emb,
-                created_at=datetime.utcnow()
-            )
+    @staticmethod
+    def _parse(html: str, url: str):
+        soup = BeautifulSoup(html, "html.parser")
+        title = soup.title.string.strip() if soup.title else url
+        text = soup.get_text(separator="\n", strip=True)
+        text = text.replace("\x00", "")  # remove null chars
+        return title, text
 
-            chunks.append(chunk)
+    @staticmethod
+    def _flush(db: Session, doc: Document):
+        db.add(doc)
+        db.flush()
 
-        return chunks
+    @staticmethod
+    def _commit(db: Session, chunks: list):
+        write_chunks(db, chunks)
+        db.commit()
@@ -0,0 +1,79 @@
+# app/services/lexical_search.py
+"""
+Ranked keyword search over chunks.content using Postgres full-text
+search: the generated `content_tsv` column (GIN-indexed) is matched with
+websearch_to_tsquery and ranked with ts_rank_cd.
+
+Exact duplicates (same content_hash as their canonical chunk, see
+ingestion/dedup.py) are left out, since they would only repeat it. Near
+duplicates stay in: their text can differ in exactly the token being
+searched for (an edited number, id or name).
+"""
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.chunk import Chunk, TS_CONFIG
+from app.services.faiss_service import IndexedChunk
+
+# ts_rank_cd normalization 32 maps scores to rank / (rank + 1), i.e. 0..1
+RANK_NORMALIZATION = 32
+
+
+class LexicalSearchService:
+    @staticmethod
+    async def search(db: AsyncSession, query: str, top_k: int = 5, filters=None):
+        """
+        Returns [(IndexedChunk, score), ...], best match first.
+        Supports web-search syntax: "exact phrase", OR, -excluded.
+        """
+        if not query or not query.strip():
+            return []
+
+        tsquery = func.websearch_to_tsquery(TS_CONFIG, query)
+        score = func.ts_rank_cd(Chunk.content_tsv, tsquery, RANK_NORMALIZATION).label("score")
+
+        canonical = aliased(Chunk)
+        exact_duplicate = exists().where(
+            canonical.id == Chunk.canonical_chunk_id,
+            canonical.content_hash == Chunk.content_hash,
+        )
+
+        stmt = (
+            select(
+                Chunk.id,
+                Chunk.document_id,
+                Chunk.chunk_index,
+                Chunk.content,
+                Chunk.created_at,
+                Chunk.owner_id,
+                Chunk.modality,
+                Chunk.source,
+                score,
+            )
+            .where(Chunk.content_tsv.op("@@")(tsquery))
+            .where(~exact_duplicate)
+            .order_by(score.desc())
+            .limit(top_k)
+        )
+        if filters:
+            stmt = filters.apply(stmt)
+
+        rows = (await db.execute(stmt)).all()
+
+        return [
+            (
+                IndexedChunk(
+                    id=r.id,
+                    document_id=r.document_id,
+                    chunk_index=r.chunk_index,
+                    content=r.content,
+                    created_at=r.created_at,
+                    owner_id=r.owner_id,
+                    modality=r.modality,
+                    source=r.source,
+                ),
+                float(r.score),
+            )
+            for r in rows
+        ]
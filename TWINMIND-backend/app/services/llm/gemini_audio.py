@@ -9,12 +9,16 @@ genai.configure(api_key=settings.GEMINI_API_KEY)
 
 class GeminiAudioTranscriber:
     @staticmethod
-    def transcribe(audio_bytes: bytes, filename: str) -> str:
+    def transcribe(audio_path: str, filename: str) -> str:
         """
         Transcribes audio using Gemini 2.5 pro model.
         Supports mp3 / m4a / wav automatically.
+        Reads the spooled upload from disk only for the API call.
         """
         try:
+            with open(audio_path, "rb") as f:
+                audio_bytes = f.read()
+
             model = genai.GenerativeModel("models/gemini-2.5-pro")
 
             prompt = """
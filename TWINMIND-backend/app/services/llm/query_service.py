@@ -1,12 +1,21 @@
 # app/services/llm/query_service.py
 
+import asyncio
 import logging
 import os
+import time
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+from app.config import get_settings
+from app.database.connection import AsyncSessionLocal
+from app.services.answer_cache import answer_cache
 from app.services.embedding_service import EmbeddingService
-from app.services.faiss_service import FaissService
+from app.services.lexical_search import LexicalSearchService
+from app.services.rag_context import build_context
+from app.services.reranker import rerank as rerank_hits
+from app.services.vector_store import get_vector_backend
+from app.utils.executors import run_io, stream_io
 
 load_dotenv()
 
@@ -14,58 +23,291 @@ load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
-# Global FAISS instance (auto-uses correct dim)
-faiss_service = FaissService()
-
+LLM_ERROR = "LLM error: could not generate answer."
 
 class GeminiService:
     @staticmethod
-    def answer(query: str, context: str) -> str:
-        """
-        Generate answer from Gemini using provided context.
-        """
-        prompt = (
+    def _prompt(query: str, context: str) -> str:
+        return (
             "You are a helpful AI assistant. Use ONLY the given context.\n\n"
             f"Context:\n{context}\n\n"
             f"Question: {query}\n\n"
             "Provide a clear and concise answer."
         )
+
+    @staticmethod
+    def answer(query: str, context: str) -> str:
+        """
+        Generate answer from Gemini using provided context.
+        """
+        prompt = GeminiService._prompt(query, context)
         try:
             model = genai.GenerativeModel("models/gemini-2.5-pro")
             response = model.generate_content(prompt)
             return response.text
         except Exception as e:
             logger.error(f"Gemini API Error: {e}")
-            return "LLM error: could not generate answer."
+            return LLM_ERROR
+
+    @staticmethod
+    def stream_answer(query: str, context: str):
+        """
+        Same as answer(), but yields text pieces as Gemini streams them.
+        Blocking generator — iterate it through stream_io().
+        """
+        prompt = GeminiService._prompt(query, context)
+        try:
+            model = genai.GenerativeModel("models/gemini-2.5-pro")
+            for part in model.generate_content(prompt, stream=True):
+                try:
+                    text = part.text
+                except ValueError:
+                    # Parts without text (e.g. safety-blocked candidates)
+                    continue
+                if text:
+                    yield text
+        except Exception as e:
+            logger.error(f"Gemini streaming API Error: {e}")
+            yield LLM_ERROR
+
+
+def serialize_source(chunk, score, max_chars: int = 500) -> dict:
+    source = {
+        "content": chunk.content[:max_chars],
+        "score": float(score),
+        "chunk_id": str(chunk.id),
+        "document_id": str(chunk.document_id),
+    }
+    # Merged RAG passages span several chunks
+    chunk_ids = getattr(chunk, "chunk_ids", None)
+    if chunk_ids is not None:
+        source["chunk_ids"] = [str(c) for c in chunk_ids]
+    return source
 
 
-def semantic_search(query: str, top_k: int = 5):
+async def semantic_search(query: str, top_k: int = 5, filters=None):
     """
-    Perform FAISS search.
-    Returns: [(ChunkObject, distance),...]
+    Perform vector search with the configured backend.
+    Returns: [(IndexedChunk, distance),...]
     """
-    query_embedding = EmbeddingService.get_embedding(query)
+    query_embedding = await EmbeddingService.get_query_embedding_async(query)
     if query_embedding is None:
         return []
 
-    return faiss_service.search(query_embedding, top_k=top_k)
+    return await get_vector_backend().search(query_embedding, top_k=top_k, filters=filters)
 
 
-def generate_rag_answer(query: str, top_k: int = 5):
+async def lexical_search(query: str, top_k: int = 5, filters=None):
     """
-    Full pipeline: semantic search → LLM answer
+    Ranked full-text search. Returns: [(IndexedChunk, rank),...]
     """
-    relevant = semantic_search(query, top_k=top_k)
+    async with AsyncSessionLocal() as db:
+        return await LexicalSearchService.search(db, query, top_k, filters)
+
+
+async def _run_leg(name: str, coro, timeout_ms: int):
+    """
+    Await one retrieval leg within its latency budget.
+    A leg that times out or fails contributes no results.
+    """
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout_ms / 1000)
+    except asyncio.TimeoutError:
+        logger.warning(f"[HYBRID] {name} search exceeded {timeout_ms} ms, skipping")
+    except Exception as e:
+        logger.error(f"[HYBRID] {name} search failed: {e}")
+    return []
+
+
+def reciprocal_rank_fusion(ranked_lists, weights, k: int = 60):
+    """
+    Fuse ranked result lists: score(d) = sum(w / (k + rank)), rank from 1.
+    Only ranks are used, so lexical ranks and L2 distances need no
+    normalization against each other.
+    Returns: [(chunk, fused_score),...] best first.
+    """
+    scores = {}
+    chunks = {}
+    for results, weight in zip(ranked_lists, weights):
+        for rank, (chunk, _) in enumerate(results, start=1):
+            key = str(chunk.id)
+            chunks.setdefault(key, chunk)
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [(chunks[key], scores[key]) for key in ordered]
+
+
+async def hybrid_search(
+    query: str,
+    top_k: int = 5,
+    filters=None,
+    lexical_weight: float = 1.0,
+    vector_weight: float = 1.0,
+):
+    """
+    Run lexical and vector search concurrently and fuse them with RRF.
+    A weight of 0 disables that leg.
+    Returns: [(IndexedChunk, fused_score),...]
+    """
+    candidates = max(top_k, settings.HYBRID_CANDIDATES)
+
+    legs, weights = [], []
+    if lexical_weight > 0:
+        legs.append(_run_leg(
+            "lexical",
+            lexical_search(query, candidates, filters),
+            settings.HYBRID_LEXICAL_TIMEOUT_MS,
+        ))
+        weights.append(lexical_weight)
+    if vector_weight > 0:
+        legs.append(_run_leg(
+            "vector",
+            semantic_search(query, candidates, filters),
+            settings.HYBRID_VECTOR_TIMEOUT_MS,
+        ))
+        weights.append(vector_weight)
+
+    if not legs:
+        return []
+
+    results = await asyncio.gather(*legs)
+    fused = reciprocal_rank_fusion(results, weights, k=settings.HYBRID_RRF_K)
+    return fused[:top_k]
+
+
+async def retrieve_context(
+    query: str,
+    top_k: int = 5,
+    filters=None,
+    lexical_weight: float = 1.0,
+    vector_weight: float = 1.0,
+    rerank: bool = None,
+):
+    """
+    Hybrid search over a wider candidate pool, optionally reranked by
+    the cross-encoder (RERANK_ENABLED unless `rerank` says otherwise),
+    then merge adjacent chunks, diversify with MMR and pack up to
+    RAG_CONTEXT_TOKENS.
+    Returns: (context, [(Passage, score),...]) with at most top_k passages.
+    """
+    hits = await hybrid_search(
+        query, max(top_k, settings.HYBRID_CANDIDATES), filters, lexical_weight, vector_weight
+    )
+    if not hits:
+        return "", []
+
+    if rerank is None:
+        rerank = settings.RERANK_ENABLED
+    if rerank:
+        hits = await rerank_hits(query, hits)
+
+    try:
+        vectors = await get_vector_backend().vectors([c.id for c, _ in hits], filters)
+    except Exception as e:
+        # MMR degrades to relevance order
+        logger.warning(f"[RAG] Could not load vectors for MMR: {e}")
+        vectors = {}
+
+    context, passages = build_context(hits, vectors, top_k)
+    logger.info(f"[RAG] {len(hits)} hits → {len(passages)} passages in context")
+    return context, passages
+
+
+async def _cache_key(query: str, relevant):
+    """
+    (query embedding, chunks behind the passages) for the answer cache.
+    The embedding is the one hybrid search just computed (query cache).
+    """
+    if not answer_cache.enabled:
+        return None, []
+    query_embedding = await EmbeddingService.get_query_embedding_async(query)
+    chunks = [chunk for passage, _ in relevant for chunk in passage.chunks]
+    return query_embedding, chunks
+
+
+async def generate_rag_answer(
+    query: str,
+    top_k: int = 5,
+    filters=None,
+    lexical_weight: float = 1.0,
+    vector_weight: float = 1.0,
+    rerank: bool = None,
+):
+    """
+    Full pipeline: hybrid search → (rerank) → context packing → LLM answer,
+    served from the semantic answer cache when a similar question was
+    already answered from the same chunks.
+    """
+    context, relevant = await retrieve_context(
+        query, top_k, filters, lexical_weight, vector_weight, rerank
+    )
 
     if not relevant:
         return "No relevant information found.", []
 
-    # Join all chunk contents to form the context
-    context = "\n\n---\n\n".join(
-        [chunk_obj.content for chunk_obj, _ in relevant]
-    )
+    query_embedding, chunks = await _cache_key(query, relevant)
+    cached = answer_cache.get(query_embedding, chunks)
+    if cached is not None:
+        logger.info("[RAG] Answer served from cache")
+        return cached, relevant
 
-    answer = GeminiService.answer(query, context)
+    answer = await run_io(GeminiService.answer, query, context)
+    if answer != LLM_ERROR:
+        answer_cache.put(query_embedding, chunks, answer)
 
     return answer, relevant
+
+
+async def stream_rag_answer(
+    query: str,
+    top_k: int = 5,
+    filters=None,
+    lexical_weight: float = 1.0,
+    vector_weight: float = 1.0,
+    rerank: bool = None,
+):
+    """
+    Streaming RAG pipeline. Yields events in order:
+      ("sources", [(passage, score), ...])
+      ("token", text) ...
+      ("done", {"ttft_ms": ..., "total_ms": ..., "cached": bool})
+    """
+    start = time.perf_counter()
+
+    context, relevant = await retrieve_context(
+        query, top_k, filters, lexical_weight, vector_weight, rerank
+    )
+    yield "sources", relevant
+
+    if not relevant:
+        yield "token", "No relevant information found."
+        yield "done", {"ttft_ms": None, "total_ms": (time.perf_counter() - start) * 1000, "cached": False}
+        return
+
+    query_embedding, chunks = await _cache_key(query, relevant)
+    cached = answer_cache.get(query_embedding, chunks)
+    if cached is not None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"[RAG-STREAM] Answer served from cache in {elapsed_ms:.0f} ms")
+        yield "token", cached
+        yield "done", {"ttft_ms": elapsed_ms, "total_ms": elapsed_ms, "cached": True}
+        return
+
+    ttft_ms = None
+    parts = []
+    async for text in stream_io(GeminiService.stream_answer, query, context):
+        if ttft_ms is None:
+            ttft_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"[RAG-STREAM] Time to first token: {ttft_ms:.0f} ms")
+        parts.append(text)
+        yield "token", text
+
+    if parts and LLM_ERROR not in parts:
+        answer_cache.put(query_embedding, chunks, "".join(parts))
+
+    total_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"[RAG-STREAM] Completed in {total_ms:.0f} ms (TTFT {ttft_ms or 0:.0f} ms)")
+    yield "done", {"ttft_ms": ttft_ms, "total_ms": total_ms, "cached": False}
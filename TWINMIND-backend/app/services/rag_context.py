@@ -0,0 +1,176 @@
+# app/services/rag_context.py
+"""
+Post-retrieval stage: fused search hits -> RAG context.
+
+1. merge: hits that are consecutive chunks of one document (same
+   document_id, chunk_index n, n+1, ...) become one passage, with the
+   overlap between neighbouring chunks removed
+2. MMR:   passages are picked greedily by
+          λ · relevance − (1 − λ) · max cosine similarity to the ones
+          already picked, using the vectors stored in the index
+3. pack:  picked passages are added until RAG_CONTEXT_TOKENS is used
+
+Overlapping windows of the same paragraph therefore cost the prompt
+one copy instead of three.
+"""
+import numpy as np
+
+from app.config import get_settings
+
+settings = get_settings()
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+# Shorter suffix/prefix matches are likely coincidence, not chunk overlap
+MIN_OVERLAP_CHARS = 16
+
+# Rough chars per token for Gemini on English text
+CHARS_PER_TOKEN = 4
+
+
+class Passage:
+    """
+    A run of adjacent chunks of one document. Exposes the attributes
+    serialize_source reads from a chunk.
+    """
+
+    __slots__ = ("chunks", "content", "score")
+
+    def __init__(self, chunk, score):
+        self.chunks = [chunk]
+        self.content = chunk.content
+        self.score = score
+
+    def extend(self, chunk, score):
+        self.content = join_overlapping(self.content, chunk.content)
+        self.chunks.append(chunk)
+        self.score = max(self.score, score)
+
+    @property
+    def id(self):
+        return self.chunks[0].id
+
+    @property
+    def document_id(self):
+        return self.chunks[0].document_id
+
+    @property
+    def chunk_index(self):
+        return self.chunks[0].chunk_index
+
+    @property
+    def chunk_ids(self):
+        return [c.id for c in self.chunks]
+
+
+def join_overlapping(left: str, right: str) -> str:
+    """`right` appended to `left`, without the text they share."""
+    for k in range(min(len(left), len(right)), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:k]):
+            return left + right[k:]
+    return left + " " + right
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def merge_adjacent(hits):
+    """
+    [(chunk, score)] -> [Passage], best score first.
+    """
+    by_document = {}
+    for chunk, score in hits:
+        by_document.setdefault(chunk.document_id, []).append((chunk, score))
+
+    passages = []
+    for document_hits in by_document.values():
+        document_hits.sort(key=lambda hit: hit[0].chunk_index)
+        passage = None
+        for chunk, score in document_hits:
+            if passage is not None and chunk.chunk_index == passage.chunks[-1].chunk_index + 1:
+                passage.extend(chunk, score)
+            else:
+                passage = Passage(chunk, score)
+                passages.append(passage)
+
+    passages.sort(key=lambda p: p.score, reverse=True)
+    return passages
+
+
+def _passage_vector(passage, vectors):
+    found = [vectors[c.id] for c in passage.chunks if c.id in vectors]
+    if not found:
+        return None
+    v = np.mean(np.asarray(found, dtype=np.float32), axis=0)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else None
+
+
+def mmr(passages, vectors, limit: int, lambda_: float = 0.7):
+    """
+    Maximal marginal relevance over `passages` (best first). `vectors`
+    maps chunk id -> stored vector; passages without one only compete
+    on relevance.
+    """
+    if not passages:
+        return []
+
+    units = [_passage_vector(p, vectors) for p in passages]
+    top = max(p.score for p in passages) or 1.0
+    redundancy = [0.0] * len(passages)
+
+    selected = []
+    remaining = list(range(len(passages)))
+    while remaining and len(selected) < limit:
+        best = max(
+            remaining,
+            key=lambda i: lambda_ * passages[i].score / top - (1 - lambda_) * redundancy[i],
+        )
+        selected.append(best)
+        remaining.remove(best)
+
+        if units[best] is None:
+            continue
+        for i in remaining:
+            if units[i] is not None:
+                redundancy[i] = max(redundancy[i], float(units[i] @ units[best]))
+
+    return [passages[i] for i in selected]
+
+
+def pack(passages, budget_tokens: int):
+    """
+    Passages, in order, that fit in `budget_tokens`. One that doesn't
+    fit is skipped so a shorter later one can still go in; if not even
+    the first fits, it is truncated to the budget.
+    """
+    packed = []
+    used = 0
+    for passage in passages:
+        cost = estimate_tokens(passage.content)
+        if used + cost <= budget_tokens:
+            packed.append(passage)
+            used += cost
+        elif not packed:
+            passage.content = passage.content[:budget_tokens * CHARS_PER_TOKEN]
+            packed.append(passage)
+            used = budget_tokens
+    return packed
+
+
+def build_context(hits, vectors, top_k: int):
+    """
+    Fused hits [(chunk, score)] + their stored vectors ->
+    (context text, [(Passage, score)]).
+    """
+    if settings.RAG_MERGE_ADJACENT:
+        passages = merge_adjacent(hits)
+    else:
+        passages = [Passage(chunk, score) for chunk, score in hits]
+
+    picked = mmr(passages, vectors, top_k, settings.RAG_MMR_LAMBDA)
+    packed = pack(picked, settings.RAG_CONTEXT_TOKENS)
+
+    context = CONTEXT_SEPARATOR.join(p.content for p in packed)
+    return context, [(p, p.score) for p in packed]
@@ -0,0 +1,148 @@
+# app/services/reranker.py
+"""
+Optional cross-encoder reranking of retrieval candidates.
+
+The top RERANK_CANDIDATES fused hits are rescored as (query, chunk)
+pairs by a local CPU cross-encoder (RERANK_MODEL), in batches of up to
+RERANK_BATCH_SIZE on the CPU pool. The whole stage has a budget of
+RERANK_TIMEOUT_MS. A job on the process pool can't be cancelled, so a
+batch is only started when it is expected to finish inside what is left
+of the budget, and once started is awaited to the end. Batches are sized
+from the model time per pair, measured in the worker around predict()
+(pool queueing and model loading excluded). Without an estimate, or
+when a full pair no longer fits, a call still scores a PROBE_PAIRS batch
+so the estimate keeps tracking the model instead of locking reranking
+off. When the budget runs out the batches scored so far are reordered
+and the rest keep their fused order.
+
+The model is loaded when the CPU workers start (RERANK_PRELOAD), so a
+per-request rerank doesn't pay for it either.
+
+Scores are the model's sigmoid relevance in (0, 1). Hits that weren't
+rescored get rank-based scores strictly below the lowest rescored one,
+so the whole list is on one scale for downstream normalization (MMR in
+rag_context).
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+
+from app.config import get_settings
+from app.utils.executors import run_cpu
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_model = None
+_model_lock = threading.Lock()
+
+# Pairs scored when nothing fits the budget, to (re)measure the model
+PROBE_PAIRS = 2
+
+# Model seconds per (query, chunk) pair, smoothed over batches; None
+# until the first batch in this process has run
+_pair_seconds = None
+
+
+def get_cross_encoder():
+    """Loaded lazily, once per process (CPU pool workers included)."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import CrossEncoder
+                _model = CrossEncoder(settings.RERANK_MODEL, max_length=512)
+    return _model
+
+
+def score_pairs(query: str, texts):
+    """
+    Raw model call, as (scores, seconds spent in predict). Module-level
+    so it can run in the CPU process pool.
+    """
+    model = get_cross_encoder()
+    start = time.perf_counter()
+    scores = model.predict(
+        [(query, t) for t in texts],
+        batch_size=len(texts),
+        show_progress_bar=False,
+    )
+    return np.asarray(scores, dtype=np.float32), time.perf_counter() - start
+
+
+def _batch_fit(remaining: float, limit: int, probe: bool) -> int:
+    """
+    Pairs that should score within `remaining` seconds, up to limit.
+    With `probe`, at least PROBE_PAIRS while any budget is left.
+    """
+    if remaining <= 0:
+        return 0
+    floor = min(limit, PROBE_PAIRS) if probe else 0
+    if _pair_seconds is None:
+        return floor
+    if _pair_seconds <= 0:
+        return limit
+    return max(floor, min(limit, int(remaining / _pair_seconds)))
+
+
+def _observe(seconds: float, pairs: int):
+    global _pair_seconds
+    per_pair = seconds / pairs
+    _pair_seconds = per_pair if _pair_seconds is None else 0.8 * _pair_seconds + 0.2 * per_pair
+
+
+def _below(floor: float, hits):
+    """hits in their order, rescored evenly below floor (within (0, floor) if it's positive)."""
+    step = (floor if floor > 0 else 1.0) / (len(hits) + 1)
+    return [(chunk, floor - step * (i + 1)) for i, (chunk, _) in enumerate(hits)]
+
+
+async def rerank(query: str, hits, budget_ms: int = None):
+    """
+    Rescore the head of `hits` ([(chunk, score)], best first) within the
+    time budget. Returns the reranked head followed by the unscored tail
+    in its original order.
+    """
+    budget_ms = settings.RERANK_TIMEOUT_MS if budget_ms is None else budget_ms
+    head = hits[:settings.RERANK_CANDIDATES]
+    if len(head) < 2:
+        return hits
+
+    start = time.perf_counter()
+    deadline = start + budget_ms / 1000
+    batch_size = max(1, settings.RERANK_BATCH_SIZE)
+
+    scores = []
+    while len(scores) < len(head):
+        size = _batch_fit(deadline - time.perf_counter(), batch_size, probe=not scores)
+        if size < 1:
+            break
+        texts = [chunk.content for chunk, _ in head[len(scores):len(scores) + size]]
+        try:
+            batch, seconds = await run_cpu(score_pairs, query, texts)
+        except Exception as e:
+            logger.error(f"[RERANK] Cross-encoder failed: {e}")
+            break
+        _observe(seconds, len(texts))
+        scores.extend(float(s) for s in batch)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if len(scores) < len(head):
+        logger.warning(
+            f"[RERANK] Budget of {budget_ms} ms hit after {len(scores)}/{len(head)} "
+            f"candidates ({elapsed_ms:.0f} ms); keeping fused order for the rest"
+        )
+    else:
+        logger.info(f"[RERANK] Rescored {len(head)} candidates in {elapsed_ms:.0f} ms")
+
+    if not scores:
+        return hits
+
+    scored = sorted(
+        ((chunk, score) for (chunk, _), score in zip(head, scores)),
+        key=lambda hit: hit[1],
+        reverse=True,
+    )
+    return scored + _below(scored[-1][1], hits[len(scores):])
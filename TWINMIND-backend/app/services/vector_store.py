@@ -0,0 +1,213 @@
+# app/services/vector_store.py
+"""
+Vector search backends.
+
+- FaissSearchBackend:    the in-process FAISS index (faiss_service)
+- TenantFaissSearchBackend: per-owner FAISS shards (faiss_shards),
+                         loaded on demand; every search needs an owner
+- PgVectorSearchBackend: ORDER BY embedding <-> :q LIMIT k in Postgres,
+                         served by the HNSW / IVFFlat index on chunks
+
+VECTOR_BACKEND picks one per deployment. search() returns
+[(IndexedChunk, distance), ...] with distance = squared L2; vectors()
+returns the stored vectors of given chunk ids.
+"""
+import logging
+
+import numpy as np
+from sqlalchemy import select, text
+
+from app.config import get_settings
+from app.database.connection import AsyncSessionLocal
+from app.models.chunk import Chunk
+from app.services.chunk_content import hydrate
+from app.services.faiss_service import IndexedChunk, faiss_service
+from app.services.faiss_shards import tenant_indexes
+from app.utils.executors import run_io
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class SearchFilters:
+    """
+    Optional restrictions applied inside the search: FAISS turns them
+    into an id-selector bitmap, SQL backends into WHERE clauses on the
+    denormalized chunk columns.
+    """
+
+    def __init__(self, start_date=None, end_date=None, owner_id=None, modality=None, source=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.owner_id = owner_id
+        self.modality = modality
+        self.source = source
+
+    def __bool__(self):
+        return any(
+            v is not None
+            for v in (self.start_date, self.end_date, self.owner_id, self.modality, self.source)
+        )
+
+    def matches(self, entry) -> bool:
+        if self.owner_id is not None and entry.owner_id != self.owner_id:
+            return False
+        if self.modality is not None and entry.modality != self.modality:
+            return False
+        if self.source is not None and entry.source != self.source:
+            return False
+        if self.start_date or self.end_date:
+            if entry.created_at is None:
+                return False
+            if self.start_date and entry.created_at < self.start_date:
+                return False
+            if self.end_date and entry.created_at > self.end_date:
+                return False
+        return True
+
+    def apply(self, stmt):
+        if self.owner_id is not None:
+            stmt = stmt.where(Chunk.owner_id == self.owner_id)
+        if self.modality is not None:
+            stmt = stmt.where(Chunk.modality == self.modality)
+        if self.source is not None:
+            stmt = stmt.where(Chunk.source == self.source)
+        if self.start_date:
+            stmt = stmt.where(Chunk.created_at >= self.start_date)
+        if self.end_date:
+            stmt = stmt.where(Chunk.created_at <= self.end_date)
+        return stmt
+
+
+class FaissSearchBackend:
+    name = "faiss"
+    requires_owner = False
+
+    async def search(self, query_embedding, top_k=5, filters: SearchFilters = None):
+        results = await run_io(faiss_service.search, query_embedding, top_k, filters or None)
+        return await hydrate(results)
+
+    async def vectors(self, chunk_ids, filters: SearchFilters = None):
+        return await run_io(faiss_service.vectors, chunk_ids)
+
+
+class TenantFaissSearchBackend:
+    name = "faiss_tenant"
+    requires_owner = True
+
+    async def search(self, query_embedding, top_k=5, filters: SearchFilters = None):
+        if filters is None or filters.owner_id is None:
+            raise ValueError("faiss_tenant search needs an owner_id filter")
+        results = await run_io(tenant_indexes.search, filters.owner_id, query_embedding, top_k, filters)
+        return await hydrate(results)
+
+    async def vectors(self, chunk_ids, filters: SearchFilters = None):
+        if filters is None or filters.owner_id is None:
+            raise ValueError("faiss_tenant lookups need an owner_id filter")
+        return await run_io(tenant_indexes.vectors, filters.owner_id, chunk_ids)
+
+
+class PgVectorSearchBackend:
+    name = "pgvector"
+    requires_owner = False
+
+    ITERATIVE_SCAN_MODES = ("relaxed_order", "strict_order")
+
+    def __init__(self, index_type: str = "hnsw", ef_search: int = 40, probes: int = 10, iterative_scan: str = ""):
+        self.index_type = index_type
+        self.ef_search = ef_search
+        self.probes = probes
+        self.iterative_scan = iterative_scan if iterative_scan in self.ITERATIVE_SCAN_MODES else ""
+
+    def _tuning_sql(self, filtered=False):
+        # SET LOCAL does not accept bind parameters; values are ints or
+        # one of ITERATIVE_SCAN_MODES
+        statements = []
+        if self.index_type == "ivfflat":
+            statements.append(f"SET LOCAL ivfflat.probes = {int(self.probes)}")
+        else:
+            statements.append(f"SET LOCAL hnsw.ef_search = {int(self.ef_search)}")
+
+        # Without iterative scans a selective WHERE can leave the ANN
+        # candidate list short of LIMIT
+        if filtered and self.iterative_scan:
+            statements.append(f"SET LOCAL {self.index_type}.iterative_scan = {self.iterative_scan}")
+        return statements
+
+    async def search(self, query_embedding, top_k=5, filters: SearchFilters = None):
+        distance = Chunk.embedding.l2_distance(list(query_embedding))
+
+        stmt = (
+            select(
+                Chunk.id,
+                Chunk.document_id,
+                Chunk.chunk_index,
+                Chunk.content,
+                Chunk.created_at,
+                Chunk.owner_id,
+                Chunk.modality,
+                Chunk.source,
+                distance.label("distance"),
+            )
+            .where(Chunk.embedding.isnot(None))
+            .order_by(distance)
+            .limit(top_k)
+        )
+        if filters:
+            stmt = filters.apply(stmt)
+
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                for sql in self._tuning_sql(filtered=bool(filters)):
+                    await db.execute(text(sql))
+                rows = (await db.execute(stmt)).all()
+
+        # pgvector's <-> is L2; square it to match FAISS IndexFlatL2 scores
+        return [
+            (
+                IndexedChunk(
+                    id=r.id,
+                    document_id=r.document_id,
+                    chunk_index=r.chunk_index,
+                    content=r.content,
+                    created_at=r.created_at,
+                    owner_id=r.owner_id,
+                    modality=r.modality,
+                    source=r.source,
+                ),
+                float(r.distance) ** 2,
+            )
+            for r in rows
+        ]
+
+    async def vectors(self, chunk_ids, filters: SearchFilters = None):
+        """Stored embeddings of the given chunks, {chunk_id: array}."""
+        if not chunk_ids:
+            return {}
+        stmt = select(Chunk.id, Chunk.embedding).where(
+            Chunk.id.in_(list(chunk_ids)), Chunk.embedding.isnot(None)
+        )
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(stmt)).all()
+        return {r.id: np.asarray(r.embedding, dtype=np.float32) for r in rows}
+
+
+_backend = None
+
+
+def get_vector_backend():
+    global _backend
+    if _backend is None:
+        if settings.VECTOR_BACKEND == "pgvector":
+            _backend = PgVectorSearchBackend(
+                index_type=settings.PGVECTOR_INDEX_TYPE,
+                ef_search=settings.PGVECTOR_EF_SEARCH,
+                probes=settings.PGVECTOR_PROBES,
+                iterative_scan=settings.PGVECTOR_ITERATIVE_SCAN,
+            )
+        elif settings.VECTOR_BACKEND == "faiss_tenant":
+            _backend = TenantFaissSearchBackend()
+        else:
+            _backend = FaissSearchBackend()
+        logger.info(f"Vector backend: {_backend.name}")
+    return _backend
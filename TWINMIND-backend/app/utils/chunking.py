@@ -1,23 +1,296 @@
+"""
+Chunking engine shared by every ingestion processor.
+
+Strategies (CHUNK_STRATEGY, or per call):
+- fixed:    ~CHUNK_SIZE characters, cut on whitespace (never mid-word)
+- sentence: whole sentences packed up to CHUNK_SIZE characters
+- tokens:   whole sentences packed up to CHUNK_TOKENS MiniLM tokens, so
+            no chunk is truncated by the embedding model
+- markdown: paragraphs packed up to CHUNK_SIZE characters, with a
+            chunk boundary before every heading
+
+All strategies split text into units, pack consecutive units into a
+chunk, and carry trailing units worth up to the overlap into the next
+chunk. A unit bigger than a whole chunk falls back to paragraphs, then
+sentences, then words.
+
+Chunkers are incremental: feed() text as it arrives (PDF pages, file
+blocks) and get back the chunks that are complete; finish() flushes
+the rest. Each feed() only re-splits the new text plus the end of the
+unfinished unit, so cost stays linear in document size however the
+blocks fall. iter_chunks() / chunk_text() wrap that for iterables and
+strings.
+
+Chunks shorter than CHUNK_MIN_CHARS are dropped, except the final one
+from finish(): the tail of a document (or a whole short input) is
+always kept.
+"""
+import re
+import threading
+
 from app.config import get_settings
 
 settings = get_settings()
 
-def chunk_text(text: str, chunk_size: int = None, overlap: int = None):
-    """
-    Split text into overlapping chunks
-    """
-    if chunk_size is None:
-        chunk_size = settings.CHUNK_SIZE
-    if overlap is None:
-        overlap = settings.CHUNK_OVERLAP
-    
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk.strip())
-        start += (chunk_size - overlap)
-    
-    return chunks
\ No newline at end of file
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_WORD = re.compile(r"\s+")
+_MARKDOWN_BLOCK = re.compile(r"\n\s*\n|\n(?=#{1,6}\s)")
+
+# Finer and finer splits for units that don't fit in one chunk
+_FALLBACKS = (_PARAGRAPH, _SENTENCE, _WORD)
+
+# How far before its trailing whitespace new text can still create a
+# separator in the unfinished unit: the "[.!?]" look-behind, or a "\n"
+# followed by up to six "#" of a heading whose space hasn't arrived yet
+_BOUNDARY_CONTEXT = 8
+
+
+class Chunker:
+    """
+    Base chunker: packs units produced by `split` up to `size`, as
+    measured by `length_many`.
+    """
+
+    unit_pattern = _SENTENCE
+    joiner = " "
+
+    def __init__(self, size: int, overlap: int):
+        if overlap >= size:
+            raise ValueError(f"Chunk overlap ({overlap}) must be smaller than chunk size ({size})")
+        self.size = size
+        self.overlap = overlap
+        self.min_chars = settings.CHUNK_MIN_CHARS
+        self._pending = []   # pieces of the unfinished last unit
+        self._units = []     # [(text, length)] in the chunk being built
+        self._used = 0
+        self._fresh = False  # units added since the last emitted chunk
+
+    # -------------------------------------------------
+    # Strategy hooks
+    # -------------------------------------------------
+    def split(self, text: str):
+        return self.unit_pattern.split(text)
+
+    def length_many(self, units):
+        return [len(u) for u in units]
+
+    def starts_section(self, unit: str) -> bool:
+        """True if a new chunk must start at this unit (no overlap)."""
+        return False
+
+    @property
+    def _separator(self):
+        # Joiner cost per unit; only meaningful for character lengths
+        return len(self.joiner)
+
+    # -------------------------------------------------
+    # Incremental API
+    # -------------------------------------------------
+    def _pending_tail(self):
+        """
+        (settled, tail) of the unfinished unit: a separator involving new
+        text can only start inside `tail`, so only it is re-split.
+        """
+        suffix = ""
+        count = 0
+        for piece in reversed(self._pending):
+            suffix = piece + suffix
+            count += 1
+            if len(suffix.rstrip()) > _BOUNDARY_CONTEXT:
+                break
+
+        start = max(0, len(suffix.rstrip()) - _BOUNDARY_CONTEXT)
+        settled = "".join(self._pending[:len(self._pending) - count]) + suffix[:start]
+        return settled, suffix[start:]
+
+    def feed(self, text: str):
+        text = text.replace("\x00", "").replace("\r", "\n")
+        if not text:
+            return []
+
+        settled, tail = self._pending_tail()
+        units = self.split(tail + text)
+        if len(units) < 2:
+            self._pending.append(text)
+            return []
+
+        # The last unit may continue in the next block
+        units[0] = settled + units[0]
+        self._pending = [units.pop()]
+        return self._pack(units)
+
+    def finish(self):
+        units = self.split("".join(self._pending))
+        self._pending = []
+        chunks = self._pack(units)
+        if self._fresh:
+            # The remainder is kept even below min_chars, so a short
+            # input still yields a chunk
+            chunk = self._emit(carry=False, keep_short=True)
+            if chunk:
+                chunks.append(chunk)
+        self._units = []
+        self._used = 0
+        return chunks
+
+    # -------------------------------------------------
+    # Packing
+    # -------------------------------------------------
+    def _pack(self, units):
+        units = [u.strip() for u in units]
+        units = [u for u in units if u]
+        if not units:
+            return []
+
+        chunks = []
+        for unit, n in zip(units, self.length_many(units)):
+            for piece, piece_len in self._fit(unit, n):
+                section = self.starts_section(piece)
+                if self._units and (section or self._used + piece_len + self._separator > self.size):
+                    chunk = self._emit(carry=not section)
+                    if chunk:
+                        chunks.append(chunk)
+                    # Drop carried overlap that would push this piece over
+                    while self._units and self._used + piece_len + self._separator > self.size:
+                        _, dropped = self._units.pop(0)
+                        self._used -= dropped + self._separator
+                self._units.append((piece, piece_len))
+                self._used += piece_len + self._separator
+                self._fresh = True
+        return chunks
+
+    def _emit(self, carry: bool = True, keep_short: bool = False):
+        chunk = self.joiner.join(u for u, _ in self._units)
+        self._fresh = False
+
+        kept = []
+        used = 0
+        if carry and self.overlap > 0:
+            # Trailing units worth <= overlap, never the whole chunk
+            for unit, n in reversed(self._units[1:]):
+                if used + n + self._separator > self.overlap:
+                    break
+                kept.insert(0, (unit, n))
+                used += n + self._separator
+
+        self._units = kept
+        self._used = used
+        if keep_short:
+            return chunk or None
+        return chunk if len(chunk) >= self.min_chars else None
+
+    def _fit(self, unit: str, n: int, level: int = 0):
+        """Split `unit` until every piece fits in one chunk."""
+        if n <= self.size:
+            return [(unit, n)]
+
+        for depth in range(level, len(_FALLBACKS)):
+            parts = [p.strip() for p in _FALLBACKS[depth].split(unit)]
+            parts = [p for p in parts if p]
+            if len(parts) > 1:
+                pieces = []
+                for part, part_len in zip(parts, self.length_many(parts)):
+                    pieces.extend(self._fit(part, part_len, depth + 1))
+                return pieces
+
+        # A single "word" longer than a chunk (URLs, base64, ...)
+        step = max(1, len(unit) * self.size // n)
+        parts = [unit[i:i + step] for i in range(0, len(unit), step)]
+        return list(zip(parts, self.length_many(parts)))
+
+
+class FixedChunker(Chunker):
+    unit_pattern = _WORD
+
+
+class SentenceChunker(Chunker):
+    unit_pattern = _SENTENCE
+
+
+class MarkdownChunker(Chunker):
+    unit_pattern = _MARKDOWN_BLOCK
+    joiner = "\n\n"
+
+    def starts_section(self, unit: str) -> bool:
+        return unit.startswith("#")
+
+
+class TokenChunker(SentenceChunker):
+    """Sizes are MiniLM tokens (no special tokens) instead of characters."""
+
+    @property
+    def _separator(self):
+        return 0
+
+    def length_many(self, units):
+        if not units:
+            return []
+        encoded = get_tokenizer()(list(units), add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """
+    The embedding model's tokenizer, loaded on its own so the tokens
+    strategy doesn't need the model in this process.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                from transformers import AutoTokenizer
+                from app.services.embedding_service import MODEL_NAME
+                _tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    return _tokenizer
+
+
+STRATEGIES = {
+    "fixed": FixedChunker,
+    "sentence": SentenceChunker,
+    "tokens": TokenChunker,
+    "markdown": MarkdownChunker,
+}
+
+
+def strategy_for(filename: str = None) -> str:
+    """Default strategy, except markdown files use the markdown one."""
+    if filename and filename.lower().endswith((".md", ".markdown")):
+        return "markdown"
+    return settings.CHUNK_STRATEGY
+
+
+def get_chunker(strategy: str = None, chunk_size: int = None, overlap: int = None) -> Chunker:
+    strategy = strategy or settings.CHUNK_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown chunking strategy: {strategy} (expected one of {sorted(STRATEGIES)})")
+
+    if strategy == "tokens":
+        size = chunk_size or settings.CHUNK_TOKENS
+        default_overlap = settings.CHUNK_TOKEN_OVERLAP
+    else:
+        size = chunk_size or settings.CHUNK_SIZE
+        default_overlap = settings.CHUNK_OVERLAP
+
+    return STRATEGIES[strategy](size, default_overlap if overlap is None else overlap)
+
+
+def iter_chunks(blocks, strategy: str = None, chunk_size: int = None, overlap: int = None):
+    """
+    Generator of chunks over an iterable of text blocks.
+    """
+    chunker = get_chunker(strategy, chunk_size, overlap)
+    for block in blocks:
+        yield from chunker.feed(block)
+    yield from chunker.finish()
+
+
+def chunk_text(text: str, chunk_size: int = None, overlap: int = None, strategy: str = None):
+    """
+    Split text into overlapping chunks (no empty or tiny ones)
+    """
+    return list(iter_chunks([text], strategy, chunk_size, overlap))
@@ -0,0 +1,135 @@
+# app/utils/executors.py
+"""
+Executor layer for blocking work called from async handlers.
+
+- run_io():  bounded thread pool for DB sessions, HTTP fetches and SDK
+             calls (Gemini), which spend their time waiting.
+- run_cpu(): process pool for CPU-bound work (embedding, PDF parsing);
+             functions and arguments must be picklable.
+
+Each pool also has a semaphore so a burst of requests queues here
+instead of piling unbounded work onto the pools.
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_io_pool = ThreadPoolExecutor(
+    max_workers=settings.IO_POOL_SIZE,
+    thread_name_prefix="twinmind-io",
+)
+_io_limit = asyncio.Semaphore(settings.IO_CONCURRENCY)
+
+_cpu_pool = None
+_cpu_limit = asyncio.Semaphore(settings.CPU_CONCURRENCY)
+
+
+def _init_cpu_worker():
+    # Load the models once per worker, not per task
+    from app.services.embedding_service import EmbeddingService
+    EmbeddingService.get_model()
+
+    if settings.RERANK_ENABLED or settings.RERANK_PRELOAD:
+        from app.services.reranker import get_cross_encoder
+        get_cross_encoder()
+
+
+def _get_cpu_pool():
+    global _cpu_pool
+    if _cpu_pool is None and settings.CPU_POOL_SIZE > 0:
+        # spawn, not fork: the parent already runs threads (uvicorn, torch)
+        _cpu_pool = ProcessPoolExecutor(
+            max_workers=settings.CPU_POOL_SIZE,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_cpu_worker,
+        )
+    return _cpu_pool
+
+
+async def run_io(fn, *args, **kwargs):
+    """Run a blocking I/O call on the thread pool."""
+    async with _io_limit:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_io_pool, functools.partial(fn, *args, **kwargs))
+
+
+async def stream_io(fn, *args, **kwargs):
+    """
+    Iterate a blocking generator on the thread pool, yielding its items
+    to the caller as they are produced (e.g. streamed SDK responses).
+    Stops pulling from the generator once the consumer goes away.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in fn(*args, **kwargs):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+    async with _io_limit:
+        future = loop.run_in_executor(_io_pool, produce)
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is done:
+                    if error is not None:
+                        raise error
+                    break
+                yield item
+        finally:
+            stop.set()
+            if future.done():
+                future.result()
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """
+    Run a CPU-bound call on the process pool.
+    Falls back to the thread pool when CPU_POOL_SIZE is 0.
+    """
+    pool = _get_cpu_pool()
+    if pool is None:
+        return await run_io(fn, *args, **kwargs)
+
+    async with _cpu_limit:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+
+def start():
+    """
+    Spawn CPU workers (and load their models) up front so the first
+    upload or query doesn't pay for it. Without a pool the models are
+    loaded on an I/O thread instead, as run_cpu then runs there.
+    """
+    pool = _get_cpu_pool()
+    if pool is not None:
+        pool.submit(int)   # first submit spawns the workers
+        logger.info(f"CPU pool started with {settings.CPU_POOL_SIZE} workers")
+    else:
+        _io_pool.submit(_init_cpu_worker)
+
+
+def shutdown():
+    global _cpu_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
+    _io_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,83 @@
+# app/utils/uploads.py
+"""
+Streaming upload handling.
+
+spool_upload() copies an UploadFile to disk in SPOOL_CHUNK_SIZE blocks
+(writes go through run_io) and aborts as soon as MAX_FILE_SIZE is
+exceeded, so a request never holds more than one block in memory.
+Extractors then read from the spooled path.
+"""
+import os
+import uuid
+
+from fastapi import UploadFile
+
+from app.config import get_settings
+from app.utils.executors import run_io
+
+settings = get_settings()
+
+SPOOL_CHUNK_SIZE = 1024 * 1024       # bytes per read/write
+TEXT_BLOCK_SIZE = 256 * 1024         # characters per iter_text_blocks() item
+
+os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def spool_upload(file: UploadFile, path: str = None, max_bytes: int = None):
+    """
+    Stream `file` to `path` (a temp name under UPLOAD_DIR by default).
+    Returns (path, size). Raises UploadTooLarge past `max_bytes`
+    (MAX_FILE_SIZE by default) and removes the partial file.
+    """
+    max_bytes = settings.MAX_FILE_SIZE if max_bytes is None else max_bytes
+    if path is None:
+        path = os.path.join(settings.UPLOAD_DIR, f".spool-{uuid.uuid4().hex}")
+
+    out = await run_io(open, path, "wb")
+    size = 0
+    try:
+        while True:
+            block = await file.read(SPOOL_CHUNK_SIZE)
+            if not block:
+                break
+            size += len(block)
+            if size > max_bytes:
+                raise UploadTooLarge(
+                    f"{file.filename} exceeds the {max_bytes // (1024 * 1024)}MB upload limit"
+                )
+            await run_io(out.write, block)
+    except BaseException:
+        await run_io(out.close)
+        await run_io(_remove, path)
+        raise
+
+    await run_io(out.close)
+    return path, size
+
+
+async def discard(path: str):
+    await run_io(_remove, path)
+
+
+def iter_text_blocks(path: str, block_size: int = TEXT_BLOCK_SIZE):
+    """
+    Decode a spooled file as UTF-8 (undecodable bytes dropped) in
+    blocks. Blocking generator — iterate it through stream_io().
+    """
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
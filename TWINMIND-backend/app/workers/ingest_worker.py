@@ -0,0 +1,56 @@
+# app/workers/ingest_worker.py
+"""
+Ingestion worker for INGEST_MODE=queue with INGEST_QUEUE_BACKEND=redis.
+
+    python -m app.workers.ingest_worker
+
+Runs INGEST_WORKERS jobs concurrently. Must share the filesystem with
+the API (uploads are spooled there and passed by path). Committed
+documents are announced over Redis so API processes can update their
+in-process FAISS index; the worker itself keeps no index (it never
+calls faiss_service.start_index_sync()).
+"""
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.config import get_settings
+from app.database.connection import async_engine
+from app.services.ingestion import jobs
+from app.utils import executors
+
+# Import ALL models so relationships resolve
+import app.models.document
+import app.models.chunk
+import app.models.user
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+async def main():
+    if settings.INGEST_QUEUE_BACKEND != "redis":
+        raise SystemExit("ingest_worker needs INGEST_QUEUE_BACKEND=redis (local jobs run inside the API)")
+
+    executors.start()
+    workers = [
+        asyncio.create_task(jobs.worker_loop(f"ingest-worker-{i}"))
+        for i in range(settings.INGEST_WORKERS)
+    ]
+    logger.info(f"Ingestion worker started with {len(workers)} consumers")
+
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        executors.shutdown()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
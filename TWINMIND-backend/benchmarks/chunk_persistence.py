@@ -0,0 +1,99 @@
+"""
+Chunk persistence throughput: ORM add_all() vs Core executemany vs
+binary COPY, on one large synthetic document.
+
+Each method writes the same chunks for a fresh document inside a
+transaction that is rolled back, so the database is left unchanged.
+Needs DATABASE_URL pointing at a migrated database.
+
+Usage (from TWINMIND-backend/):
+    python -m benchmarks.chunk_persistence --chunks 50000
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+from app.config import get_settings
+from app.database.connection import SessionLocal
+from app.models.chunk import Chunk
+from app.models.document import Document, ModalityType
+from app.services.ingestion.chunk_writer import write_chunks
+
+settings = get_settings()
+
+WORDS = (
+    "memory index vector search document chunk model query answer context "
+    "latency token embedding retrieval upload audio image page web note"
+).split()
+
+METHODS = ("orm", "executemany", "copy")
+
+
+def make_chunks(doc: Document, n: int, words_per_chunk: int = 160):
+    rng = random.Random(0)
+    vectors = np.random.default_rng(0).standard_normal(
+        (n, settings.EMBEDDING_DIMENSION), dtype=np.float32
+    )
+    attributes = doc.chunk_attributes()
+    chunks = []
+    for i in range(n):
+        content = " ".join(rng.choices(WORDS, k=words_per_chunk))
+        chunks.append(Chunk(
+            id=uuid.uuid4(),
+            document_id=doc.id,
+            **attributes,
+            chunk_index=i,
+            content=content,
+            tokens=words_per_chunk,
+            embedding=vectors[i].tolist(),
+            created_at=datetime.utcnow(),
+        ))
+    return chunks
+
+
+def bench(method: str, n: int):
+    db = SessionLocal()
+    try:
+        doc = Document(
+            id=uuid.uuid4(),
+            title="benchmark",
+            modality=ModalityType.TEXT,
+            owner_id="benchmark",
+            source="benchmark",
+            created_at=datetime.utcnow(),
+        )
+        db.add(doc)
+        db.flush()
+        chunks = make_chunks(doc, n)
+
+        start = time.perf_counter()
+        write_chunks(db, chunks, method=method)
+        db.flush()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.rollback()
+        db.close()
+
+    print(f"{method:<12} {n / elapsed:10.1f} rows/sec  ({elapsed:.2f}s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=METHODS)
+    args = parser.parse_args()
+
+    timings = {method: bench(method, args.chunks) for method in args.methods}
+    if "orm" in timings:
+        for method, elapsed in timings.items():
+            if method != "orm":
+                print(f"{method} speedup over orm: {timings['orm'] / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Embedding throughput: per-chunk get_embedding() vs batched embed_batch().
+
+Usage (from TWINMIND-backend/):
+    python -m benchmarks.embedding_throughput --chunks 500 --batch-size 64
+"""
+import argparse
+import random
+import time
+
+from app.services.embedding_service import EmbeddingService
+
+WORDS = (
+    "memory index vector search document chunk model query answer context "
+    "latency token embedding retrieval upload audio image page web note"
+).split()
+
+
+def make_chunks(n: int, words_per_chunk: int = 160):
+    rng = random.Random(0)
+    return [" ".join(rng.choices(WORDS, k=words_per_chunk)) for _ in range(n)]
+
+
+def bench(label: str, fn, n: int):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {n / elapsed:10.1f} chunks/sec  ({elapsed:.2f}s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+
+    # Warm up the model so the first timing does not include lazy init
+    EmbeddingService.embed_batch(chunks[:8])
+
+    before = bench(
+        "per-chunk get_embedding",
+        lambda: [EmbeddingService.get_embedding(c) for c in chunks],
+        len(chunks),
+    )
+    after = bench(
+        f"embed_batch (bs={args.batch_size})",
+        lambda: EmbeddingService.embed_batch(chunks, batch_size=args.batch_size),
+        len(chunks),
+    )
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Add chunk SimHash band table
+
+Revision ID: a6c3d8e21f57
+Revises: e82b4c6f1a03
+Create Date: 2026-10-17 18:00:00.000000
+
+One row per (canonical chunk, SimHash band), indexed by (owner_id,
+width, band, key), so near-duplicate lookup at ingest only reads the
+chunks that share a band with the new ones instead of every simhash
+the owner has. Existing canonical chunks are backfilled for
+DEDUP_SIMHASH_DISTANCE (read below, default 3); the app writes and
+queries bands of that width, so changing it needs this backfill rerun.
+"""
+import os
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c3d8e21f57'
+down_revision: Union[str, None] = 'e82b4c6f1a03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'chunk_simhash_bands',
+        sa.Column('chunk_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('width', sa.SmallInteger(), nullable=False),
+        sa.Column('band', sa.SmallInteger(), nullable=False),
+        sa.Column('key', sa.BigInteger(), nullable=False),
+        sa.Column('owner_id', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['chunk_id'], ['chunks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('chunk_id', 'width', 'band'),
+    )
+
+    distance = int(os.getenv("DEDUP_SIMHASH_DISTANCE", "3"))
+    if distance > 0:
+        # Same split as dedup.simhash_bands(); bigint >> is arithmetic,
+        # but the mask keeps only the band's own bits
+        bands = distance + 1
+        width = 64 // bands
+        op.execute(
+            f"""
+            INSERT INTO chunk_simhash_bands (chunk_id, width, band, key, owner_id)
+            SELECT c.id, {width}, b, (c.simhash >> (b * {width})) & {(1 << width) - 1}, c.owner_id
+            FROM chunks c CROSS JOIN generate_series(0, {bands - 1}) AS b
+            WHERE c.simhash IS NOT NULL
+              AND c.canonical_chunk_id IS NULL
+              AND c.embedding IS NOT NULL
+            """
+        )
+
+    op.create_index(
+        'ix_chunk_bands_lookup', 'chunk_simhash_bands',
+        ['owner_id', 'width', 'band', 'key'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunk_bands_lookup', table_name='chunk_simhash_bands')
+    op.drop_table('chunk_simhash_bands')
@@ -0,0 +1,47 @@
+"""Add ANN index on chunk embedding
+
+Revision ID: b7d2c91a4e10
+Revises: f4f89199e52d
+Create Date: 2026-10-17 09:00:00.000000
+
+Builds the index used by PgVectorSearchBackend (VECTOR_BACKEND=pgvector).
+PGVECTOR_INDEX_TYPE selects HNSW (default) or IVFFlat; build parameters
+can be overridden with the env vars read below. Query-time recall is
+tuned with PGVECTOR_EF_SEARCH / PGVECTOR_PROBES.
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2c91a4e10'
+down_revision: Union[str, None] = 'f4f89199e52d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_chunks_embedding_ann"
+
+
+def upgrade() -> None:
+    index_type = os.getenv("PGVECTOR_INDEX_TYPE", "hnsw")
+
+    if index_type == "ivfflat":
+        # lists ~ rows / 1000 up to 1M rows; build after data is loaded
+        lists = int(os.getenv("PGVECTOR_IVFFLAT_LISTS", "100"))
+        using = f"ivfflat (embedding vector_l2_ops) WITH (lists = {lists})"
+    else:
+        m = int(os.getenv("PGVECTOR_HNSW_M", "16"))
+        ef_construction = int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", "64"))
+        using = f"hnsw (embedding vector_l2_ops) WITH (m = {m}, ef_construction = {ef_construction})"
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON chunks USING {using}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
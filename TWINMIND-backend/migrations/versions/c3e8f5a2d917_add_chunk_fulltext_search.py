@@ -0,0 +1,39 @@
+"""Add chunk full-text search
+
+Revision ID: c3e8f5a2d917
+Revises: b7d2c91a4e10
+Create Date: 2026-10-17 10:00:00.000000
+
+Generated tsvector column over chunks.content plus a GIN index, used by
+LexicalSearchService for ranked keyword search.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f5a2d917'
+down_revision: Union[str, None] = 'b7d2c91a4e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Must match TS_CONFIG in app/models/chunk.py
+    op.execute(
+        "ALTER TABLE chunks ADD COLUMN IF NOT EXISTS content_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED"
+    )
+
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chunks_content_tsv "
+            "ON chunks USING gin (content_tsv)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_chunks_content_tsv")
+    op.execute("ALTER TABLE chunks DROP COLUMN IF EXISTS content_tsv")
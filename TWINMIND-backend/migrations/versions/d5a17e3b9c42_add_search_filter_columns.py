@@ -0,0 +1,74 @@
+"""Add structured search filter columns
+
+Revision ID: d5a17e3b9c42
+Revises: c3e8f5a2d917
+Create Date: 2026-10-17 11:00:00.000000
+
+documents gain owner_id / source; chunks get denormalized copies of
+owner_id, modality and source so vector and full-text searches can
+filter without a join. Existing rows are backfilled from the free-form
+doc_metadata ("uploaded_by:<user>;source_url:<url>") and file_path.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a17e3b9c42'
+down_revision: Union[str, None] = 'c3e8f5a2d917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('owner_id', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('source', sa.String(), nullable=True))
+    op.create_index('ix_documents_owner_id', 'documents', ['owner_id'])
+
+    op.add_column('chunks', sa.Column('owner_id', sa.String(), nullable=True))
+    op.add_column('chunks', sa.Column('modality', sa.String(length=16), nullable=True))
+    op.add_column('chunks', sa.Column('source', sa.String(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE documents SET
+            owner_id = substring(doc_metadata from 'uploaded_by:([^;]*)'),
+            source = coalesce(substring(doc_metadata from 'source_url:([^;]*)'), file_path, title)
+        """
+    )
+    op.execute(
+        """
+        UPDATE chunks c SET
+            owner_id = d.owner_id,
+            modality = lower(d.modality::text),
+            source = d.source
+        FROM documents d
+        WHERE c.document_id = d.id
+        """
+    )
+
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chunks_owner_created "
+            "ON chunks (owner_id, created_at)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chunks_modality "
+            "ON chunks (modality)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_chunks_modality")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_chunks_owner_created")
+
+    op.drop_column('chunks', 'source')
+    op.drop_column('chunks', 'modality')
+    op.drop_column('chunks', 'owner_id')
+
+    op.drop_index('ix_documents_owner_id', table_name='documents')
+    op.drop_column('documents', 'source')
+    op.drop_column('documents', 'owner_id')
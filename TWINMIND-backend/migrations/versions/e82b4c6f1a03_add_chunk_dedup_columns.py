@@ -0,0 +1,64 @@
+"""Add chunk dedup fingerprints
+
+Revision ID: e82b4c6f1a03
+Revises: d5a17e3b9c42
+Create Date: 2026-10-17 13:00:00.000000
+
+chunks gain content_hash (sha256 of the normalized content), simhash and
+canonical_chunk_id. content_hash is backfilled with the same
+normalization as app/services/ingestion/dedup.py, so new uploads match
+existing chunks exactly. simhash is only computed for new chunks, and
+duplicates already stored are left as they are.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e82b4c6f1a03'
+down_revision: Union[str, None] = 'd5a17e3b9c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('chunks', sa.Column('simhash', sa.BigInteger(), nullable=True))
+    op.add_column('chunks', sa.Column('canonical_chunk_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'fk_chunks_canonical_chunk_id', 'chunks', 'chunks',
+        ['canonical_chunk_id'], ['id'], ondelete='SET NULL',
+    )
+
+    op.execute(
+        r"""
+        UPDATE chunks SET content_hash = encode(
+            sha256(convert_to(lower(btrim(regexp_replace(content, '\s+', ' ', 'g'))), 'UTF8')),
+            'hex'
+        )
+        """
+    )
+
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chunks_owner_hash "
+            "ON chunks (owner_id, content_hash)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chunks_canonical "
+            "ON chunks (canonical_chunk_id)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_chunks_canonical")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_chunks_owner_hash")
+
+    op.drop_constraint('fk_chunks_canonical_chunk_id', 'chunks', type_='foreignkey')
+    op.drop_column('chunks', 'canonical_chunk_id')
+    op.drop_column('chunks', 'simhash')
+    op.drop_column('chunks', 'content_hash')
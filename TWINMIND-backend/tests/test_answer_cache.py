@@ -0,0 +1,115 @@
+"""
+Semantic answer cache: the similarity threshold, the exact chunk-set
+match, and invalidation through the sync target interface.
+"""
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.answer_cache import AnswerCache
+
+QUERY = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+
+def _at_cosine(cos, scale=3.0):
+    """A vector with the given cosine to QUERY, not unit length."""
+    return scale * np.array([cos, np.sqrt(1 - cos * cos), 0.0], dtype=np.float32)
+
+
+def _chunk(document_id=None, source="notes.pdf"):
+    return SimpleNamespace(id=uuid.uuid4(), document_id=document_id or uuid.uuid4(), source=source)
+
+
+@pytest.fixture
+def cache():
+    return AnswerCache(max_entries=10, similarity=0.95, ttl_seconds=0)
+
+
+@pytest.fixture
+def chunks():
+    return [_chunk(), _chunk()]
+
+
+def test_hit_above_the_threshold_and_miss_below(cache, chunks):
+    cache.put(QUERY, chunks, "answer")
+
+    assert cache.get(_at_cosine(0.951), chunks) == "answer"
+    assert cache.get(_at_cosine(0.949), chunks) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_best_match_wins(cache, chunks):
+    cache.put(_at_cosine(0.96), chunks, "close")
+    cache.put(_at_cosine(0.99), chunks, "closer")
+
+    assert cache.get(QUERY, chunks) == "closer"
+
+
+def test_chunk_set_must_match_exactly(cache, chunks):
+    cache.put(QUERY, chunks, "answer")
+
+    # Order and the id type don't matter; membership does
+    same = [SimpleNamespace(id=str(c.id)) for c in reversed(chunks)]
+    assert cache.get(QUERY, same) == "answer"
+    assert cache.get(QUERY, chunks[:1]) is None
+    assert cache.get(QUERY, chunks + [_chunk()]) is None
+
+
+def test_zero_or_missing_embedding_is_never_cached(cache, chunks):
+    cache.put(np.zeros(3), chunks, "answer")
+    cache.put(None, chunks, "answer")
+    cache.put(QUERY, [], "answer")
+
+    assert cache.stats()["entries"] == 0
+    assert cache.get(np.zeros(3), chunks) is None
+
+
+def test_removed_chunk_drops_the_entries_that_used_it(cache, chunks):
+    other = [_chunk()]
+    cache.put(QUERY, chunks, "uses removed")
+    cache.put(QUERY, other, "unrelated")
+
+    assert cache.remove_chunks([chunks[1].id]) == 1
+
+    assert cache.get(QUERY, chunks) is None
+    assert cache.get(QUERY, other) == "unrelated"
+    assert cache.remove_chunks([]) == 0
+
+
+def test_added_chunks_drop_entries_of_the_same_source_or_document(cache):
+    document = uuid.uuid4()
+    by_source = [_chunk(source="notes.pdf")]
+    by_document = [_chunk(document_id=document, source=None)]
+    unrelated = [_chunk(source="other.pdf")]
+    for chunks, answer in ((by_source, "source"), (by_document, "document"), (unrelated, "unrelated")):
+        cache.put(QUERY, chunks, answer)
+
+    # Re-ingest: new chunks for an existing source and document
+    added = [
+        (SimpleNamespace(source="notes.pdf", document_id=uuid.uuid4()), None),
+        (SimpleNamespace(source=None, document_id=document), None),
+    ]
+    assert cache.add_entries(added) == 2
+
+    assert cache.get(QUERY, by_source) is None
+    assert cache.get(QUERY, by_document) is None
+    assert cache.get(QUERY, unrelated) == "unrelated"
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_lru_eviction_and_disabled_cache(chunks):
+    cache = AnswerCache(max_entries=2, similarity=0.95, ttl_seconds=0)
+    first, second, third = [_chunk()], [_chunk()], [_chunk()]
+    cache.put(QUERY, first, "first")
+    cache.put(QUERY, second, "second")
+    assert cache.get(QUERY, first) == "first"   # now most recently used
+    cache.put(QUERY, third, "third")
+
+    assert cache.get(QUERY, second) is None
+    assert cache.get(QUERY, first) == "first"
+
+    disabled = AnswerCache(max_entries=0, similarity=0.95, ttl_seconds=0)
+    disabled.put(QUERY, chunks, "answer")
+    assert disabled.get(QUERY, chunks) is None
@@ -0,0 +1,132 @@
+"""
+Binary COPY encoding of chunk rows, checked byte by byte against rows
+built by hand from the PostgreSQL / pgvector wire formats.
+"""
+import struct
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.ingestion import chunk_writer
+
+HEADER = bytes.fromhex("5047434f50590aff0d0a00" "00000000" "00000000")
+TRAILER = bytes.fromhex("ffff")
+NULL = bytes.fromhex("ffffffff")
+
+
+def _row(**values):
+    fields = dict.fromkeys(chunk_writer.COLUMNS)
+    fields.update(values)
+    return SimpleNamespace(**fields)
+
+
+KNOWN = _row(
+    id=uuid.UUID(int=1),
+    document_id="00000000-0000-0000-0000-000000000002",
+    chunk_index=3,
+    content="héllo",
+    embedding=[1.0, -2.5],
+    created_at=datetime(2000, 1, 2, 0, 0, 0, 5),
+    owner_id="u1",
+    source="s",
+    content_hash="ab",
+    simhash=-1,
+)
+
+KNOWN_BYTES = b"".join([
+    bytes.fromhex("000d"),                                          # 13 fields
+    bytes.fromhex("00000010" "00000000000000000000000000000001"),   # id
+    bytes.fromhex("00000010" "00000000000000000000000000000002"),   # document_id
+    bytes.fromhex("00000004" "00000003"),                           # chunk_index
+    bytes.fromhex("00000006") + "héllo".encode("utf-8"),            # content
+    NULL,                                                           # tokens
+    bytes.fromhex("0000000c" "0002" "0000" "3f800000" "c0200000"),  # embedding
+    bytes.fromhex("00000008" "000000141dd76005"),                   # created_at
+    bytes.fromhex("00000002") + b"u1",                              # owner_id
+    NULL,                                                           # modality
+    bytes.fromhex("00000001") + b"s",                               # source
+    bytes.fromhex("00000002") + b"ab",                              # content_hash
+    bytes.fromhex("00000008" "ffffffffffffffff"),                   # simhash
+    NULL,                                                           # canonical_chunk_id
+])
+
+
+def test_known_row_encodes_byte_for_byte():
+    assert chunk_writer.encode_copy([KNOWN]) == HEADER + KNOWN_BYTES + TRAILER
+
+
+def test_no_rows_is_header_and_trailer():
+    assert chunk_writer.encode_copy([]) == HEADER + TRAILER
+
+
+def test_timestamps_are_microseconds_since_2000():
+    # One day and 5 us after the PostgreSQL epoch, as above
+    assert 0x141DD76005 == 86_400_000_005
+
+    aware = datetime(2000, 1, 2, 1, 0, 0, 5, tzinfo=timezone(timedelta(hours=1)))
+    before_epoch = datetime(1999, 12, 31, 23, 59, 59, 999_999)
+
+    assert chunk_writer._timestamp(aware) == bytes.fromhex("00000008" "000000141dd76005")
+    assert chunk_writer._timestamp(before_epoch) == bytes.fromhex("00000008" "ffffffffffffffff")
+
+
+def _decode(data):
+    """Minimal binary COPY reader: rows of raw field bytes (None for NULL)."""
+    assert data[:len(HEADER)] == HEADER
+    pos = len(HEADER)
+    rows = []
+    while True:
+        (count,) = struct.unpack_from(">h", data, pos)
+        pos += 2
+        if count == -1:
+            assert pos == len(data)
+            return rows
+        row = []
+        for _ in range(count):
+            (size,) = struct.unpack_from(">i", data, pos)
+            pos += 4
+            if size == -1:
+                row.append(None)
+                continue
+            row.append(data[pos:pos + size])
+            pos += size
+        rows.append(row)
+
+
+def test_rows_round_trip():
+    rng = np.random.default_rng(0)
+    chunks = [
+        _row(
+            id=uuid.uuid4(), document_id=uuid.uuid4(), chunk_index=i, content=f"chunk {i} ✓",
+            tokens=i * 7, embedding=rng.standard_normal(384).astype(np.float32),
+            created_at=datetime(2026, 1, 1) + timedelta(microseconds=i), owner_id="u1",
+            modality="text", source="s", content_hash=f"{i:064x}", simhash=(-1) ** i * i << 40,
+            canonical_chunk_id=uuid.uuid4() if i % 2 else None,
+        )
+        for i in range(5)
+    ]
+
+    rows = _decode(chunk_writer.encode_copy(chunks))
+
+    assert len(rows) == len(chunks)
+    for c, row in zip(chunks, rows):
+        fields = dict(zip(chunk_writer.COLUMNS, row))
+        assert uuid.UUID(bytes=fields["id"]) == c.id
+        assert uuid.UUID(bytes=fields["document_id"]) == c.document_id
+        assert struct.unpack(">i", fields["chunk_index"]) == (c.chunk_index,)
+        assert fields["content"].decode("utf-8") == c.content
+        assert struct.unpack(">i", fields["tokens"]) == (c.tokens,)
+
+        dim, unused = struct.unpack_from(">hh", fields["embedding"])
+        assert (dim, unused) == (384, 0)
+        assert np.array_equal(np.frombuffer(fields["embedding"], ">f4", offset=4), c.embedding)
+
+        (micros,) = struct.unpack(">q", fields["created_at"])
+        assert datetime(2000, 1, 1) + timedelta(microseconds=micros) == c.created_at
+        assert struct.unpack(">q", fields["simhash"]) == (c.simhash,)
+        if c.canonical_chunk_id is None:
+            assert fields["canonical_chunk_id"] is None
+        else:
+            assert uuid.UUID(bytes=fields["canonical_chunk_id"]) == c.canonical_chunk_id
@@ -0,0 +1,81 @@
+"""
+Incremental chunking: however the text is split into blocks, feed() and
+finish() must give the chunks of the whole text.
+"""
+import random
+
+import pytest
+
+from app.utils import chunking
+
+SIZE = 120
+OVERLAP = 30
+
+
+def _document():
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(40)]
+    parts = []
+    for section in range(6):
+        parts.append(f"## Section {section}\n\n")
+        for _ in range(rng.randint(2, 5)):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+            parts.append(sentence + rng.choice([". ", "! ", "? ", ".\n", ".\n\n"]))
+        parts.append("\n\n")
+    # A "word" longer than a chunk, then a short remainder
+    parts.append("x" * (SIZE * 2) + ".\n\nEnd.")
+    return "".join(parts)
+
+
+TEXT = _document()
+
+
+def _splits(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, 40)))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+def _chunks(blocks, strategy):
+    return list(chunking.iter_chunks(blocks, strategy=strategy, chunk_size=SIZE, overlap=OVERLAP))
+
+
+@pytest.mark.parametrize("strategy", ["fixed", "sentence", "markdown"])
+def test_any_split_gives_the_chunks_of_the_whole_text(strategy):
+    whole = _chunks([TEXT], strategy)
+    assert len(whole) > 3
+
+    rng = random.Random(strategy)
+    for _ in range(50):
+        assert _chunks(_splits(TEXT, rng), strategy) == whole
+    assert _chunks(list(TEXT), strategy) == whole
+
+
+@pytest.mark.parametrize("strategy", ["fixed", "sentence", "markdown"])
+def test_no_chunk_is_over_size(strategy):
+    chunks = _chunks(_splits(TEXT, random.Random(1)), strategy)
+
+    assert all(len(chunk) <= SIZE for chunk in chunks)
+    assert all(chunk == chunk.strip() and chunk for chunk in chunks)
+
+
+def test_short_remainder_is_kept(monkeypatch):
+    monkeypatch.setattr(chunking.settings, "CHUNK_MIN_CHARS", 10)
+
+    assert chunking.chunk_text("hi", strategy="sentence") == ["hi"]
+    assert _chunks(["h", "i"], "sentence") == ["hi"]
+    # The tail after a full chunk is kept too, short or not
+    assert _chunks(_splits(TEXT, random.Random(2)), "sentence")[-1].endswith("End.")
+
+
+def test_short_chunks_before_the_end_are_dropped(monkeypatch):
+    monkeypatch.setattr(chunking.settings, "CHUNK_MIN_CHARS", 10)
+    chunker = chunking.get_chunker("markdown", chunk_size=SIZE, overlap=0)
+
+    chunks = chunker.feed("# A\n\nok\n\n# B\n\n") + chunker.feed("long enough body") + chunker.finish()
+
+    assert chunks == ["# B\n\nlong enough body"]
+
+
+def test_empty_input_gives_no_chunks():
+    assert chunking.chunk_text("", strategy="sentence") == []
+    assert _chunks(["", "  \n\n ", ""], "sentence") == []
@@ -0,0 +1,133 @@
+"""
+Dedup fingerprints and promotion of duplicates when their canonical
+chunk is deleted, against a fake session.
+"""
+import threading
+import uuid
+from contextlib import nullcontext
+from datetime import datetime
+
+import pytest
+
+from app.models.chunk import Chunk
+from app.services.ingestion import dedup
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *criteria):
+        return self
+
+    def order_by(self, *columns):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows=(), deleted=()):
+        self.rows = list(rows)
+        self.deleted = list(deleted)
+        self.info = {}
+        self.executed = []
+        self.no_autoflush = nullcontext()
+
+    def query(self, *entities):
+        return FakeQuery(self.rows)
+
+    def execute(self, stmt, rows=None):
+        self.executed.append(rows)
+
+
+def _chunk(text, canonical=None, embedding=None):
+    return Chunk(
+        id=uuid.uuid4(), document_id=uuid.uuid4(), chunk_index=0, content=text,
+        created_at=datetime(2026, 1, 1), owner_id="u1",
+        content_hash=dedup.content_hash(text), simhash=dedup.simhash(text),
+        canonical_chunk_id=canonical.id if canonical else None, embedding=embedding,
+    )
+
+
+# 300 distinct-ish words; editing one changes ~3 of ~300 shingles
+_WORDS = [f"w{(i * 7919) % 1000}" for i in range(300)]
+TEXT = " ".join(_WORDS)
+EDITED = " ".join(_WORDS[:150] + ["edited"] + _WORDS[151:])
+
+
+@pytest.fixture(autouse=True)
+def no_model(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the model must not run inside a flush")
+
+    monkeypatch.setattr(dedup.EmbeddingService, "embed_batch", fail)
+
+
+def test_near_duplicates_are_within_the_simhash_distance():
+    distance = bin((dedup.simhash(TEXT) ^ dedup.simhash(EDITED)) & dedup.MASK64).count("1")
+    assert 0 < distance <= dedup.settings.DEDUP_SIMHASH_DISTANCE
+
+    index = dedup.SimHashIndex(dedup.settings.DEDUP_SIMHASH_DISTANCE)
+    index.add(dedup.simhash(TEXT), "canonical")
+    assert index.find(dedup.simhash(EDITED)) == "canonical"
+
+
+def test_identical_duplicate_takes_over_with_the_old_embedding():
+    canonical = _chunk(TEXT, embedding=[0.1] * 4)
+    exact = _chunk(TEXT, canonical=canonical)
+    near = _chunk(EDITED, canonical=canonical)
+    db = FakeSession(rows=[exact, near])
+
+    promoted, to_embed = dedup.promote_duplicates(db, [canonical])
+
+    assert promoted == [exact] and to_embed == []
+    assert exact.canonical_chunk_id is None
+    assert exact.embedding == [0.1] * 4
+    assert near.canonical_chunk_id == exact.id
+    # Band rows written for the new canonical
+    assert {row["chunk_id"] for row in db.executed[0]} == {exact.id}
+
+
+def test_near_duplicate_is_embedded_after_commit(monkeypatch):
+    canonical = _chunk(TEXT, embedding=[0.1] * 4)
+    near = _chunk(EDITED, canonical=canonical)
+    db = FakeSession(rows=[near], deleted=[canonical])
+
+    dedup._promote_on_delete(db, None, None)
+
+    assert near.canonical_chunk_id is None
+    assert near.embedding is None
+    assert db.info[dedup._PENDING_EMBED] == [near.id]
+    assert db.executed == []
+
+    embedded = []
+    done = threading.Event()
+
+    def fake_embed(chunk_ids):
+        embedded.extend(chunk_ids)
+        done.set()
+
+    monkeypatch.setattr(dedup, "embed_promoted", fake_embed)
+    dedup._embed_after_commit(db)
+
+    assert done.wait(5)
+    assert embedded == [near.id]
+    assert dedup._PENDING_EMBED not in db.info
+
+
+def test_rollback_drops_pending_embeds():
+    db = FakeSession()
+    db.info[dedup._PENDING_EMBED] = [uuid.uuid4()]
+
+    dedup._discard_pending_embed(db)
+
+    assert dedup._PENDING_EMBED not in db.info
+
+
+def test_deleting_a_duplicate_promotes_nothing():
+    canonical = _chunk(TEXT, embedding=[0.1] * 4)
+    duplicate = _chunk(TEXT, canonical=canonical)
+
+    assert dedup.promote_duplicates(FakeSession(), [duplicate]) == ([], [])
@@ -0,0 +1,177 @@
+"""
+LabelAttributes over a snapshot base plus an in-memory tail, checked
+against a brute-force model of the same rows: id lookup, filter masks
+and the IDSelectorBitmap built from them.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pytest
+
+from app.services import faiss_snapshot
+from app.services.faiss_filters import ChunkRows, LabelAttributes
+from app.services.faiss_snapshot import uuid_keys
+from app.services.vector_store import SearchFilters
+
+START = datetime(2026, 1, 1)
+OWNERS = ["u0", "u1", "u2", None]
+MODALITIES = ["text", "image", None]
+
+
+def _entry(rng, owners=OWNERS, sources=("a.pdf", "b.pdf", None)):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        document_id=uuid.UUID(int=rng.randrange(8)),
+        chunk_index=rng.randrange(100),
+        created_at=None if rng.random() < 0.1 else START + timedelta(hours=rng.randrange(240)),
+        owner_id=rng.choice(owners),
+        modality=rng.choice(MODALITIES),
+        source=rng.choice(sources),
+    )
+
+
+class Model:
+    """label -> entry for live labels, the brute-force reference."""
+
+    def __init__(self, attrs):
+        self.attrs = attrs
+        self.live = {}
+
+    def set(self, labels, entries):
+        self.attrs.set(labels, ChunkRows.from_entries(entries))
+        self.live.update(zip(labels, entries))
+
+    def clear(self, labels):
+        self.attrs.clear(labels)
+        for label in labels:
+            self.live.pop(label, None)
+
+
+def _snapshot_base(tmp_path, rng):
+    """
+    LabelAttributes over a written snapshot of 300 rows (some removed
+    before the write), plus the model of what it holds.
+    """
+    model = Model(LabelAttributes())
+    model.set(list(range(300)), [_entry(rng) for _ in range(300)])
+    model.clear(rng.sample(range(300), 40))
+
+    capture = faiss_snapshot.Capture(faiss.IndexFlatL2(4), model.attrs)
+    path = faiss_snapshot.write_snapshot(str(tmp_path), capture, next_label=300)
+    segment = faiss_snapshot.SnapshotSegment(path, capture.vocab)
+
+    model.attrs = LabelAttributes.from_segment(segment)
+    return model
+
+
+@pytest.fixture
+def model(tmp_path):
+    rng = random.Random(0)
+    model = _snapshot_base(tmp_path, rng)
+    assert isinstance(model.attrs._base["live"], np.memmap)
+
+    # Removals from the mapped base, then rows past it: new chunks with
+    # new vocabulary values, and base chunks re-added under new labels
+    model.clear(rng.sample(sorted(model.live), 30))
+    readded = rng.sample(sorted(model.live), 10)
+    moved = [model.live[label] for label in readded]
+    model.clear(readded)
+
+    fresh = [_entry(rng, owners=OWNERS + ["u9"], sources=("c.pdf", None)) for _ in range(90)]
+    model.set(list(range(300, 400)), fresh + moved)
+    model.clear(rng.sample(range(300, 400), 15))
+    return model
+
+
+def test_base_and_tail_merge_into_one_label_space(model):
+    attrs = model.attrs
+    assert attrs.base_size == 300
+    assert attrs.size == 400
+
+    assert sorted(attrs.live_labels().tolist()) == sorted(model.live)
+    for label in range(attrs.size):
+        assert attrs.is_live(label) == (label in model.live)
+
+    labels = np.array(sorted(model.live))
+    expected = [model.live[label] for label in labels]
+    assert attrs.column("chunk_index", labels).tolist() == [e.chunk_index for e in expected]
+    for name in ("owner_id", "modality", "source"):
+        codes = attrs.column(name, labels)
+        values = [attrs.vocab[name].values[c] if c >= 0 else None for c in codes]
+        assert values == [getattr(e, name) for e in expected]
+
+    for label in (0, 150, 320, 399):
+        entry = attrs.entry(label, SimpleNamespace)
+        if label not in model.live:
+            assert entry is None
+            continue
+        assert entry.id == model.live[label].id
+        assert entry.created_at == model.live[label].created_at
+
+
+def test_export_folds_removals_into_live(model):
+    columns = model.attrs.export()
+
+    assert len(columns["live"]) == 400
+    assert np.flatnonzero(columns["live"]).tolist() == sorted(model.live)
+    assert not isinstance(columns["live"], np.memmap)
+
+
+def test_lookup_finds_live_labels_by_chunk_id(model):
+    attrs = model.attrs
+    by_id = {entry.id: label for label, entry in model.live.items()}
+    unknown = [uuid.uuid4() for _ in range(5)]
+    ids = list(by_id) + unknown
+    random.Random(1).shuffle(ids)
+
+    labels = attrs.lookup(uuid_keys(ids))
+
+    assert labels.tolist() == [by_id.get(i, -1) for i in ids]
+    assert attrs.lookup(uuid_keys([])).tolist() == []
+
+
+def test_lookup_follows_removals_after_the_sorted_index_is_built(model):
+    attrs = model.attrs
+    label = max(model.live)
+    chunk_id = model.live[label].id
+    assert attrs.lookup(uuid_keys([chunk_id])).tolist() == [label]
+
+    model.clear([label])
+    assert attrs.lookup(uuid_keys([chunk_id])).tolist() == [-1]
+
+    model.set([400], [SimpleNamespace(**{**vars(model.live[min(model.live)]), "id": chunk_id})])
+    assert attrs.lookup(uuid_keys([chunk_id])).tolist() == [400]
+
+
+FILTERS = [
+    SearchFilters(),
+    SearchFilters(owner_id="u1"),
+    SearchFilters(owner_id="u9"),
+    SearchFilters(owner_id="nobody"),
+    SearchFilters(modality="image", source="a.pdf"),
+    SearchFilters(source="c.pdf"),
+    SearchFilters(start_date=START + timedelta(hours=50)),
+    SearchFilters(end_date=START + timedelta(hours=100), owner_id="u0"),
+    SearchFilters(start_date=START + timedelta(hours=10), end_date=START + timedelta(hours=20)),
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=lambda f: repr(vars(f)))
+def test_mask_and_bitmap_match_brute_force(model, filters):
+    attrs = model.attrs
+    expected = sorted(label for label, entry in model.live.items() if filters.matches(entry))
+
+    mask = attrs.mask(filters)
+    assert np.flatnonzero(mask).tolist() == expected
+
+    bitmap = LabelAttributes.bitmap(mask)
+    assert len(bitmap) == (attrs.size + 7) // 8
+    bits = [label for label in range(8 * len(bitmap)) if bitmap[label >> 3] >> (label & 7) & 1]
+    assert bits == expected
+
+    selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+    assert [label for label in range(attrs.size) if selector.is_member(label)] == expected
@@ -0,0 +1,127 @@
+"""
+FAISS snapshots: write, memory-mapped load, and writes after load.
+"""
+import threading
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.services import faiss_service as faiss_module
+from app.services import faiss_snapshot
+from app.services.faiss_service import FaissService, IndexedChunk
+
+DIM = faiss_module.EmbeddingService.get_dim()
+
+
+def _items(n, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.random((n, DIM), dtype=np.float32)
+    return [
+        (
+            IndexedChunk(
+                id=uuid.uuid4(), document_id=uuid.uuid4(), chunk_index=i, content=None,
+                created_at=datetime(2026, 1, 1), owner_id="u1", modality="text", source="s",
+            ),
+            vectors[i],
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def ivf(monkeypatch):
+    # IVF lists are what FAISS actually memory-maps
+    monkeypatch.setattr(faiss_module.settings, "FAISS_INDEX_FACTORY", "IVF4,Flat")
+    monkeypatch.setattr(faiss_module.settings, "FAISS_MIN_TRAIN_SIZE", 100)
+    monkeypatch.setattr(faiss_module.settings, "FAISS_IVF_NPROBE", 4)
+
+
+def _built(items):
+    service = FaissService()
+    service._replace_all(*service._prepare(items))
+    return service
+
+
+def test_mapped_index_stays_writable_after_its_snapshot_is_pruned(ivf, tmp_path):
+    items = _items(400)
+    writer = _built(items)
+    writer.save_snapshot(str(tmp_path), force=True)
+
+    reader = FaissService()
+    assert reader.load_snapshot(str(tmp_path)) is not None
+    assert reader._index_readonly
+    loaded_from = faiss_snapshot.current_path(str(tmp_path))
+
+    # Two newer snapshots prune the one the reader mapped
+    writer.save_snapshot(str(tmp_path), force=True)
+    writer.save_snapshot(str(tmp_path), force=True)
+    assert not (tmp_path / loaded_from.rsplit("/", 1)[-1]).exists()
+
+    extra = _items(1, seed=1)
+    reader.add_entries(extra)
+    reader.remove_chunks([items[0][0].id])
+
+    assert not reader._index_readonly
+    assert len(reader) == 400
+    hits = reader.search(extra[0][1], top_k=1)
+    assert hits[0][0].id == extra[0][0].id
+    hits = reader.search(items[5][1], top_k=1)
+    assert hits[0][0].id == items[5][0].id
+
+
+def test_snapshot_is_written_outside_the_index_lock(ivf, tmp_path, monkeypatch):
+    items = _items(200)
+    service = _built(items)
+    write = faiss_snapshot.write_snapshot
+    searched = []
+
+    def write_while_searching(*args, **kwargs):
+        # A search from another thread must not wait for the disk write
+        thread = threading.Thread(target=lambda: searched.append(service.search(items[3][1], top_k=1)))
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        return write(*args, **kwargs)
+
+    monkeypatch.setattr(faiss_snapshot, "write_snapshot", write_while_searching)
+    assert service.save_snapshot(str(tmp_path)) is not None
+    assert searched[0][0][0].id == items[3][0].id
+    assert not service.dirty
+
+    reloaded = FaissService()
+    manifest = reloaded.load_snapshot(str(tmp_path))
+    assert manifest["count"] == 200
+    assert reloaded.search(items[7][1], top_k=1)[0][0].id == items[7][0].id
+
+
+def test_warm_start_serves_the_snapshot_while_reconciling(ivf, tmp_path, monkeypatch):
+    items = _items(200)
+    _built(items).save_snapshot(str(tmp_path), force=True)
+
+    release = threading.Event()
+    finished = threading.Event()
+
+    class Session:
+        def close(self):
+            pass
+
+    def slow_reconcile(db):
+        release.wait(5)
+        finished.set()
+        return 0, 0
+
+    service = FaissService()
+    monkeypatch.setattr(faiss_module, "SessionLocal", Session)
+    monkeypatch.setattr(service, "reconcile_with_db", slow_reconcile)
+
+    service.warm_start(db=None, root=str(tmp_path))
+
+    # Searchable before the DB scan is done; no rebuild can start meanwhile
+    assert not finished.is_set()
+    assert service.stats()["rebuilding"]
+    assert service.search(items[9][1], top_k=1)[0][0].id == items[9][0].id
+
+    release.set()
+    assert finished.wait(5)
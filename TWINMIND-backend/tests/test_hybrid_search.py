@@ -0,0 +1,147 @@
+"""
+Hybrid retrieval: reciprocal rank fusion, and the per-leg budgets of
+hybrid_search() with the lexical and vector legs faked.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm import query_service
+
+
+def _chunk(name):
+    return SimpleNamespace(id=name)
+
+
+A, B, C, D = (_chunk(name) for name in "abcd")
+
+
+def _ids(results):
+    return [chunk.id for chunk, _ in results]
+
+
+def test_fusion_sums_weighted_reciprocal_ranks():
+    lexical = [(A, 9.0), (B, 5.0), (C, 1.0)]
+    vector = [(C, 0.1), (A, 0.2), (D, 0.3)]
+
+    fused = dict((chunk.id, score) for chunk, score in
+                 query_service.reciprocal_rank_fusion([lexical, vector], [1.0, 0.5], k=10))
+
+    assert fused == pytest.approx({
+        "a": 1 / 11 + 0.5 / 12,
+        "b": 1 / 12,
+        "c": 1 / 13 + 0.5 / 11,
+        "d": 0.5 / 13,
+    })
+
+
+def test_fusion_orders_best_first_and_ignores_raw_scores():
+    # Raw scores (lexical ranks vs L2 distances) never enter the fusion
+    lexical = [(A, 0.0), (B, 1000.0)]
+    vector = [(B, 0.0), (C, -5.0)]
+
+    fused = query_service.reciprocal_rank_fusion([lexical, vector], [1.0, 1.0], k=60)
+
+    assert _ids(fused) == ["b", "a", "c"]
+    scores = [score for _, score in fused]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_fusion_keeps_one_entry_per_chunk_id():
+    same_a = _chunk("a")
+
+    fused = query_service.reciprocal_rank_fusion([[(A, 1)], [(same_a, 1)]], [1.0, 1.0], k=0)
+
+    assert _ids(fused) == ["a"]
+    assert fused[0][0] is A
+    assert fused[0][1] == pytest.approx(2.0)
+
+
+class Legs:
+    """Fake lexical / vector legs; each may return, sleep or fail."""
+
+    def __init__(self, lexical=(), vector=()):
+        self.results = {"lexical": list(lexical), "vector": list(vector)}
+        self.delay = {"lexical": 0.0, "vector": 0.0}
+        self.fail = set()
+        self.calls = []
+
+    def leg(self, name):
+        async def search(query, top_k, filters):
+            self.calls.append((name, top_k))
+            await asyncio.sleep(self.delay[name])
+            if name in self.fail:
+                raise RuntimeError(f"{name} down")
+            return self.results[name]
+        return search
+
+
+@pytest.fixture
+def legs(monkeypatch):
+    fake = Legs(lexical=[(A, 3.0), (B, 2.0)], vector=[(B, 0.1), (C, 0.2)])
+    monkeypatch.setattr(query_service, "lexical_search", fake.leg("lexical"))
+    monkeypatch.setattr(query_service, "semantic_search", fake.leg("vector"))
+    monkeypatch.setattr(query_service.settings, "HYBRID_CANDIDATES", 20)
+    monkeypatch.setattr(query_service.settings, "HYBRID_RRF_K", 60)
+    monkeypatch.setattr(query_service.settings, "HYBRID_LEXICAL_TIMEOUT_MS", 200)
+    monkeypatch.setattr(query_service.settings, "HYBRID_VECTOR_TIMEOUT_MS", 200)
+    return fake
+
+
+def _search(**kwargs):
+    return asyncio.run(query_service.hybrid_search("query", **kwargs))
+
+
+def test_hybrid_search_fuses_both_legs(legs):
+    out = _search(top_k=2)
+
+    assert _ids(out) == ["b", "a"]
+    assert out[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    # Both legs fetch the wider candidate pool
+    assert sorted(legs.calls) == [("lexical", 20), ("vector", 20)]
+
+
+@pytest.mark.parametrize("disabled, kept", [("lexical", ["b", "c"]), ("vector", ["a", "b"])])
+def test_zero_weight_disables_a_leg(legs, disabled, kept):
+    out = _search(top_k=5, **{f"{disabled}_weight": 0})
+
+    assert _ids(out) == kept
+    assert [name for name, _ in legs.calls] == [n for n in ("lexical", "vector") if n != disabled]
+
+
+def test_both_weights_zero_returns_nothing(legs):
+    assert _search(lexical_weight=0, vector_weight=0) == []
+    assert legs.calls == []
+
+
+def test_leg_over_its_budget_is_dropped(legs):
+    legs.delay["vector"] = 1.0
+
+    out = _search(top_k=5)
+
+    assert _ids(out) == ["a", "b"]
+
+
+def test_failing_leg_is_dropped(legs):
+    legs.fail.add("lexical")
+
+    out = _search(top_k=5)
+
+    assert _ids(out) == ["b", "c"]
+
+
+def test_run_leg_returns_empty_on_timeout_or_error():
+    async def slow():
+        await asyncio.sleep(1)
+        return [(A, 1.0)]
+
+    async def broken():
+        raise ValueError("bad query")
+
+    async def fast():
+        return [(A, 1.0)]
+
+    assert asyncio.run(query_service._run_leg("slow", slow(), timeout_ms=10)) == []
+    assert asyncio.run(query_service._run_leg("broken", broken(), timeout_ms=100)) == []
+    assert asyncio.run(query_service._run_leg("fast", fast(), timeout_ms=100)) == [(A, 1.0)]
@@ -0,0 +1,83 @@
+"""
+Ingestion jobs on the local (in-process) backend: no Redis, no database.
+
+Run from TWINMIND-backend/:
+    python -m pytest tests
+"""
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.services.ingestion import jobs
+
+
+class FakeSession:
+    closed = False
+
+    def close(self):
+        FakeSession.closed = True
+
+
+async def _wait_for(job_id, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await jobs.get_job(job_id)
+        if job["status"] in (jobs.SUCCEEDED, jobs.FAILED):
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job stuck in {job['status']}"
+        await asyncio.sleep(0.01)
+
+
+def _run_with_worker(kind, payload):
+    async def scenario():
+        job = await jobs.enqueue(kind, payload)
+        assert (await jobs.get_job(job["id"]))["status"] == jobs.QUEUED
+
+        worker = asyncio.create_task(jobs.worker_loop("test-worker"))
+        try:
+            return await _wait_for(job["id"])
+        finally:
+            worker.cancel()
+
+    return asyncio.run(scenario())
+
+
+def test_local_job_runs_end_to_end(monkeypatch):
+    monkeypatch.setattr(jobs, "_store", jobs.LocalJobStore(ttl_seconds=60))
+    monkeypatch.setattr(jobs, "SessionLocal", FakeSession)
+    FakeSession.closed = False
+
+    seen = {}
+
+    async def handler(payload, db, progress):
+        seen["payload"] = payload
+        await progress(chunks_total=2, chunks_embedded=2)
+        return SimpleNamespace(id=uuid.uuid4(), title=payload["title"]), ["chunk-1", "chunk-2"]
+
+    monkeypatch.setitem(jobs.HANDLERS, "text", handler)
+
+    job = _run_with_worker("text", {"text": "hello", "title": "note", "user_id": "u1"})
+
+    assert job["status"] == jobs.SUCCEEDED
+    assert job["result"]["title"] == "note"
+    assert job["result"]["chunks_created"] == 2
+    assert job["progress"] == {"chunks_total": 2, "chunks_embedded": 2}
+    assert "payload" not in job
+    assert seen["payload"]["text"] == "hello"
+    assert FakeSession.closed
+
+
+def test_local_job_failure_is_reported(monkeypatch):
+    monkeypatch.setattr(jobs, "_store", jobs.LocalJobStore(ttl_seconds=60))
+    monkeypatch.setattr(jobs, "SessionLocal", FakeSession)
+
+    async def handler(payload, db, progress):
+        raise RuntimeError("extraction failed")
+
+    monkeypatch.setitem(jobs.HANDLERS, "web", handler)
+
+    job = _run_with_worker("web", {"url": "https://example.com", "user_id": "u1"})
+
+    assert job["status"] == jobs.FAILED
+    assert job["error"] == "extraction failed"
+    assert job["result"] is None
@@ -0,0 +1,42 @@
+"""
+Full-text query shape: which duplicates are left out.
+"""
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.lexical_search import LexicalSearchService
+
+
+class CapturingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return self
+
+    def all(self):
+        return []
+
+
+def _sql(query):
+    db = CapturingSession()
+    assert asyncio.run(LexicalSearchService.search(db, query, top_k=5)) == []
+    (stmt,) = db.statements
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_only_exact_duplicates_are_left_out():
+    sql = _sql("invoice 4711")
+
+    assert "canonical_chunk_id IS NULL" not in sql
+    assert "NOT (EXISTS" in sql
+    assert "chunks_1.id = chunks.canonical_chunk_id" in sql
+    assert "chunks_1.content_hash = chunks.content_hash" in sql
+
+
+def test_blank_query_runs_nothing():
+    db = CapturingSession()
+    assert asyncio.run(LexicalSearchService.search(db, "   ")) == []
+    assert db.statements == []
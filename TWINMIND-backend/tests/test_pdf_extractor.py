@@ -0,0 +1,35 @@
+"""
+Page-range scheduling in extract_pdf_pages, with the worker calls faked.
+"""
+import asyncio
+
+from app.services.ingestion import pdf_extractor
+
+
+def test_ranges_go_through_a_bounded_window_in_page_order(monkeypatch):
+    monkeypatch.setattr(pdf_extractor.settings, "PDF_PAGES_PER_TASK", 3)
+    monkeypatch.setattr(pdf_extractor.settings, "CPU_POOL_SIZE", 2)
+    in_flight = 0
+    peak = 0
+
+    async def fake_run_cpu(fn, path, *args):
+        nonlocal in_flight, peak
+        if fn is pdf_extractor.count_pdf_pages:
+            return 10
+        start, end, _ = args
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later ranges finish first
+        await asyncio.sleep(0.01 * (10 - start))
+        in_flight -= 1
+        return [f"page {n}" for n in range(start, end)], []
+
+    monkeypatch.setattr(pdf_extractor, "run_cpu", fake_run_cpu)
+
+    async def collect():
+        return [text async for text in pdf_extractor.extract_pdf_pages("doc.pdf")]
+
+    pages = asyncio.run(collect())
+
+    assert pages == [f"page {n}" for n in range(10)]
+    assert peak == 2
@@ -0,0 +1,134 @@
+"""
+Reranker budget handling, with the cross-encoder call faked: each fake
+batch reports how long predict() took in the worker.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import reranker
+
+
+def _hits(n):
+    # Fused order, RRF-scale scores
+    return [(SimpleNamespace(content=f"chunk {i}"), 1 / (60 + i)) for i in range(n)]
+
+
+class FakeModel:
+    """Scores chunk i as i / 100 (so reranking reverses the fused order)."""
+
+    def __init__(self, seconds_per_pair=0.0, fail=False):
+        self.seconds_per_pair = seconds_per_pair
+        self.fail = fail
+        self.batches = []
+
+    async def run_cpu(self, fn, query, texts):
+        assert fn is reranker.score_pairs
+        if self.fail:
+            raise RuntimeError("model crashed")
+        self.batches.append(len(texts))
+        seconds = self.seconds_per_pair * len(texts)
+        await asyncio.sleep(seconds)
+        scores = np.array([int(t.split()[1]) / 100 for t in texts], dtype=np.float32)
+        return scores, seconds
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(reranker, "_pair_seconds", None)
+    monkeypatch.setattr(reranker.settings, "RERANK_CANDIDATES", 8)
+    monkeypatch.setattr(reranker.settings, "RERANK_BATCH_SIZE", 4)
+    fake = FakeModel()
+    monkeypatch.setattr(reranker, "run_cpu", fake.run_cpu)
+    return fake
+
+
+def _rerank(hits, budget_ms=1000):
+    return asyncio.run(reranker.rerank("query", hits, budget_ms=budget_ms))
+
+
+def test_full_rerank_puts_unscored_tail_below_head(model):
+    hits = _hits(12)
+    # Warm estimate: everything fits
+    reranker._pair_seconds = 0.0001
+
+    out = _rerank(hits)
+
+    head = [chunk.content for chunk, _ in out[:8]]
+    assert head == [f"chunk {i}" for i in range(7, -1, -1)]
+    # Past RERANK_CANDIDATES: fused order kept, scores below the head
+    assert [chunk for chunk, _ in out[8:]] == [chunk for chunk, _ in hits[8:]]
+    tail_scores = [score for _, score in out[8:]]
+    assert max(tail_scores) < min(score for _, score in out[:8])
+    assert tail_scores == sorted(tail_scores, reverse=True)
+    assert model.batches == [4, 4]
+
+
+def test_first_batch_is_a_probe_not_a_full_batch(model):
+    out = _rerank(_hits(8))
+
+    assert model.batches[0] == reranker.PROBE_PAIRS
+    assert sum(model.batches) == 8
+    assert reranker._pair_seconds == 0.0
+    assert [chunk.content for chunk, _ in out][:2] == ["chunk 7", "chunk 6"]
+
+
+def test_budget_keeps_fused_order_for_the_rest(model):
+    model.seconds_per_pair = 0.1    # 100 ms per pair against a 250 ms budget
+    reranker._pair_seconds = 0.1
+    hits = _hits(8)
+
+    out = _rerank(hits, budget_ms=250)
+
+    # Two pairs fit; the first batch is sized to them and never abandoned
+    assert model.batches == [2]
+    assert [chunk.content for chunk, _ in out[:2]] == ["chunk 1", "chunk 0"]
+    assert [chunk for chunk, _ in out[2:]] == [chunk for chunk, _ in hits[2:]]
+    assert max(score for _, score in out[2:]) < out[1][1]
+
+
+def test_slow_estimate_recovers_through_probes(model):
+    # One pathological batch left a huge estimate behind
+    reranker._pair_seconds = 10.0
+    model.seconds_per_pair = 0.001
+
+    for _ in range(40):
+        model.batches.clear()
+        _rerank(_hits(8), budget_ms=100)
+        if sum(model.batches) == 8:
+            break
+
+    assert model.batches[0] == reranker.PROBE_PAIRS
+    assert sum(model.batches) == 8
+    assert reranker._pair_seconds < 0.1
+
+
+def test_model_failure_falls_back_to_fused_order(model):
+    model.fail = True
+    hits = _hits(8)
+
+    assert _rerank(hits) == hits
+
+
+def test_exhausted_budget_returns_hits_unchanged(model):
+    hits = _hits(8)
+
+    assert _rerank(hits, budget_ms=0) == hits
+    assert model.batches == []
+
+
+def test_score_pairs_times_predict_only(monkeypatch):
+    class Encoder:
+        def predict(self, pairs, batch_size, show_progress_bar):
+            assert batch_size == len(pairs)
+            return [0.5] * len(pairs)
+
+    monkeypatch.setattr(reranker, "_model", Encoder())
+
+    scores, seconds = reranker.score_pairs("query", ["a", "b", "c"])
+
+    assert scores.dtype == np.float32
+    assert scores.tolist() == [0.5, 0.5, 0.5]
+    assert 0 <= seconds < 1